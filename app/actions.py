@@ -0,0 +1,208 @@
+"""
+Actions module for the UWAutoTest application
+Registry of the handlers that carry out each action type, built in or from plugins
+"""
+import importlib.util
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.models import TestAction, ActionType
+
+
+DEFAULT_PLUGIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins")
+
+# Entry point group installed packages register their action plugins under
+ENTRY_POINT_GROUP = "uwautotest.actions"
+
+# What the target of a custom action is, which decides how it is validated
+TARGET_KINDS = ("none", "selector", "optional selector", "text")
+
+
+@dataclass
+class ActionSession:
+    """What the bound actions of one test run share
+
+    Created once per test, after its browser session started, so handlers
+    can look up anything that depends on the session ahead of the first
+    action instead of on every call.
+    """
+    runner: Any           # TestRunner running the test
+    driver: Any           # WebDriver session of the test
+    element_cache: Any    # ElementCache of the test
+    wait: Any             # WebDriverWait on the session, reused by every action
+    capture_performance: bool = False    # Whether navigations record page-load metrics
+    screenshot_prefix: str = ""    # Start of the test's screenshot file names, unique per test and browser
+
+    def screenshot_path(self, name: str) -> str:
+        """File name of a screenshot taken by the test, e.g. 'login[2]-chrome-error_3.png'"""
+        return f"{self.screenshot_prefix}{name}.png"
+
+
+# Prepares one compiled action for a session and returns the callable that
+# runs it. The callable gets the test result and raises to fail the test.
+Binder = Callable[[Any, ActionSession], Callable[[Dict[str, Any]], None]]
+
+
+@dataclass
+class ActionDefinition:
+    """An action type and the handler that carries it out"""
+    action_type: ActionType
+    bind: Binder
+    target: str = "none"                                   # One of TARGET_KINDS, for custom actions
+    parse: Optional[Callable[[TestAction], Any]] = None    # Parses the value ahead of runs, into step.options
+    description: str = ""
+    builtin: bool = False
+
+
+_definitions: Dict[ActionType, ActionDefinition] = {}
+_plugins_lock = threading.RLock()
+_plugins_loaded = False
+
+# Problems met while loading plugins, e.g. a plugin that failed to import
+plugin_errors: List[str] = []
+
+
+def builtin_action(action_type: ActionType):
+    """Decorator registering the binder of a built-in action type"""
+    def decorator(bind: Binder) -> Binder:
+        _definitions[action_type] = ActionDefinition(action_type, bind, builtin=True)
+        return bind
+    return decorator
+
+
+def register_action(name: str, target: str = "none", parse: Optional[Callable[[TestAction], Any]] = None,
+                    description: str = ""):
+    """Decorator registering a custom action type, for use in plugins
+
+    Example:
+        @register_action("Seed Database", target="none", description="Load a SQL file")
+        def seed_database(step, session):
+            path = step.action.value
+            def run(result):
+                ...
+            return run
+
+    Args:
+        name: Action type name, as shown in the editor and stored in test files
+        target: What the target is: 'none', 'selector' (a CSS selector that
+            must be given), 'optional selector' or 'text' (anything)
+        parse: Optional function that parses the action ahead of any run,
+            raising ValueError for an invalid action. Its return value is
+            available to the binder as step.options.
+        description: One line shown by 'main.py actions'
+
+    Raises:
+        ValueError: If the name is a built-in action or the target kind is unknown
+    """
+    if target not in TARGET_KINDS:
+        raise ValueError(f"Unknown target kind '{target}'; expected one of {', '.join(TARGET_KINDS)}")
+
+    def decorator(bind: Binder) -> Binder:
+        if any(member.value == name for member in ActionType):
+            raise ValueError(f"'{name}' is a built-in action and cannot be replaced")
+        action_type = ActionType.extend(name)
+        _definitions[action_type] = ActionDefinition(action_type, bind, target, parse, description)
+        return bind
+    return decorator
+
+
+def get_definition(action_type: ActionType) -> Optional[ActionDefinition]:
+    return _definitions.get(action_type)
+
+
+def custom_actions() -> List[ActionDefinition]:
+    """Definitions of the action types registered by plugins"""
+    load_plugins()
+    return [definition for definition in _definitions.values() if not definition.builtin]
+
+
+def action_names() -> List[str]:
+    """Names of all action types, built-in ones first, e.g. for the editor's combo box"""
+    return [action_type.value for action_type in ActionType] + \
+        [definition.action_type.value for definition in custom_actions()]
+
+
+def _load_plugin_file(path: str) -> None:
+    module_name = f"uwautotest_plugins.{os.path.splitext(os.path.basename(path))[0]}"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+
+def _entry_points() -> List[Any]:
+    from importlib.metadata import entry_points
+    found = entry_points()
+    if hasattr(found, "select"):
+        return list(found.select(group=ENTRY_POINT_GROUP))
+    return list(found.get(ENTRY_POINT_GROUP, []))
+
+
+def load_plugins(plugin_dir: Optional[str] = None) -> List[str]:
+    """Import action plugins, once per process
+
+    Plugins are the *.py files in the plugins directory and the modules
+    installed packages list under the 'uwautotest.actions' entry point
+    group. Importing a plugin registers its actions with register_action;
+    an entry point may also name a function, which is called without
+    arguments. A plugin that fails to load is skipped and reported in
+    plugin_errors.
+
+    Args:
+        plugin_dir: Directory of plugin files (default: plugins/)
+
+    Returns:
+        Problems met while loading plugins
+    """
+    global _plugins_loaded
+    with _plugins_lock:
+        if _plugins_loaded:
+            return plugin_errors
+        _plugins_loaded = True
+        plugin_dir = plugin_dir or DEFAULT_PLUGIN_DIR
+        if os.path.isdir(plugin_dir):
+            for file_name in sorted(os.listdir(plugin_dir)):
+                if file_name.endswith(".py") and not file_name.startswith("_"):
+                    try:
+                        _load_plugin_file(os.path.join(plugin_dir, file_name))
+                    except Exception as e:
+                        plugin_errors.append(f"Plugin {file_name}: {type(e).__name__}: {e}")
+        try:
+            entry_points = _entry_points()
+        except Exception as e:
+            entry_points = []
+            plugin_errors.append(f"Could not list plugin entry points: {e}")
+        for entry_point in entry_points:
+            try:
+                loaded = entry_point.load()
+                if callable(loaded):
+                    loaded()
+            except Exception as e:
+                plugin_errors.append(f"Plugin {entry_point.name}: {type(e).__name__}: {e}")
+        return plugin_errors
+
+
+def bind_plan(steps: List[Any], session: ActionSession) -> List[Tuple[Any, Callable[[Dict[str, Any]], None]]]:
+    """Resolve every compiled action of a test to the callable that runs it
+
+    Args:
+        steps: CompiledActions of the test, in run order
+        session: The test's session
+
+    Returns:
+        (compiled action, callable taking the test result) pairs
+    """
+    bound = []
+    for step in steps:
+        definition = _definitions.get(step.action_type)
+        if definition is None:
+            raise ValueError(f"Action #{step.index + 1}: no handler is registered for "
+                             f"'{step.action_type.value}'")
+        try:
+            bound.append((step, definition.bind(step, session)))
+        except Exception as e:
+            raise ValueError(f"Action #{step.index + 1} ({step.action_type.value}) could not be prepared: {e}")
+    return bound
@@ -0,0 +1,175 @@
+"""
+Browser Profile module for the UWAutoTest application
+Builds a template browser profile once per run and gives each browser session a fast copy of it
+"""
+import errno
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# ioctl that makes a file share the blocks of another until either is written (Btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+# Errors meaning the filesystem or the pair of paths cannot share blocks
+REFLINK_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EBADF, errno.ENOSYS}
+
+# Files a browser leaves behind to lock its profile, and crash data not worth copying
+PROFILE_LOCKS = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile", "parent.lock", "lock",
+                 ".parentlock")
+PROFILE_JUNK = ("Crashpad", "Crash Reports", "BrowserMetrics", "minidumps")
+
+
+class ProfileSetupError(RuntimeError):
+    """The template profile could not be built, e.g. its setup test failed"""
+
+
+def _reflink_file(source: str, destination: str) -> None:
+    """Copy a file by sharing its blocks, raising OSError where that is not supported"""
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source, destination)
+
+
+class ProfileTemplate:
+    """A browser profile built once and copied for every new browser session
+
+    The template is a regular user data directory (Chrome, Edge) or profile
+    (Firefox) that a first session, and optionally a setup test, filled
+    with cached assets, cookies such as dismissed consent banners and
+    finished first-run work. Copies share the template's blocks where the
+    filesystem supports it (reflinks on Btrfs and XFS, clonefile on APFS),
+    so making one costs little more than creating the directory entries;
+    elsewhere the files are copied. Hard links are never used, since
+    browsers write their databases in place and would change the template.
+
+    Everything lives under one temporary directory that cleanup() removes,
+    including copies left behind by worker processes that were killed.
+    """
+
+    def __init__(self, root: str, browser: str):
+        """Open a template directory
+
+        Args:
+            root: Directory holding the template and its copies
+            browser: Browser the template was built with
+        """
+        self.root = root
+        self.browser = browser
+        self.template_dir = os.path.join(root, "template")
+        self.clones_dir = os.path.join(root, "clones")
+        self.reflink = fcntl is not None and platform.system() == "Linux"
+        self.clonefile = platform.system() == "Darwin"
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, browser: str) -> "ProfileTemplate":
+        """Create an empty template in a new temporary directory"""
+        template = cls(tempfile.mkdtemp(prefix="uwat-profile-"), browser)
+        os.makedirs(template.template_dir)
+        os.makedirs(template.clones_dir)
+        return template
+
+    def seal(self) -> None:
+        """Remove the locks and crash data the building session left in the template"""
+        for directory, subdirectories, files in os.walk(self.template_dir):
+            for name in subdirectories[:]:
+                if name in PROFILE_JUNK:
+                    shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+                    subdirectories.remove(name)
+            for name in files:
+                if name in PROFILE_LOCKS:
+                    # Chrome's Singleton* locks are symlinks to nowhere, which os.walk lists as files
+                    os.remove(os.path.join(directory, name))
+
+    def clone(self) -> str:
+        """Make a copy of the template for one browser session
+
+        Returns:
+            Path of the copy, to be passed to release() once the session quits
+
+        Raises:
+            ProfileSetupError: If the template has been cleaned up
+        """
+        if not os.path.isdir(self.template_dir):
+            raise ProfileSetupError(f"Template profile {self.template_dir} no longer exists")
+        destination = tempfile.mkdtemp(dir=self.clones_dir)
+        # mkdtemp makes the directory, but copytree and cp want to create it
+        os.rmdir(destination)
+        if self.clonefile and subprocess.run(["cp", "-c", "-R", self.template_dir, destination],
+                                             capture_output=True).returncode == 0:
+            return destination
+        shutil.copytree(self.template_dir, destination, symlinks=True, copy_function=self._copy_file)
+        return destination
+
+    def _copy_file(self, source: str, destination: str) -> None:
+        if self.reflink:
+            try:
+                _reflink_file(source, destination)
+                return
+            except OSError as e:
+                if e.errno not in REFLINK_UNSUPPORTED:
+                    raise
+                # Same filesystem for every file, so one failure settles it for the run
+                with self._lock:
+                    self.reflink = False
+        shutil.copy2(source, destination)
+
+    def release(self, path: str) -> None:
+        """Remove a copy after its browser session quit"""
+        shutil.rmtree(path, ignore_errors=True)
+
+    def cleanup(self) -> None:
+        """Remove the template and all copies of it"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def describe(self) -> str:
+        """Size of the template and how copies are made, for run output"""
+        size = 0
+        for directory, _, files in os.walk(self.template_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                if not os.path.islink(path):
+                    size += os.path.getsize(path)
+        method = "clonefile" if self.clonefile else "reflink if supported" if self.reflink else "copy"
+        return f"{size / 1024 / 1024:.1f} MB template profile, copied per session ({method})"
+
+
+def build_profile_template(runner, setup_test=None) -> ProfileTemplate:
+    """Build a template profile by starting a browser on it, optionally running a setup test
+
+    Args:
+        runner: TestRunner whose browser settings the template is built with
+        setup_test: Optional TestCase run on the template session first, e.g.
+            to visit the site, fill caches and dismiss consent banners
+
+    Returns:
+        A sealed ProfileTemplate
+
+    Raises:
+        ProfileSetupError: If the setup test failed
+    """
+    template = ProfileTemplate.create(runner.browser)
+    try:
+        driver = runner._create_driver(profile_dir=template.template_dir)
+        try:
+            if setup_test is not None:
+                result = runner._run_test(setup_test, None, None, None, driver)
+                if not result["success"]:
+                    raise ProfileSetupError(f"Profile setup test '{setup_test.name}' failed: {result['error']}")
+        finally:
+            # Quitting writes cookies and caches to disk
+            driver.quit()
+        template.seal()
+    except Exception:
+        template.cleanup()
+        raise
+    return template
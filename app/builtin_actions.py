@@ -0,0 +1,217 @@
+"""
+Built-in Actions module for the UWAutoTest application
+Handlers of the built-in action types, bound to a browser session once per test
+"""
+import time
+
+from selenium.webdriver.support.ui import Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from app.actions import builtin_action
+from app.models import ActionType
+from app.performance import get_time_origin, get_load_time, get_request_count
+
+
+@builtin_action(ActionType.NAVIGATE)
+def bind_navigate(step, session):
+    driver, runner, element_cache = session.driver, session.runner, session.element_cache
+    page_helpers = runner.page_helpers
+    capture = session.capture_performance
+
+    def run(result):
+        element_cache.clear()
+        page_helpers.document_changed(driver)
+        driver.get(step.url)
+        if capture:
+            runner._record_performance(driver, step.action, step.index, result)
+    return run
+
+
+@builtin_action(ActionType.CLICK)
+def bind_click(step, session):
+    driver, runner, element_cache = session.driver, session.runner, session.element_cache
+    page_helpers = runner.page_helpers
+    click = lambda element: element.click()
+
+    def run(result):
+        element_cache.use(driver, step.locator, click, "clickable")
+        # Any click may navigate; checking the URL would cost the round trip the cache saves
+        element_cache.clear()
+        page_helpers.document_changed(driver)
+
+    if not session.capture_performance:
+        return run
+
+    def run_measured(result):
+        time_origin = get_time_origin(driver)
+        run(result)
+        # A new time origin means the click loaded a new document
+        if time_origin is not None and get_time_origin(driver) != time_origin:
+            runner._record_performance(driver, step.action, step.index, result)
+    return run_measured
+
+
+@builtin_action(ActionType.INPUT)
+def bind_input(step, session):
+    driver, element_cache = session.driver, session.element_cache
+    value = step.action.value
+
+    def type_value(element):
+        element.clear()
+        element.send_keys(value)
+
+    def run(result):
+        element_cache.use(driver, step.locator, type_value)
+    return run
+
+
+@builtin_action(ActionType.SELECT)
+def bind_select(step, session):
+    driver, element_cache = session.driver, session.element_cache
+    option = step.action.value
+    choose = lambda element: Select(element).select_by_visible_text(option)
+
+    def run(result):
+        element_cache.use(driver, step.locator, choose)
+    return run
+
+
+@builtin_action(ActionType.SUBMIT)
+def bind_submit(step, session):
+    driver, element_cache = session.driver, session.element_cache
+    page_helpers = session.runner.page_helpers
+    submit = lambda element: element.submit()
+
+    def run(result):
+        element_cache.use(driver, step.locator, submit)
+        element_cache.clear()
+        page_helpers.document_changed(driver)
+    return run
+
+
+@builtin_action(ActionType.WAIT)
+def bind_wait(step, session):
+    if step.wait_seconds is not None:
+        seconds = step.wait_seconds
+        if seconds == 0:
+            return lambda result: None
+        return lambda result: time.sleep(seconds)
+    if not step.locator:
+        # Nothing to wait for
+        return lambda result: None
+    # Wait for element if target is provided
+    wait, element_cache = session.wait, session.element_cache
+    condition = EC.presence_of_element_located(step.locator)
+
+    def run(result):
+        element_cache.add(step.locator, wait.until(condition))
+    return run
+
+
+@builtin_action(ActionType.ASSERT_TEXT)
+def bind_assert_text(step, session):
+    driver, element_cache = session.driver, session.element_cache
+    expected = step.action.value
+    read_text = lambda element: element.text
+
+    def run(result):
+        actual_text = element_cache.use(driver, step.locator, read_text)
+        if expected not in actual_text:
+            raise AssertionError(f"Text '{expected}' not found in element. Actual text: '{actual_text}'")
+    return run
+
+
+@builtin_action(ActionType.ASSERT_ELEMENT)
+def bind_assert_element(step, session):
+    wait, element_cache = session.wait, session.element_cache
+    condition = EC.presence_of_element_located(step.locator)
+    target = step.action.target
+
+    def run(result):
+        # Check if element exists based on CSS selector. Always looked up
+        # again: a cached element says nothing about whether it was removed.
+        try:
+            element_cache.add(step.locator, wait.until(condition))
+            if not step.expect_exists:
+                raise AssertionError(f"Element '{target}' exists but expected not to exist")
+        except TimeoutException:
+            if step.expect_exists:
+                raise AssertionError(f"Element '{target}' does not exist but expected to exist")
+    return run
+
+
+@builtin_action(ActionType.SCREENSHOT)
+def bind_screenshot(step, session):
+    driver = session.driver
+    screenshot_path = session.screenshot_path(f"screenshot_{step.index}")
+
+    def run(result):
+        driver.save_screenshot(screenshot_path)
+        result["screenshots"].append(screenshot_path)
+    return run
+
+
+@builtin_action(ActionType.ASSERT_SCREENSHOT)
+def bind_assert_screenshot(step, session):
+    runner, driver, element_cache = session.runner, session.driver, session.element_cache
+    return lambda result: runner._assert_screenshot(driver, step, result, element_cache)
+
+
+@builtin_action(ActionType.EXECUTE_SCRIPT)
+def bind_execute_script(step, session):
+    driver, element_cache = session.driver, session.element_cache
+    # Cached in the page by hash, so repeated scripts only send the hash
+    helpers = session.runner.page_helpers.get(driver)
+    script = step.action.value
+
+    def run(result):
+        if step.locator:
+            # Find element and pass to script
+            element_cache.use(driver, step.locator, lambda element: helpers.run_script(script, [element]))
+        else:
+            # Execute script without element
+            helpers.run_script(script, [])
+        # Scripts can change the page in any way, including navigating
+        element_cache.clear()
+        helpers.document_changed()
+    return run
+
+
+@builtin_action(ActionType.CALL_HELPER)
+def bind_call_helper(step, session):
+    element_cache = session.element_cache
+    helpers = session.runner.page_helpers.get(session.driver)
+    name, args = step.helper
+
+    def run(result):
+        helpers.call(name, args)
+        # Helpers such as click and setValue change the page
+        element_cache.clear()
+        helpers.document_changed()
+    return run
+
+
+@builtin_action(ActionType.ASSERT_LOAD_TIME)
+def bind_assert_load_time(step, session):
+    runner = session.runner
+
+    def run(result):
+        metrics = runner._last_performance(result)
+        load_time = get_load_time(metrics, step.metric)
+        if load_time is None:
+            raise AssertionError(f"Load time metric '{step.metric}' was not recorded for {metrics.get('url')}")
+        if load_time > step.budget:
+            raise AssertionError(f"Load time '{step.metric}' of {load_time:.0f}ms exceeds budget of {step.budget:.0f}ms")
+    return run
+
+
+@builtin_action(ActionType.ASSERT_MAX_REQUESTS)
+def bind_assert_max_requests(step, session):
+    runner = session.runner
+
+    def run(result):
+        request_count = get_request_count(runner._last_performance(result))
+        if request_count > step.budget:
+            raise AssertionError(f"Page made {request_count} requests, exceeding budget of {step.budget:.0f}")
+    return run
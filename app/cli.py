@@ -0,0 +1,856 @@
+"""
+Command line interface for the UWAutoTest application
+Runs tests and load tests without the GUI
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Iterator, Optional
+
+from app.models import TestCase
+from app.test_manager import TestManager
+from app.parameterize import expand_test_case
+from app.scheduler import DurationHistory, LongestFirstSchedule
+from app.visual import DEFAULT_BASELINE_DIR
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TEST_DIR = os.path.join(PROJECT_DIR, "test_cases")
+DEFAULT_SUITE_DIR = os.path.join(PROJECT_DIR, "test_suites")
+DEFAULT_COORDINATOR_PORT = 8765
+
+
+def resolve_suite_path(suite: str, suite_dir: str) -> str:
+    """Resolve a suite given either as a file path or as a suite name
+
+    Args:
+        suite: Suite file path or name
+        suite_dir: Directory holding named suites
+
+    Returns:
+        Path to the suite file
+    """
+    if os.path.exists(suite):
+        return suite
+    return os.path.join(suite_dir, f"{suite}.json")
+
+
+def load_suite_config(args) -> dict:
+    """Load the suite named on the command line, if any"""
+    if not args.suite:
+        return {"tests": []}
+    return TestManager().load_test_suite_config(resolve_suite_path(args.suite, args.suite_dir))
+
+
+def selected_test_names(args) -> List[str]:
+    """Collect test names from positional arguments and the --suite option"""
+    names = list(args.tests)
+    for name in load_suite_config(args)["tests"]:
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def load_test_cases(test_names: List[str], test_dir: str) -> List[TestCase]:
+    """Load test cases by name from the test directory"""
+    test_manager = TestManager()
+    return [test_manager.load_test_case(os.path.join(test_dir, f"{name}.json")) for name in test_names]
+
+
+def iter_expanded_test_cases(test_names: List[str], test_dir: str) -> Iterator[TestCase]:
+    """Lazily load test cases by name, expanding data-driven ones per row"""
+    test_manager = TestManager()
+    for name in test_names:
+        test_case = test_manager.load_test_case(os.path.join(test_dir, f"{name}.json"))
+        yield from expand_test_case(test_case, test_dir)
+
+
+def report_invalid_tests(test_names: List[str], test_dir: str) -> int:
+    """Validate test cases before running them and print any problems
+
+    Returns:
+        Number of test cases with problems
+    """
+    from app.compiler import validate_test_files
+
+    problems = validate_test_files(test_names, test_dir, TestManager())
+    for name, issues in problems.items():
+        print(f"=== Invalid test: {name} ===", file=sys.stderr)
+        for issue in issues:
+            print(f"  {issue}", file=sys.stderr)
+    return len(problems)
+
+
+def create_runner(args, template=None):
+    """Create a TestRunner from the common browser options
+
+    With --isolate, an IsolatedRunner is returned that runs each test in a
+    worker process with hard deadlines.
+
+    Args:
+        args: Parsed arguments
+        template: Optional ProfileTemplate that new browser sessions start from
+    """
+    template_dir = template.root if template is not None else None
+    if getattr(args, "isolate", False):
+        from app.isolation import IsolatedRunner
+        return IsolatedRunner(browser=args.browser, headless=args.headless, wait_time=args.wait,
+                              engine=args.engine, driver_path=args.driver_path, capture_performance=args.perf,
+                              test_timeout=args.test_timeout or None, action_timeout=args.action_timeout or None,
+                              warm=bool(args.warm), trace_dir=args.trace,
+                              trace_dom=not args.trace_no_dom, baseline_dir=args.baseline_dir,
+                              update_baselines=args.update_baselines, optimize=args.optimize,
+                              profile_template=template_dir)
+
+    from app.test_runner import TestRunner
+    return TestRunner(browser=args.browser, headless=args.headless, wait_time=args.wait,
+                      engine=getattr(args, "engine", "selenium"), driver_path=args.driver_path,
+                      capture_performance=args.perf, trace_dir=getattr(args, "trace", None), trace_dom=not getattr(args, "trace_no_dom", False),
+                      baseline_dir=args.baseline_dir, update_baselines=getattr(args, "update_baselines", None),
+                      optimize=getattr(args, "optimize", False), profile_template=template_dir)
+
+
+def build_template(args):
+    """Build the template profile for --template-profile, running the --template-setup test on it
+
+    Returns:
+        The ProfileTemplate, or None if it could not be built
+    """
+    from app.browser_profile import build_profile_template
+    from app.test_runner import TestRunner
+    setup_test = None
+    if args.template_setup:
+        if report_invalid_tests([args.template_setup], args.test_dir):
+            return None
+        setup_test = load_test_cases([args.template_setup], args.test_dir)[0]
+    runner = TestRunner(browser=args.browser, headless=args.headless, wait_time=args.wait,
+                        driver_path=args.driver_path, baseline_dir=args.baseline_dir)
+    print("Building a template profile" + (f" with '{args.template_setup}'" if setup_test else "") + "...")
+    try:
+        template = build_profile_template(runner, setup_test)
+    except Exception as e:
+        print(f"Could not build the template profile: {e}", file=sys.stderr)
+        return None
+    print(template.describe() + "\n")
+    return template
+
+
+def start_metrics(args):
+    """Create the run metrics and serve them when --metrics-port or --metrics-file is given
+
+    Returns:
+        (RunMetrics, MetricsServer) with None for what is not enabled
+    """
+    if args.metrics_port is None and not args.metrics_file:
+        return None, None
+    from app.metrics import RunMetrics, MetricsServer
+    metrics = RunMetrics()
+    server = None
+    if args.metrics_port is not None:
+        server = MetricsServer(metrics, port=args.metrics_port)
+        server.start()
+        print(f"Serving metrics on {server.url}")
+    return metrics, server
+
+
+def finish_metrics(args, metrics, server) -> None:
+    """Print the metrics summary, write the snapshot file and stop serving"""
+    if metrics is None:
+        return
+    if server is not None:
+        server.stop()
+    print("\n=== Metrics ===")
+    print("\n".join(metrics.summary_lines()))
+    if args.metrics_file:
+        metrics.write_snapshot(args.metrics_file)
+        print(f"Metrics written to {args.metrics_file}")
+
+
+def print_result(test_case: TestCase, result: dict) -> None:
+    """Print a single test result in the same layout as the GUI"""
+    print(f"=== Test: {test_case.name} ===")
+    if result.get("engine") == "http":
+        print("Engine: HTTP (no browser)")
+    if result["success"]:
+        print(f"TEST PASSED ({result['duration']:.2f} seconds)")
+    elif result.get("skipped"):
+        print("TEST SKIPPED")
+        print(f"Reason: {result['error']}")
+    else:
+        print("TEST TIMED OUT" if result.get("timed_out") else "TEST FAILED")
+        print(f"Error: {result['error']}")
+    if result.get("trace"):
+        print(f"Trace: {result['trace']}")
+    print()
+
+
+def command_run(args) -> int:
+    """Run test cases and report pass/fail, under the profiler with --profile"""
+    if not args.profile:
+        return run_selected(args)
+
+    from app.profiling import RunProfiler, DEFAULT_PROFILE_DIR
+    output_dir = args.profile_dir or os.path.join(DEFAULT_PROFILE_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    profiler = RunProfiler(output_dir)
+    profiler.start()
+    try:
+        return run_selected(args, profiler)
+    finally:
+        profiler.stop()
+        print("\n=== Profile ===")
+        print("\n".join(profiler.summary_lines()))
+
+
+def run_selected(args, profiler=None) -> int:
+    """Run the tests selected on the command line
+
+    Args:
+        args: Parsed arguments of the run command
+        profiler: Optional RunProfiler to measure each test with
+    """
+    test_names = selected_test_names(args)
+    if not test_names:
+        print("No tests given. Pass test names or --suite.", file=sys.stderr)
+        return 2
+    if report_invalid_tests(test_names, args.test_dir):
+        print("\nNo tests were run.", file=sys.stderr)
+        return 2
+
+    chained = args.chained or bool(load_suite_config(args).get("chained"))
+    if chained and args.isolate:
+        print("Chained runs share one browser and cannot use --isolate.", file=sys.stderr)
+        return 2
+    if args.contexts > 1 and (chained or args.isolate or args.browser not in ("Chrome", "Edge")):
+        print("--contexts needs Chrome or Edge and cannot be combined with chained runs or --isolate.",
+              file=sys.stderr)
+        return 2
+
+    template = None
+    if args.template_profile or args.template_setup:
+        template = build_template(args)
+        if template is None:
+            print("\nNo tests were run.", file=sys.stderr)
+            return 2
+
+    runner = create_runner(args, template)
+    metrics, metrics_server = start_metrics(args)
+    runner.metrics = metrics
+    if profiler is not None and not args.isolate:
+        # Isolated tests run in worker processes; only this process's overhead is profiled
+        runner.profiler = profiler
+    context_runner = None
+    if args.contexts > 1:
+        from app.contexts import ContextRunner
+        context_runner = ContextRunner(runner, contexts_per_browser=args.contexts)
+    elif args.warm and not chained and not args.isolate:
+        # Launch the next browsers while the current tests run
+        runner.enable_warm_standby(size=args.warm, idle_timeout=60.0)
+    mode = " chained on one browser session" if chained else ""
+    if context_runner is not None:
+        browsers = -(-max(1, args.workers) // args.contexts)
+        mode = f", {args.contexts} isolated contexts per browser process ({browsers} process(es))"
+    print(f"Running {len(test_names)} test(s) with {args.browser} browser{mode}...\n")
+
+    history = DurationHistory.for_test_dir(args.test_dir)
+    test_cases = iter_expanded_test_cases(test_names, args.test_dir)
+    schedule = None
+    if chained:
+        results = runner.run_chain(test_cases)
+    else:
+        if args.workers > 1 and args.order == "longest":
+            test_cases = schedule = LongestFirstSchedule(test_cases, history, args.workers)
+        results = (context_runner or runner).run_tests(test_cases, max_workers=args.workers)
+
+    success_count = 0
+    skipped_count = 0
+    run_count = 0
+    start_time = time.time()
+    try:
+        for test_case, result in results:
+            history.record(test_case, result)
+            run_count += 1
+            if result["success"]:
+                success_count += 1
+            elif result.get("skipped"):
+                skipped_count += 1
+            print_result(test_case, result)
+    finally:
+        if context_runner is not None:
+            context_runner.shutdown()
+        if args.isolate:
+            runner.shutdown()
+        else:
+            runner.disable_warm_standby()
+            runner.disable_tracing()
+        if template is not None:
+            template.cleanup()
+        history.save()
+
+    print("=== Test Run Complete ===")
+    print(f"Passed: {success_count}/{run_count}" + (f"  Skipped: {skipped_count}" if skipped_count else ""))
+    if schedule is not None:
+        print(f"Makespan: {time.time() - start_time:.1f}s (predicted {schedule.predicted_makespan:.1f}s, longest first)")
+    finish_metrics(args, metrics, metrics_server)
+    return 0 if success_count == run_count else 1
+
+
+def command_matrix(args) -> int:
+    """Run tests on every combination of browser, headless mode and viewport"""
+    from app.matrix import MatrixRunner, MatrixReport, build_matrix, parse_viewport
+
+    test_names = selected_test_names(args)
+    if not test_names:
+        print("No tests given. Pass test names or --suite.", file=sys.stderr)
+        return 2
+    try:
+        modes = {"headless": [True], "headed": [False], "both": [True, False]}[args.modes]
+        viewports = [parse_viewport(viewport) for viewport in args.viewports.split(",")]
+        cells = build_matrix([browser.strip() for browser in args.browsers.split(",")], modes, viewports)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    if report_invalid_tests(test_names, args.test_dir):
+        print("\nNo tests were run.", file=sys.stderr)
+        return 2
+
+    workers = args.workers or len(cells)
+    matrix = MatrixRunner(cells, wait_time=args.wait, engine=args.engine, driver_path=args.driver_path,
+                          trace_dir=args.trace, baseline_dir=args.baseline_dir, capture_performance=args.perf)
+    if args.warm:
+        matrix.enable_warm_standby()
+    metrics, metrics_server = start_metrics(args)
+    if metrics is not None:
+        matrix.enable_metrics(metrics)
+    print(f"Running {len(test_names)} test(s) on {len(cells)} configuration(s) with {workers} worker(s)...\n")
+
+    report = MatrixReport(cells)
+    start_time = time.time()
+    try:
+        for cell, test_case, result in matrix.run_tests(iter_expanded_test_cases(test_names, args.test_dir),
+                                                        max_workers=workers):
+            report.record(cell, test_case, result)
+            status = "PASSED" if result["success"] else f"FAILED: {result['error']}"
+            print(f"[{cell.label}] {test_case.name}: {status} ({result['duration']:.2f}s)")
+    finally:
+        matrix.shutdown()
+
+    print(f"\n=== Matrix Complete ({time.time() - start_time:.1f}s) ===")
+    print("\n".join(report.format_table()))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2)
+        print(f"\nReport written to {args.report}")
+    finish_metrics(args, metrics, metrics_server)
+    return 0 if report.all_passed else 1
+
+
+def command_coordinator(args) -> int:
+    """Serve the selected tests to runner nodes and report their results"""
+    from app.distributed import Coordinator
+
+    test_names = selected_test_names(args)
+    if not test_names:
+        print("No tests given. Pass test names or --suite.", file=sys.stderr)
+        return 2
+    if report_invalid_tests(test_names, args.test_dir):
+        print("\nNo tests were run.", file=sys.stderr)
+        return 2
+
+    history = DurationHistory.for_test_dir(args.test_dir)
+    test_cases = list(iter_expanded_test_cases(test_names, args.test_dir))
+    coordinator = Coordinator(test_cases, history.predict, host=args.host, port=args.port,
+                              lease_timeout=args.lease_timeout)
+    try:
+        coordinator.start()
+    except OSError as e:
+        print(f"Could not listen on {args.host}:{args.port}: {str(e)}", file=sys.stderr)
+        return 2
+    print(f"Coordinating {len(test_cases)} test(s) on {coordinator.url}")
+    print(f"Start runner nodes with: python main.py node {coordinator.url} --headless\n")
+
+    try:
+        for test_case, result, node in coordinator.results():
+            history.record(test_case, result)
+            print(f"[{node or 'lost'}] ", end="")
+            print_result(test_case, result)
+    finally:
+        coordinator.stop()
+        history.save()
+
+    report = coordinator.report()
+    print(f"=== Distributed Run Complete ({report['duration']:.1f}s) ===")
+    print(f"Passed: {report['passed']}/{report['total']}\n")
+    print("\n".join(coordinator.format_node_table()))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+    return 0 if report["passed"] == report["total"] else 1
+
+
+def command_node(args) -> int:
+    """Run tests handed out by a coordinator until its run is done"""
+    from app.distributed import RunnerNode, CoordinatorGone
+
+    runner = create_runner(args)
+    if args.warm:
+        runner.enable_warm_standby(size=args.warm, idle_timeout=60.0)
+
+    def on_result(test_case, result):
+        status = "PASSED" if result["success"] else f"FAILED: {result['error']}"
+        print(f"{test_case.name}: {status} ({result['duration']:.2f}s)", flush=True)
+
+    node = RunnerNode(args.coordinator, runner, name=args.name, workers=args.workers, on_result=on_result)
+    print(f"Joining {args.coordinator} with {args.workers} worker(s)...")
+    try:
+        completed = node.run()
+    except CoordinatorGone as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        runner.disable_warm_standby()
+    print(f"Run complete; this node ran {completed} test(s)")
+    return 0
+
+
+def command_watch(args) -> int:
+    """Rerun tests whenever their files change, until interrupted"""
+    from app.watcher import TestWatcher
+
+    runner = create_runner(args)
+    suites = [args.suite] if args.suite else []
+    if args.suite and not os.path.exists(resolve_suite_path(args.suite, args.suite_dir)):
+        print(f"Suite not found: {args.suite}", file=sys.stderr)
+        return 2
+
+    def on_rerun(test_names, changed):
+        files = ", ".join(sorted(os.path.basename(path) for path in changed))
+        print(f"--- {time.strftime('%H:%M:%S')} changed: {files}; rerunning {len(test_names)} test(s) ---\n")
+
+    def on_error(message):
+        print(f"ERROR: {message}\n", file=sys.stderr)
+
+    watcher = TestWatcher(runner, args.test_dir, args.suite_dir, test_names=args.tests, suites=suites,
+                          on_result=print_result, on_rerun=on_rerun, on_error=on_error,
+                          debounce=args.debounce, force_polling=args.poll)
+    watcher.start()
+    scope = ", ".join(args.tests + suites) or "all tests"
+    print(f"Watching {args.test_dir} and {args.suite_dir} ({watcher.backend}) for changes to {scope}. "
+          f"Press Ctrl+C to stop.\n")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        watcher.stop()
+    return 0
+
+
+def list_traces(trace_dir: str) -> int:
+    """Print the traces in a directory, newest first"""
+    from app.trace import TRACE_EXTENSION, read_trace
+
+    paths = sorted((os.path.join(trace_dir, name) for name in os.listdir(trace_dir) if name.endswith(TRACE_EXTENSION)),
+                   key=os.path.getmtime, reverse=True)
+    for path in paths:
+        trace = read_trace(path)
+        end = trace["end"]
+        status = "INCOMPLETE" if end is None else ("PASSED" if end["success"] else "FAILED")
+        name = trace["start"]["test"] if trace["start"] else "?"
+        print(f"{status:<10} {len(trace['actions']):>4} actions  {name:<40} {os.path.basename(path)}")
+    if not paths:
+        print(f"No traces in {trace_dir}")
+    return 0
+
+
+def command_trace(args) -> int:
+    """Show a recorded trace without re-running the test"""
+    from app.trace import read_trace, format_action_record, record_dom
+
+    if os.path.isdir(args.trace_file):
+        return list_traces(args.trace_file)
+
+    trace = read_trace(args.trace_file)
+    start = trace["start"] or {}
+    start_time = start.get("time")
+    actions = trace["actions"]
+
+    if args.dom is not None:
+        matching = [record for record in actions if record.get("index") == args.dom - 1]
+        dom = record_dom(matching[-1]) if matching else None
+        if dom is None:
+            print(f"No DOM snapshot for action #{args.dom}", file=sys.stderr)
+            return 1
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(dom)
+            print(f"DOM after action #{args.dom} written to {args.output}")
+        else:
+            print(dom)
+        return 0
+
+    print(f"=== Trace: {start.get('test', '?')} ===")
+    print(f"Base URL: {start.get('base_url', '')}")
+    for record in actions:
+        if args.action is not None and record.get("index") != args.action - 1:
+            continue
+        lines = format_action_record(record, start_time)
+        print("\n".join(lines if args.action is not None or args.verbose else lines[:1]))
+    end = trace["end"]
+    if end is None:
+        print("\nThe run ended before the trace was complete (crashed or killed)")
+    elif args.action is None:
+        print(f"\n{'TEST PASSED' if end['success'] else 'TEST FAILED'} ({end['duration']:.2f} seconds)")
+        if end.get("error"):
+            print(f"Error: {end['error']}")
+    return 0
+
+
+def command_validate(args) -> int:
+    """Check test cases for invalid selectors, URLs and action values without running them"""
+    test_names = selected_test_names(args)
+    if not test_names:
+        test_names = sorted(file[:-len('.json')] for file in os.listdir(args.test_dir) if file.endswith('.json'))
+
+    invalid = report_invalid_tests(test_names, args.test_dir)
+    print(f"Validated {len(test_names)} test(s): {len(test_names) - invalid} valid, {invalid} invalid")
+    return 1 if invalid else 0
+
+
+def command_optimize(args) -> int:
+    """Report what the optimizer would change in each test, without running anything"""
+    from app.optimizer import dry_run, format_optimization_report
+
+    test_names = selected_test_names(args)
+    if not test_names:
+        test_names = sorted(file[:-len('.json')] for file in os.listdir(args.test_dir) if file.endswith('.json'))
+
+    optimizations = [dry_run(test_case) for test_case in load_test_cases(test_names, args.test_dir)]
+    print("\n".join(format_optimization_report(optimizations)))
+    print("Nothing was changed. Pass --optimize to the run command to run tests optimized.")
+    return 0
+
+
+def command_actions(args) -> int:
+    """List the action types, including the ones added by plugins"""
+    from app.actions import DEFAULT_PLUGIN_DIR, custom_actions, plugin_errors
+    from app.models import ActionType
+
+    print("Built-in actions:")
+    for action_type in ActionType:
+        print(f"  {action_type.value}")
+    custom = custom_actions()
+    print(f"\nPlugin actions ({DEFAULT_PLUGIN_DIR} and installed packages):")
+    for definition in custom:
+        description = f" - {definition.description}" if definition.description else ""
+        print(f"  {definition.action_type.value} (target: {definition.target}){description}")
+    if not custom:
+        print("  (none)")
+    for error in plugin_errors:
+        print(f"ERROR: {error}", file=sys.stderr)
+    return 1 if plugin_errors else 0
+
+
+def command_baseline(args) -> int:
+    """Manage the baseline screenshots of Assert Screenshot actions"""
+    from app.visual import BaselineStore
+
+    store = BaselineStore(args.baseline_dir)
+    patterns = args.names or None
+    if args.operation == "accept":
+        accepted = store.accept(patterns)
+        for key in accepted:
+            print(f"Accepted {key}")
+        print(f"{len(accepted)} baseline(s) updated")
+        return 0 if accepted or not patterns else 1
+    if args.operation == "reject":
+        rejected = store.reject(patterns)
+        print(f"{len(rejected)} pending screenshot(s) dropped")
+        return 0
+    if args.operation == "prune":
+        print(f"Deleted {store.prune()} unused file(s)")
+        return 0
+
+    baselines = store.baselines()
+    pending = store.pending()
+    for key, entry in sorted(baselines.items()):
+        print(f"{'':<8} {key:<60} {entry['width']}x{entry['height']}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['updated']))}")
+    for key, entry in sorted(pending.items()):
+        if key in baselines:
+            change = f"{entry.get('diff_ratio', 1.0) * 100:.2f}% changed"
+        else:
+            change = "new"
+        print(f"{'PENDING':<8} {key:<60} {entry['width']}x{entry['height']}  {change}"
+              + (f"  diff: {entry['diff']}" if entry.get("diff") else ""))
+    print(f"\n{len(baselines)} baseline(s), {len(pending)} pending")
+    return 0
+
+
+def format_latency_table(action_latency: dict) -> List[str]:
+    """Format per-action latency percentiles as table rows"""
+    lines = [f"  {'Action':<50} {'count':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8}"]
+    for key, summary in action_latency.items():
+        lines.append(
+            f"  {key[:50]:<50} {summary['count']:>7} {summary['p50']*1000:>6.0f}ms {summary['p90']*1000:>6.0f}ms "
+            f"{summary['p95']*1000:>6.0f}ms {summary['p99']*1000:>6.0f}ms"
+        )
+    return lines
+
+
+def command_load(args) -> int:
+    """Replay test cases concurrently to generate load"""
+    from app.load_test import LoadProfile, LoadTester
+
+    suite = load_suite_config(args)
+    test_names = selected_test_names(args)
+    if not test_names:
+        print("No tests given. Pass test names or --suite.", file=sys.stderr)
+        return 2
+
+    if report_invalid_tests(test_names, args.test_dir):
+        print("\nNo load was generated.", file=sys.stderr)
+        return 2
+
+    # A data-driven test's weight is shared by its rows, so adding rows does not shift the mix
+    suite_weights = suite.get("weights", {})
+    test_cases, weights = [], []
+    for name in test_names:
+        rows = list(iter_expanded_test_cases([name], args.test_dir))
+        if not rows:
+            continue
+        test_cases.extend(rows)
+        weights.extend([float(suite_weights.get(name, 1.0)) / len(rows)] * len(rows))
+    if not test_cases:
+        print("The selected tests have no data rows to run.", file=sys.stderr)
+        return 2
+
+    # Load generation always uses headless browsers
+    args.headless = True
+    runner = create_runner(args)
+    profile = LoadProfile(duration=args.duration, users=args.users, rate=args.rate, ramp_up=args.ramp_up)
+    tester = LoadTester(runner, test_cases, profile, weights=weights)
+
+    mode = f"{args.rate}/s target rate" if args.rate else "closed loop"
+    print(f"Load test: {len(test_cases)} test(s), {args.users} user(s), {mode}, "
+          f"{args.duration:.0f}s with {args.ramp_up:.0f}s ramp-up\n")
+
+    def on_progress(progress):
+        print(f"[{progress['elapsed']:6.1f}s] {progress['phase']:<8} "
+              f"{progress['throughput']:6.2f} tests/s  errors {progress['error_rate']*100:5.1f}%  "
+              f"backlog {progress['backlog']}")
+
+    report = tester.run(on_progress=on_progress, progress_interval=args.interval)
+
+    failed = 0
+    for phase, stats in report["phases"].items():
+        failed += stats["failed"]
+        print(f"\n=== {phase} ({stats['duration']:.1f}s) ===")
+        print(f"Completed: {stats['completed']}  Failed: {stats['failed']}  "
+              f"Throughput: {stats['throughput']:.2f} tests/s  Error rate: {stats['error_rate']*100:.1f}%")
+        latency = stats["test_latency"]
+        print(f"Test latency: p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  p99 {latency['p99']:.2f}s")
+        if stats["action_latency"]:
+            print("\n".join(format_latency_table(stats["action_latency"])))
+        for error, count in stats["errors"].items():
+            print(f"  {count}x {error}")
+    if args.rate:
+        print(f"\nLate starts: {report['late_starts']}  Max backlog: {report['max_backlog']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+    return 0 if failed == 0 else 1
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the test selection and browser options shared by all commands"""
+    add_selection_arguments(parser)
+    add_browser_arguments(parser)
+
+
+def add_selection_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options that select the tests to run"""
+    parser.add_argument("tests", nargs="*", help="Names of test cases to run")
+    parser.add_argument("--suite", help="Suite name or path to a suite file")
+    parser.add_argument("--test-dir", default=DEFAULT_TEST_DIR, help="Test cases directory")
+    parser.add_argument("--suite-dir", default=DEFAULT_SUITE_DIR, help="Test suites directory")
+
+
+def add_browser_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options that configure the browser tests run in"""
+    parser.add_argument("--browser", default="Chrome", choices=["Chrome", "Firefox", "Edge"])
+    parser.add_argument("--headless", action="store_true", help="Run browsers in headless mode")
+    parser.add_argument("--wait", type=int, default=10, help="Implicit wait time in seconds")
+    parser.add_argument("--driver-path", help="Local driver executable to use instead of downloading one")
+    parser.add_argument("--baseline-dir", default=DEFAULT_BASELINE_DIR,
+                        help="Baseline screenshots for Assert Screenshot actions")
+    parser.add_argument("--perf", action="store_true",
+                        help="Record page-load metrics after every navigation, not only in tests "
+                             "with performance assertions")
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the live metrics options of the run and matrix commands"""
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve live metrics for Prometheus on http://127.0.0.1:PORT/metrics (0 picks a port)")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help="Write the metrics at the end of the run to FILE "
+                             "(JSON for a .json file, Prometheus text otherwise)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line argument parser"""
+    parser = argparse.ArgumentParser(prog="main.py", description="UWAutoTest command line interface")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run test cases")
+    add_common_arguments(run_parser)
+    run_parser.add_argument("--workers", type=int, default=1, help="Number of tests to run in parallel")
+    run_parser.add_argument("--engine", default="selenium", choices=["selenium", "auto"],
+                            help="'auto' runs tests that need no JavaScript over plain HTTP")
+    run_parser.add_argument("--warm", type=int, default=0, metavar="N",
+                            help="Keep N browsers pre-launched so each test starts without waiting")
+    run_parser.add_argument("--order", default="longest", choices=["longest", "given"],
+                            help="With --workers, start the tests predicted to take longest first "
+                                 "(from previous runs or their actions), or keep the given order")
+    run_parser.add_argument("--chained", action="store_true",
+                            help="Run the tests in order on one browser session without resetting it "
+                                 "(also enabled by \"chained\": true in the suite file)")
+    run_parser.add_argument("--contexts", type=int, default=1, metavar="N",
+                            help="Run up to N of the --workers tests at once in one Chrome or Edge process, "
+                                 "each in its own isolated browser context")
+    run_parser.add_argument("--isolate", action="store_true",
+                            help="Run each worker in its own process and kill tests that miss a deadline")
+    run_parser.add_argument("--test-timeout", type=float, default=600.0,
+                            help="With --isolate, seconds a whole test may take (0 for no limit)")
+    run_parser.add_argument("--action-timeout", type=float, default=120.0,
+                            help="With --isolate, seconds a single action may take on top of a fixed Wait (0 for no limit)")
+    run_parser.add_argument("--trace", metavar="DIR",
+                            help="Record a trace file per test (page state after every action) in DIR")
+    run_parser.add_argument("--trace-no-dom", action="store_true", help="Leave DOM snapshots out of traces")
+    run_parser.add_argument("--update-baselines", choices=["missing", "all"],
+                            help="Record screenshot baselines that do not exist yet ('missing'), "
+                                 "or also replace the ones that no longer match ('all')")
+    add_metrics_arguments(run_parser)
+    run_parser.add_argument("--optimize", action="store_true",
+                            help="Drop redundant steps (repeated navigations and waits, overwritten inputs, "
+                                 "existence checks before interactions) before running each test")
+    run_parser.add_argument("--template-profile", action="store_true",
+                            help="Build a browser profile once and start every browser session from a copy of it, "
+                                 "so caches, cookies and first-run work carry over")
+    run_parser.add_argument("--template-setup", metavar="TEST",
+                            help="Test case to run on the template profile first, e.g. one that accepts "
+                                 "cookie banners (implies --template-profile)")
+    run_parser.add_argument("--profile", action="store_true",
+                            help="Profile the run: where time goes between Python, WebDriver and waiting")
+    run_parser.add_argument("--profile-dir", metavar="DIR",
+                            help="Directory for the profile files (default: profiles/<timestamp>)")
+    run_parser.set_defaults(func=command_run)
+
+    trace_parser = subparsers.add_parser("trace", help="Show a recorded trace, or list the traces in a directory")
+    trace_parser.add_argument("trace_file", help="Trace file, or a directory of traces")
+    trace_parser.add_argument("--action", type=int, metavar="N", help="Show the details of action N")
+    trace_parser.add_argument("--verbose", "-v", action="store_true", help="Show the details of every action")
+    trace_parser.add_argument("--dom", type=int, metavar="N", help="Print the page HTML after action N")
+    trace_parser.add_argument("--output", "-o", help="With --dom, write the HTML to this file")
+    trace_parser.set_defaults(func=command_trace)
+
+    matrix_parser = subparsers.add_parser("matrix", help="Run tests across browsers, headless modes and viewports")
+    add_common_arguments(matrix_parser)
+    matrix_parser.add_argument("--browsers", default="Chrome,Firefox,Edge", help="Comma-separated browsers")
+    matrix_parser.add_argument("--modes", default="headless", choices=["headless", "headed", "both"],
+                               help="Headless, headed or both")
+    matrix_parser.add_argument("--viewports", default="max",
+                               help="Comma-separated window sizes such as 1280x800,375x667 ('max' to maximize)")
+    matrix_parser.add_argument("--workers", type=int, default=0,
+                               help="Tests to run in parallel across all configurations (default: one per configuration)")
+    matrix_parser.add_argument("--engine", default="selenium", choices=["selenium", "auto"])
+    matrix_parser.add_argument("--warm", action="store_true", help="Keep a browser ready per configuration")
+    matrix_parser.add_argument("--trace", metavar="DIR", help="Record a trace file per test in DIR")
+    matrix_parser.add_argument("--report", help="Write the combined report to this JSON file")
+    add_metrics_arguments(matrix_parser)
+    matrix_parser.set_defaults(func=command_matrix)
+
+    coordinator_parser = subparsers.add_parser("coordinator",
+                                               help="Hand out tests to runner nodes and collect their results")
+    add_selection_arguments(coordinator_parser)
+    coordinator_parser.add_argument("--host", default="127.0.0.1",
+                                    help="Interface to listen on (the API has no authentication)")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_COORDINATOR_PORT, help="Port to listen on")
+    coordinator_parser.add_argument("--lease-timeout", type=float, default=30.0,
+                                    help="Seconds without a heartbeat before a node's tests go to other nodes")
+    coordinator_parser.add_argument("--report", help="Write the aggregated report to this JSON file")
+    coordinator_parser.set_defaults(func=command_coordinator)
+
+    node_parser = subparsers.add_parser("node", help="Run tests handed out by a coordinator")
+    node_parser.add_argument("coordinator", help="Coordinator URL, e.g. http://127.0.0.1:8765")
+    add_browser_arguments(node_parser)
+    node_parser.add_argument("--workers", type=int, default=1, help="Number of tests to run at once")
+    node_parser.add_argument("--engine", default="selenium", choices=["selenium", "auto"])
+    node_parser.add_argument("--warm", type=int, default=0, metavar="N",
+                             help="Keep N browsers launched ahead of the next tests")
+    node_parser.add_argument("--name", help="Node name in the report (default: host name and process ID)")
+    node_parser.set_defaults(func=command_node)
+
+    watch_parser = subparsers.add_parser("watch", help="Rerun tests when their files change")
+    add_common_arguments(watch_parser)
+    watch_parser.add_argument("--debounce", type=float, default=0.3,
+                              help="Seconds to wait for a burst of saves to settle before rerunning")
+    watch_parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using inotify")
+    watch_parser.set_defaults(func=command_watch)
+
+    baseline_parser = subparsers.add_parser("baseline", help="List, accept or reject screenshot baselines")
+    baseline_parser.add_argument("operation", choices=["list", "accept", "reject", "prune"],
+                                 help="'accept' makes pending screenshots from failed comparisons the new "
+                                      "baselines, 'reject' drops them, 'prune' deletes unused images")
+    baseline_parser.add_argument("names", nargs="*",
+                                 help="Baseline names or keys to accept or reject (default: all pending)")
+    baseline_parser.add_argument("--baseline-dir", default=DEFAULT_BASELINE_DIR, help="Baseline store directory")
+    baseline_parser.set_defaults(func=command_baseline)
+
+    validate_parser = subparsers.add_parser("validate", help="Check test cases without running them")
+    validate_parser.add_argument("tests", nargs="*", help="Names of test cases to check (default: all)")
+    validate_parser.add_argument("--suite", help="Suite name or path to a suite file")
+    validate_parser.add_argument("--test-dir", default=DEFAULT_TEST_DIR, help="Test cases directory")
+    validate_parser.add_argument("--suite-dir", default=DEFAULT_SUITE_DIR, help="Test suites directory")
+    validate_parser.set_defaults(func=command_validate)
+
+    optimize_parser = subparsers.add_parser("optimize",
+                                            help="Report redundant steps and the time run --optimize would save")
+    optimize_parser.add_argument("tests", nargs="*", help="Names of test cases to check (default: all)")
+    optimize_parser.add_argument("--suite", help="Suite name or path to a suite file")
+    optimize_parser.add_argument("--test-dir", default=DEFAULT_TEST_DIR, help="Test cases directory")
+    optimize_parser.add_argument("--suite-dir", default=DEFAULT_SUITE_DIR, help="Test suites directory")
+    optimize_parser.set_defaults(func=command_optimize)
+
+    actions_parser = subparsers.add_parser("actions", help="List the action types, including plugin actions")
+    actions_parser.set_defaults(func=command_actions)
+
+    load_parser = subparsers.add_parser("load", help="Replay test cases concurrently to generate load")
+    add_common_arguments(load_parser)
+    load_parser.add_argument("--users", type=int, default=1, help="Number of virtual users (headless browsers)")
+    load_parser.add_argument("--rate", type=float, help="Target test starts per second (default: closed loop)")
+    load_parser.add_argument("--duration", type=float, default=60.0, help="Total duration in seconds")
+    load_parser.add_argument("--ramp-up", type=float, default=0.0, help="Ramp-up duration in seconds")
+    load_parser.add_argument("--interval", type=float, default=5.0, help="Seconds between live progress lines")
+    load_parser.add_argument("--report", help="Write the final report to this JSON file")
+    load_parser.set_defaults(func=command_load)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the command line interface
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Process exit code
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
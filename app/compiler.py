@@ -0,0 +1,411 @@
+"""
+Compiler module for the UWAutoTest application
+Validates test cases before execution and compiles them into execution plans
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple, Dict
+from urllib.parse import urlsplit
+
+from app.actions import get_definition
+from app.models import TestCase, TestAction, ActionType
+from app.page_helpers import parse_helper_call
+from app.parameterize import PLACEHOLDER_PATTERN, is_parameterized, resolve_data_source
+from app.performance import LOAD_TIME_METRICS, parse_budget
+from app.visual import VisualCheck, parse_visual_check, visual_available
+
+
+# Same value as selenium.webdriver.common.by.By.CSS_SELECTOR, kept here so
+# test cases can be validated without importing Selenium
+CSS_SELECTOR = "css selector"
+
+# Actions whose target must be a CSS selector
+SELECTOR_ACTIONS = {
+    ActionType.CLICK,
+    ActionType.INPUT,
+    ActionType.SELECT,
+    ActionType.SUBMIT,
+    ActionType.ASSERT_TEXT,
+    ActionType.ASSERT_ELEMENT,
+}
+
+# Actions whose target is an optional CSS selector
+OPTIONAL_SELECTOR_ACTIONS = {
+    ActionType.WAIT,
+    ActionType.EXECUTE_SCRIPT,
+    ActionType.ASSERT_SCREENSHOT,
+    ActionType.CALL_HELPER,
+}
+
+# Actions that check the page load recorded by the last navigation
+PERFORMANCE_ASSERTIONS = {ActionType.ASSERT_LOAD_TIME, ActionType.ASSERT_MAX_REQUESTS}
+
+NAVIGABLE_SCHEMES = ("http", "https", "file", "about", "data")
+
+SCHEME_PATTERN = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+
+VENDOR_PSEUDO_PATTERN = re.compile(r"::?-(webkit|moz|ms|o)-", re.IGNORECASE)
+
+
+@dataclass
+class CompiledAction:
+    """A validated action with its strings parsed ahead of execution"""
+    index: int
+    action: TestAction
+    locator: Optional[Tuple[str, str]] = None  # (By strategy, selector) for element actions
+    url: Optional[str] = None                  # Absolute URL for Navigate
+    expect_exists: bool = True                 # Assert Element expectation
+    wait_seconds: Optional[int] = None         # Fixed delay for Wait
+    budget: Optional[float] = None             # Limit for performance assertions
+    metric: Optional[str] = None               # Metric checked by Assert Load Time
+    visual: Optional[VisualCheck] = None       # Comparison options of Assert Screenshot
+    helper: Optional[Tuple[str, list]] = None  # (name, arguments) of Call Helper
+    options: Any = None                        # Parsed value of a custom action, see app.actions
+
+    @property
+    def action_type(self) -> ActionType:
+        return self.action.action_type
+
+
+@dataclass
+class CompiledPlan:
+    """A test case compiled into a list of ready-to-execute actions"""
+    test_case: TestCase
+    steps: List[CompiledAction] = field(default_factory=list)
+
+    @property
+    def asserts_performance(self) -> bool:
+        """Whether the plan checks page-load metrics, which then have to be collected"""
+        return any(step.action_type in PERFORMANCE_ASSERTIONS for step in self.steps)
+
+
+@dataclass
+class PlanIssue:
+    """A problem found while validating a test case"""
+    test_name: str
+    action_index: Optional[int]
+    message: str
+
+    def __str__(self) -> str:
+        if self.action_index is None:
+            return f"{self.test_name}: {self.message}"
+        return f"{self.test_name}: action #{self.action_index + 1}: {self.message}"
+
+
+class PlanValidationError(ValueError):
+    """Raised when a test case fails validation"""
+
+    def __init__(self, issues: List[PlanIssue]):
+        self.issues = issues
+        super().__init__("\n".join(str(issue) for issue in issues))
+
+
+def _check_selector_structure(selector: str) -> Optional[str]:
+    """Basic structural check used when soupsieve is not installed"""
+    stack = []
+    pairs = {")": "(", "]": "["}
+    quote = None
+    escaped = False
+    for char in selector:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char in "([":
+            stack.append(char)
+        elif char in ")]":
+            if not stack or stack.pop() != pairs[char]:
+                return f"Unbalanced '{char}'"
+    if quote:
+        return "Unterminated string"
+    if stack:
+        return f"Unclosed '{stack[-1]}'"
+
+    for group in selector.split(","):
+        group = group.strip()
+        if not group:
+            return "Empty selector in list"
+        if group[0] in ">+~" or group[-1] in ">+~":
+            return "Selector starts or ends with a combinator"
+    return None
+
+
+def validate_selector(selector: str) -> Optional[str]:
+    """Check that a CSS selector is syntactically valid
+
+    Args:
+        selector: CSS selector to check
+
+    Returns:
+        An error message, or None if the selector is valid
+    """
+    if not selector.strip():
+        return "CSS selector is empty"
+    try:
+        import soupsieve
+    except ImportError:
+        return _check_selector_structure(selector)
+
+    try:
+        soupsieve.compile(selector)
+    except soupsieve.SelectorSyntaxError as e:
+        # Vendor-prefixed pseudo-classes (e.g. :-webkit-autofill) are valid in the browser
+        if "pseudo-class" in str(e) and VENDOR_PSEUDO_PATTERN.search(selector):
+            return None
+        return f"Invalid CSS selector '{selector}': {str(e).splitlines()[0]}"
+    except Exception as e:
+        # Pseudo-classes soupsieve does not implement are left to the browser
+        if "not implemented" in str(e) or "unsupported" in str(e).lower():
+            return None
+        return f"Invalid CSS selector '{selector}': {str(e).splitlines()[0]}"
+    return None
+
+
+def is_absolute_url(target: str) -> bool:
+    """Check whether a Navigate target is a complete URL rather than a path"""
+    match = SCHEME_PATTERN.match(target)
+    return bool(match) and match.group(1).lower() in NAVIGABLE_SCHEMES
+
+
+def resolve_url(base_url: str, target: str) -> str:
+    """Resolve a Navigate target against the test case's base URL
+
+    Absolute targets are used as-is. Relative targets are appended to the
+    base URL, joining path targets with a single slash.
+
+    Args:
+        base_url: Base URL of the test case
+        target: Navigate target
+
+    Returns:
+        The URL to load
+    """
+    if is_absolute_url(target):
+        return target
+    if target.startswith("/"):
+        return base_url.rstrip("/") + target
+    return base_url + target
+
+
+def validate_url(url: str) -> Optional[str]:
+    """Check that a URL can be loaded by the browser
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        An error message, or None if the URL is valid
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError as e:
+        return f"Invalid URL '{url}': {str(e)}"
+    if parts.scheme not in NAVIGABLE_SCHEMES:
+        return f"Invalid URL '{url}': expected an http(s) URL"
+    if parts.scheme in ("http", "https") and not parts.netloc:
+        return f"Invalid URL '{url}': missing host"
+    if any(char.isspace() for char in url.strip()):
+        return f"Invalid URL '{url}': contains whitespace"
+    return None
+
+
+def _has_placeholder(text: str) -> bool:
+    return bool(PLACEHOLDER_PATTERN.search(text))
+
+
+def _target_kind(action_type: ActionType) -> str:
+    """'selector', 'optional selector' or another kind of target (see app.actions.TARGET_KINDS)"""
+    if action_type in SELECTOR_ACTIONS:
+        return "selector"
+    if action_type in OPTIONAL_SELECTOR_ACTIONS:
+        return "optional selector"
+    definition = get_definition(action_type)
+    return definition.target if definition is not None else "none"
+
+
+def _compile_action(test_case: TestCase, index: int, action: TestAction,
+                    issues: List[PlanIssue]) -> CompiledAction:
+    """Validate and compile a single action, appending any problems to issues"""
+    step = CompiledAction(index=index, action=action)
+
+    def issue(message):
+        issues.append(PlanIssue(test_case.name, index, message))
+
+    action_type = action.action_type
+    target = action.target.strip()
+    # Placeholders are only filled in per data row, so templates are checked loosely
+    templated = _has_placeholder(action.target)
+
+    target_kind = _target_kind(action_type)
+    if target_kind == "selector" or (target_kind == "optional selector" and target):
+        if not target:
+            issue(f"{action_type.value} needs a CSS selector target")
+        elif not templated:
+            error = validate_selector(target)
+            if error:
+                issue(error)
+        step.locator = (CSS_SELECTOR, target)
+
+    if action_type == ActionType.NAVIGATE:
+        step.url = resolve_url(test_case.base_url, action.target)
+        # A missing base URL is reported once for the whole test case
+        has_base = bool(test_case.base_url.strip()) or is_absolute_url(target)
+        if "://" in target and not is_absolute_url(target) and not templated:
+            issue(f"Invalid URL '{target}': expected an http(s) URL")
+        elif has_base and not templated and not _has_placeholder(test_case.base_url):
+            error = validate_url(step.url)
+            if error:
+                issue(error)
+
+    elif action_type == ActionType.SELECT:
+        if not action.value:
+            issue("Select needs the visible text of the option to choose as its value")
+
+    elif action_type == ActionType.ASSERT_ELEMENT:
+        value = action.value.strip().lower()
+        if value not in ("true", "false") and not _has_placeholder(action.value):
+            issue(f"Assert Element value must be 'true' or 'false', got '{action.value}'")
+        step.expect_exists = value != "false"
+
+    elif action_type == ActionType.WAIT:
+        value = action.value.strip()
+        if value.isdigit():
+            step.wait_seconds = int(value)
+        elif value and not _has_placeholder(value):
+            issue(f"Wait value must be a whole number of seconds, got '{action.value}'")
+
+    elif action_type == ActionType.EXECUTE_SCRIPT:
+        if not action.value.strip():
+            issue("Execute Script needs JavaScript code as its value")
+
+    elif action_type == ActionType.CALL_HELPER:
+        try:
+            step.helper = parse_helper_call(action.value, target)
+        except ValueError as e:
+            if not (templated or _has_placeholder(action.value)):
+                issue(str(e))
+
+    elif action_type in (ActionType.ASSERT_LOAD_TIME, ActionType.ASSERT_MAX_REQUESTS):
+        try:
+            step.budget = parse_budget(action.value)
+        except ValueError as e:
+            issue(str(e))
+        if action_type == ActionType.ASSERT_LOAD_TIME:
+            step.metric = target or "load"
+            if step.metric.lower() not in LOAD_TIME_METRICS:
+                issue(f"Unknown load time metric '{step.metric}'")
+
+    elif action_type == ActionType.ASSERT_SCREENSHOT:
+        if not visual_available():
+            issue("Assert Screenshot needs the numpy and Pillow packages (pip install numpy pillow)")
+        try:
+            step.visual = parse_visual_check(action.value, f"{test_case.name}-{index + 1}")
+        except ValueError as e:
+            issue(str(e))
+        else:
+            for selector in step.visual.ignore_selectors:
+                error = None if _has_placeholder(selector) else validate_selector(selector)
+                if error:
+                    issue(f"Ignore: {error}")
+
+    else:
+        definition = get_definition(action_type)
+        if definition is not None and definition.parse is not None:
+            try:
+                step.options = definition.parse(action)
+            except ValueError as e:
+                if not (templated or _has_placeholder(action.value)):
+                    issue(str(e))
+
+    return step
+
+
+def validate_test_case(test_case: TestCase) -> List[PlanIssue]:
+    """Find all problems in a test case without running it
+
+    Args:
+        test_case: The TestCase to check
+
+    Returns:
+        List of issues (empty if the test case is valid)
+    """
+    issues = []
+    compile_steps(test_case, issues)
+    return issues
+
+
+def compile_steps(test_case: TestCase, issues: List[PlanIssue]) -> List[CompiledAction]:
+    """Compile every action of a test case, collecting problems in issues"""
+    if not test_case.actions:
+        issues.append(PlanIssue(test_case.name, None, "Test case has no actions"))
+
+    base_url = test_case.base_url.strip()
+    needs_base = any(
+        action.action_type == ActionType.NAVIGATE and not is_absolute_url(action.target)
+        for action in test_case.actions
+    )
+    if needs_base and not _has_placeholder(base_url):
+        if not base_url:
+            issues.append(PlanIssue(test_case.name, None, "Base URL is required for relative Navigate targets"))
+        else:
+            error = validate_url(base_url)
+            if error:
+                issues.append(PlanIssue(test_case.name, None, f"Base URL: {error}"))
+
+    if not is_parameterized(test_case):
+        for index, action in enumerate(test_case.actions):
+            if _has_placeholder(action.target) or _has_placeholder(action.value):
+                issues.append(PlanIssue(test_case.name, index, "Uses ${...} placeholders but has no data source"))
+
+    return [_compile_action(test_case, index, action, issues) for index, action in enumerate(test_case.actions)]
+
+
+def compile_test_case(test_case: TestCase) -> CompiledPlan:
+    """Validate a test case and compile it into an execution plan
+
+    Args:
+        test_case: The TestCase to compile
+
+    Returns:
+        The compiled plan
+
+    Raises:
+        PlanValidationError: If the test case has any problems
+    """
+    issues = []
+    steps = compile_steps(test_case, issues)
+    if issues:
+        raise PlanValidationError(issues)
+    return CompiledPlan(test_case=test_case, steps=steps)
+
+
+def validate_test_files(test_names: List[str], test_dir: str, test_manager) -> Dict[str, List[PlanIssue]]:
+    """Validate test case files by name
+
+    Args:
+        test_names: Names of the test cases to check
+        test_dir: Directory containing the test case files
+        test_manager: TestManager used to load the files
+
+    Returns:
+        Mapping of test name to its issues, only for tests with problems
+    """
+    problems = {}
+    for name in test_names:
+        try:
+            test_case = test_manager.load_test_case(os.path.join(test_dir, f"{name}.json"))
+        except Exception as e:
+            problems[name] = [PlanIssue(name, None, f"Could not load test case: {str(e)}")]
+            continue
+        issues = validate_test_case(test_case)
+        if is_parameterized(test_case) and not os.path.isfile(resolve_data_source(test_case, test_dir)):
+            issues.append(PlanIssue(name, None, f"Data source '{test_case.data_source}' not found"))
+        if issues:
+            problems[name] = issues
+    return problems
@@ -0,0 +1,238 @@
+"""
+Contexts module for the UWAutoTest application
+Runs several tests at once inside one browser process using isolated browser contexts
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models import TestCase
+
+
+# Browsers whose DevTools protocol supports isolated browser contexts
+CONTEXT_BROWSERS = ("Chrome", "Edge")
+
+
+def debugger_address(driver) -> Optional[str]:
+    """Get the host:port of the DevTools endpoint of a Chromium session"""
+    for key in ("goog:chromeOptions", "ms:edgeOptions"):
+        address = driver.capabilities.get(key, {}).get("debuggerAddress")
+        if address:
+            return address
+    return None
+
+
+class SharedBrowser:
+    """One browser process that hands out isolated browser contexts
+
+    A browser context is what an incognito window uses: its own cookies,
+    storage and cache inside the same browser process. Creating one takes
+    milliseconds and little memory compared to launching a browser, and
+    disposing it removes everything the test left behind.
+    """
+
+    def __init__(self, runner):
+        """Launch the browser
+
+        Args:
+            runner: TestRunner whose settings the browser is launched with
+        """
+        self.runner = runner
+        self.driver = runner._create_driver()
+        self.debugger_address = debugger_address(self.driver)
+        if self.debugger_address is None:
+            self.driver.quit()
+            raise RuntimeError(f"{runner.browser} did not report a DevTools address")
+        # The session that creates and disposes contexts is shared by all tests
+        self._lock = threading.Lock()
+
+    def open_context(self) -> Tuple[str, str]:
+        """Create an isolated context with one blank page
+
+        Returns:
+            (browser context id, target id). The target id is also the
+            page's WebDriver window handle.
+        """
+        with self._lock:
+            context_id = self.driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            params = {"url": "about:blank", "browserContextId": context_id}
+            if self.runner.window_size:
+                params["width"], params["height"] = self.runner.window_size
+            target_id = self.driver.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+        return context_id, target_id
+
+    def close_context(self, context_id: str) -> None:
+        """Close a context's pages and delete its cookies, storage and cache"""
+        with self._lock:
+            try:
+                self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+            except Exception:
+                # The browser is gone; the next open_context reports it
+                pass
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class _ContextSlot:
+    """A worker's own WebDriver session, attached to a shared browser"""
+
+    def __init__(self, browser_index: int):
+        self.browser_index = browser_index
+        self.browser: Optional[SharedBrowser] = None
+        self.driver = None
+
+    def detach(self) -> None:
+        if self.driver is not None:
+            try:
+                # Ends the session only; the shared browser keeps running
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+        self.browser = None
+
+
+class ContextRunner:
+    """Runs tests concurrently in isolated contexts of a few shared browsers
+
+    Every worker gets its own WebDriver session attached to a shared
+    browser, so tests in the same browser run truly in parallel rather than
+    taking turns on one session. Each test runs in a fresh browser context
+    that is disposed afterwards. With contexts_per_browser=4 and 8 workers,
+    2 browser processes serve all 8 tests.
+    """
+
+    def __init__(self, runner, contexts_per_browser: int = 4):
+        """Initialize the context runner
+
+        Args:
+            runner: TestRunner providing the browser settings and running the tests
+            contexts_per_browser: Number of tests run at once in one browser process
+        """
+        if runner.browser not in CONTEXT_BROWSERS:
+            raise ValueError(f"Browser contexts need Chrome or Edge, not {runner.browser}")
+        self.runner = runner
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.browsers: List[Optional[SharedBrowser]] = []
+        self._browser_locks: List[threading.Lock] = []
+        self._slots: List[_ContextSlot] = []
+        self._lock = threading.Lock()
+
+    def _get_slots(self, count: int) -> List[_ContextSlot]:
+        with self._lock:
+            while len(self._slots) < count:
+                index = len(self._slots) // self.contexts_per_browser
+                if index == len(self.browsers):
+                    self.browsers.append(None)
+                    self._browser_locks.append(threading.Lock())
+                self._slots.append(_ContextSlot(index))
+            return self._slots[:count]
+
+    def _get_browser(self, index: int) -> SharedBrowser:
+        """Get a shared browser, launching it on first use"""
+        with self._browser_locks[index]:
+            if self.browsers[index] is None:
+                self.browsers[index] = SharedBrowser(self.runner)
+            return self.browsers[index]
+
+    def _drop_browser(self, index: int, browser: SharedBrowser) -> None:
+        """Quit a browser that stopped responding, so the next test launches a new one"""
+        with self._browser_locks[index]:
+            if self.browsers[index] is browser:
+                self.browsers[index] = None
+                browser.quit()
+
+    def _run_in_context(self, slot: _ContextSlot, test_case: TestCase) -> Dict[str, Any]:
+        """Run one test in a new context of the slot's browser"""
+        runner = self.runner
+        if runner._use_http_engine(test_case):
+            http_result = runner._get_http_engine().run_test(test_case)
+            if http_result["success"]:
+                return runner._report_not_run(http_result)
+
+        browser = None
+        start_time = time.time()
+        try:
+            browser = self._get_browser(slot.browser_index)
+            if slot.browser is not browser:
+                # First test of the slot, or its browser was replaced
+                slot.detach()
+                slot.driver = runner._attach_driver(browser.debugger_address)
+                slot.browser = browser
+            context_id, target_id = browser.open_context()
+        except Exception as e:
+            slot.detach()
+            if browser is not None:
+                self._drop_browser(slot.browser_index, browser)
+            return runner._report_not_run(runner._not_run_result(f"Could not create a browser context: {str(e)}"))
+        if runner.metrics is not None:
+            runner.metrics.driver_started(time.time() - start_time, "context")
+
+        try:
+            slot.driver.switch_to.window(target_id)
+            return runner.run_test(test_case, driver=slot.driver)
+        except Exception as e:
+            slot.detach()
+            return runner._not_run_result(f"Could not use the browser context: {str(e)}")
+        finally:
+            browser.close_context(context_id)
+
+    def run_test(self, test_case: TestCase) -> Dict[str, Any]:
+        """Run a test case in a browser context
+
+        Args:
+            test_case: The TestCase to run
+
+        Returns:
+            Dictionary with test results
+        """
+        return self._run_in_context(self._get_slots(1)[0], test_case)
+
+    def run_tests(self, test_cases: Iterable[TestCase], max_workers: int = 1) -> Iterator[Tuple[TestCase, Dict[str, Any]]]:
+        """Run a stream of test cases, several per browser process
+
+        Args:
+            test_cases: Iterable (typically a generator) of TestCases to run
+            max_workers: Number of tests to run concurrently across all browsers
+
+        Yields:
+            (test_case, result) tuples in completion order
+        """
+        iterator = iter(test_cases)
+        idle = list(reversed(self._get_slots(max(1, max_workers))))
+        with ThreadPoolExecutor(max_workers=len(idle)) as executor:
+            pending = {}
+
+            def submit():
+                while idle:
+                    test_case = next(iterator, None)
+                    if test_case is None:
+                        break
+                    slot = idle.pop()
+                    pending[executor.submit(self._run_in_context, slot, test_case)] = (slot, test_case)
+                if self.runner.metrics is not None:
+                    self.runner.metrics.set_pending(len(pending))
+
+            submit()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    slot, test_case = pending.pop(future)
+                    idle.append(slot)
+                    yield test_case, future.result()
+                submit()
+
+    def shutdown(self) -> None:
+        """End all sessions and quit the shared browsers"""
+        for slot in self._slots:
+            slot.detach()
+        for index, browser in enumerate(self.browsers):
+            if browser is not None:
+                browser.quit()
+                self.browsers[index] = None
+        self._slots = []
@@ -0,0 +1,444 @@
+"""
+Distributed module for the UWAutoTest application
+Hands out tests from a coordinator to runner nodes that pull work as they free up
+"""
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.models import TestCase
+
+
+DEFAULT_COORDINATOR_PORT = 8765
+
+# Seconds between heartbeats of a node
+HEARTBEAT_INTERVAL = 5.0
+
+# Seconds without a heartbeat after which a node's tests are handed to other nodes
+LEASE_TIMEOUT = 30.0
+
+# Times a test is handed out before it is failed, so a test that kills its node cannot stall the run
+MAX_ATTEMPTS = 3
+
+# Seconds an idle node waits before asking again while the last tests are still running elsewhere
+IDLE_POLL_INTERVAL = 1.0
+
+# Seconds a node keeps retrying an unreachable coordinator before giving up
+RECONNECT_TIMEOUT = 30.0
+
+
+@dataclass
+class Job:
+    """A test case of a distributed run and who is running it"""
+    job_id: int
+    test_case: TestCase
+    attempts: int = 0
+    node: Optional[str] = None
+    deadline: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+
+
+class Coordinator:
+    """Hands out the tests of a run to runner nodes and collects their results
+
+    Nodes join at any time and lease one test per free worker, so a node
+    that draws long tests simply takes fewer of them while the others keep
+    pulling. A node that stops heartbeating loses its leases and its tests
+    go back to the front of the queue for another node.
+
+    Protocol (JSON over HTTP POST):
+        /join       {"name"} -> {"node", "heartbeat_interval"}
+        /lease      {"node"} -> {"job", "test_case"} | {"wait": seconds} | {"done": true}
+        /heartbeat  {"node", "jobs"} -> {"done": bool}
+        /result     {"node", "job", "result"} -> {"accepted": bool}
+    GET /status returns the progress of the run.
+    """
+
+    def __init__(self, test_cases: List[TestCase], predict: Optional[Callable[[TestCase], float]] = None,
+                 host: str = "127.0.0.1", port: int = DEFAULT_COORDINATOR_PORT,
+                 lease_timeout: float = LEASE_TIMEOUT, max_attempts: int = MAX_ATTEMPTS):
+        """Initialize the coordinator
+
+        Args:
+            test_cases: Concrete (expanded) test cases to run
+            predict: Predicts a test's duration; the longest tests are handed out first
+            host: Interface to listen on. The API has no authentication, so
+                only listen beyond localhost on a trusted network.
+            port: TCP port (0 picks a free one)
+            lease_timeout: Seconds without a heartbeat before a node is considered lost
+            max_attempts: Times a test is handed out before it is failed
+        """
+        self.jobs = [Job(job_id, test_case) for job_id, test_case in enumerate(test_cases)]
+        order = list(range(len(self.jobs)))
+        if predict is not None:
+            predictions = [predict(job.test_case) for job in self.jobs]
+            order.sort(key=lambda job_id: -predictions[job_id])
+        self.host = host
+        self.port = port
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.start_time = None
+        self._queue: Deque[int] = deque(order)
+        self._finished = 0
+        self._results: "queue.Queue[Job]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def done(self) -> bool:
+        return self._finished == len(self.jobs)
+
+    def start(self) -> None:
+        """Start serving nodes on a background thread; raises OSError if the port is taken"""
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] == "/status":
+                    self._reply(coordinator.status())
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                handlers = {
+                    "/join": coordinator.join,
+                    "/lease": coordinator.lease,
+                    "/heartbeat": coordinator.heartbeat,
+                    "/result": coordinator.complete,
+                }
+                handler = handlers.get(self.path)
+                if handler is None:
+                    self.send_error(404)
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    self._reply(handler(request))
+                except (KeyError, ValueError) as e:
+                    self.send_error(400, str(e))
+
+            def _reply(self, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # A node that died mid-request; its lease expires like any other
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.start_time = time.time()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._expire_leases, daemon=True).start()
+
+    def stop(self, grace: float = HEARTBEAT_INTERVAL) -> None:
+        """Stop serving, first giving connected nodes a moment to learn the run is done
+
+        Args:
+            grace: Longest time to wait for nodes to be told the run is over
+        """
+        deadline = time.time() + grace
+        while time.time() < deadline:
+            with self._lock:
+                if all(node["finished"] or node["lost"] for node in self.nodes.values()):
+                    break
+            time.sleep(0.1)
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def join(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Register a node, which may arrive at any point of the run"""
+        with self._lock:
+            name = request.get("name") or "node"
+            node_id = name
+            suffix = 2
+            while node_id in self.nodes:
+                node_id = f"{name}-{suffix}"
+                suffix += 1
+            self.nodes[node_id] = {"joined": time.time(), "last_seen": time.time(), "jobs": set(),
+                                   "completed": 0, "passed": 0, "busy": 0.0, "lost": False, "finished": False}
+        return {"node": node_id, "heartbeat_interval": min(HEARTBEAT_INTERVAL, self.lease_timeout / 3)}
+
+    def _seen(self, node_id: str) -> Dict[str, Any]:
+        """Record that a node is alive; a node declared lost is welcomed back"""
+        node = self.nodes[node_id]
+        node["last_seen"] = time.time()
+        node["lost"] = False
+        return node
+
+    def lease(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Hand the next test to a node with a free worker"""
+        with self._lock:
+            node = self._seen(request["node"])
+            if self.done:
+                node["finished"] = True
+                return {"done": True}
+            if not self._queue:
+                # The last tests are running elsewhere; one may come back if its node is lost
+                return {"wait": IDLE_POLL_INTERVAL}
+            job = self.jobs[self._queue.popleft()]
+            job.attempts += 1
+            job.node = request["node"]
+            job.deadline = time.time() + self.lease_timeout
+            node["jobs"].add(job.job_id)
+        return {"job": job.job_id, "test_case": job.test_case.to_dict()}
+
+    def heartbeat(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Extend the leases of the tests a node is running"""
+        with self._lock:
+            node_id = request["node"]
+            self._seen(node_id)
+            deadline = time.time() + self.lease_timeout
+            for job_id in request.get("jobs", []):
+                job = self.jobs[job_id]
+                if job.node == node_id and job.result is None:
+                    job.deadline = deadline
+            return {"done": self.done}
+
+    def complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a test result; the first result of a test wins"""
+        with self._lock:
+            node_id = request["node"]
+            node = self._seen(node_id)
+            job = self.jobs[request["job"]]
+            node["jobs"].discard(job.job_id)
+            if job.result is not None:
+                # Handed to another node after this one was presumed lost, and finished there first
+                return {"accepted": False}
+            if job.job_id in self._queue:
+                self._queue.remove(job.job_id)
+            self._finish(job, request["result"], node_id)
+            node["completed"] += 1
+            node["passed"] += 1 if job.result["success"] else 0
+            node["busy"] += job.result.get("duration", 0)
+        return {"accepted": True}
+
+    def _finish(self, job: Job, result: Dict[str, Any], node_id: Optional[str]) -> None:
+        job.result = result
+        job.node = node_id
+        self._finished += 1
+        self._results.put(job)
+
+    def _expire_leases(self) -> None:
+        """Requeue the tests of nodes that stopped heartbeating"""
+        while not self._stop.wait(1.0):
+            now = time.time()
+            with self._lock:
+                for node in self.nodes.values():
+                    if not node["finished"] and now - node["last_seen"] > self.lease_timeout:
+                        node["lost"] = True
+                for job in self.jobs:
+                    if job.result is not None or job.node is None or job.deadline > now:
+                        continue
+                    self.nodes[job.node]["jobs"].discard(job.job_id)
+                    if job.attempts >= self.max_attempts:
+                        self._finish(job, {
+                            "success": False,
+                            "error": f"Test was lost {job.attempts} times: the nodes running it stopped responding",
+                            "duration": 0.0, "screenshots": [], "performance": [], "actions": []
+                        }, None)
+                    else:
+                        job.node = None
+                        # To the front, so a long test is not left to the end of the run
+                        self._queue.appendleft(job.job_id)
+
+    def results(self) -> Iterator[Tuple[TestCase, Dict[str, Any], Optional[str]]]:
+        """Stream results as nodes report them, until every test has one
+
+        Yields:
+            (test_case, result, node) tuples in completion order. node is
+            None for a test failed because its nodes were lost.
+        """
+        reported = 0
+        while reported < len(self.jobs):
+            try:
+                job = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            reported += 1
+            yield job.test_case, job.result, job.node
+
+    def status(self) -> Dict[str, Any]:
+        """Progress of the run"""
+        with self._lock:
+            return {
+                "total": len(self.jobs),
+                "finished": self._finished,
+                "queued": len(self._queue),
+                "running": sum(1 for job in self.jobs if job.node is not None and job.result is None),
+                "nodes": {
+                    node_id: {"running": len(node["jobs"]), "completed": node["completed"], "lost": node["lost"]}
+                    for node_id, node in self.nodes.items()
+                }
+            }
+
+    def report(self) -> Dict[str, Any]:
+        """Aggregated report of the run as a JSON-serializable dictionary"""
+        with self._lock:
+            return {
+                "duration": time.time() - self.start_time if self.start_time else 0.0,
+                "total": len(self.jobs),
+                "passed": sum(1 for job in self.jobs if job.result and job.result["success"]),
+                "nodes": {
+                    node_id: {"completed": node["completed"], "passed": node["passed"],
+                              "busy": node["busy"], "lost": node["lost"]}
+                    for node_id, node in self.nodes.items()
+                },
+                "tests": [
+                    {"name": job.test_case.name, "node": job.node, "attempts": job.attempts,
+                     "success": bool(job.result and job.result["success"]),
+                     "duration": job.result.get("duration", 0.0) if job.result else 0.0,
+                     "error": job.result.get("error") if job.result else "Not run"}
+                    for job in self.jobs
+                ]
+            }
+
+    def format_node_table(self) -> List[str]:
+        """One line per node: tests completed and passed, and time spent running them"""
+        report = self.report()
+        width = max([len("Node")] + [len(node_id) for node_id in report["nodes"]])
+        lines = [f"{'Node':<{width}}  Tests  Passed  Busy"]
+        for node_id, node in report["nodes"].items():
+            lost = "  (lost)" if node["lost"] else ""
+            lines.append(f"{node_id:<{width}}  {node['completed']:>5}  {node['passed']:>6}  {node['busy']:.1f}s{lost}")
+        return lines
+
+
+class CoordinatorGone(Exception):
+    """The coordinator could not be reached for RECONNECT_TIMEOUT seconds"""
+
+
+class RunnerNode:
+    """Pulls tests from a coordinator and runs them with a local TestRunner
+
+    Each worker thread leases one test at a time, so the node never holds
+    more tests than it is running and unstarted work stays available to
+    other nodes.
+    """
+
+    def __init__(self, coordinator_url: str, runner, name: Optional[str] = None, workers: int = 1,
+                 on_result: Optional[Callable[[TestCase, Dict[str, Any]], None]] = None):
+        """Initialize the node
+
+        Args:
+            coordinator_url: Base URL of the coordinator, e.g. http://127.0.0.1:8765
+            runner: TestRunner that runs the tests
+            name: Node name shown in the report (default: host name and PID)
+            workers: Number of tests to run at once
+            on_result: Optional callback(test_case, result) called after each test
+        """
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.runner = runner
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.workers = max(1, workers)
+        self.on_result = on_result
+        self.node_id = None
+        self.completed = 0
+        self._running: Dict[int, TestCase] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _post(self, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request, retrying while the coordinator is unreachable"""
+        body = json.dumps(data, default=str).encode("utf-8")
+        deadline = time.time() + RECONNECT_TIMEOUT
+        while True:
+            request = urllib.request.Request(self.coordinator_url + path, data=body,
+                                             headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    return json.loads(response.read())
+            except (urllib.error.URLError, OSError) as e:
+                if time.time() >= deadline or self._stop.is_set():
+                    raise CoordinatorGone(f"Coordinator at {self.coordinator_url} is unreachable: {e}")
+                time.sleep(1.0)
+
+    def _heartbeat(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            with self._lock:
+                jobs = list(self._running)
+            try:
+                if self._post("/heartbeat", {"node": self.node_id, "jobs": jobs}).get("done"):
+                    return
+            except CoordinatorGone:
+                return
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            reply = self._post("/lease", {"node": self.node_id})
+            if reply.get("done"):
+                return
+            if "wait" in reply:
+                self._stop.wait(reply["wait"])
+                continue
+            job_id, test_case = reply["job"], TestCase.from_dict(reply["test_case"])
+            with self._lock:
+                self._running[job_id] = test_case
+            try:
+                result = self.runner.run_test(test_case)
+            except Exception as e:
+                result = self.runner._not_run_result(f"Node error: {str(e)}")
+            self._post("/result", {"node": self.node_id, "job": job_id, "result": result})
+            with self._lock:
+                del self._running[job_id]
+                self.completed += 1
+            if self.on_result is not None:
+                self.on_result(test_case, result)
+
+    def run(self) -> int:
+        """Join the coordinator and run tests until the run is done
+
+        Returns:
+            Number of tests this node ran
+
+        Raises:
+            CoordinatorGone: If the coordinator cannot be reached
+        """
+        reply = self._post("/join", {"name": self.name})
+        self.node_id = reply["node"]
+        threading.Thread(target=self._heartbeat, args=(reply["heartbeat_interval"],), daemon=True).start()
+        errors = []
+
+        def work():
+            try:
+                self._work()
+            except CoordinatorGone as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop.set()
+        if errors and not self.completed:
+            raise errors[0]
+        return self.completed
@@ -0,0 +1,149 @@
+"""
+Driver Pool module for the UWAutoTest application
+Keeps pre-launched browser sessions on warm standby
+"""
+import atexit
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+
+# Seconds to wait before retrying after a browser failed to start
+CREATE_RETRY_DELAY = 30.0
+
+
+class WarmDriverPool:
+    """Keeps a number of freshly started WebDriver sessions ready to use
+
+    A background thread launches sessions matching the runner's current
+    configuration whenever the pool is below its size. Sessions are handed
+    out once (a used session is never returned to the pool), so every test
+    still starts from a clean browser. When nothing has been acquired for
+    `idle_timeout` seconds the standby sessions are released until the pool
+    is used again.
+    """
+
+    def __init__(self, create_driver: Callable[[], Any], get_config: Callable[[], Tuple],
+                 size: int = 1, idle_timeout: float = 300.0):
+        """Initialize the pool and start filling it in the background
+
+        Args:
+            create_driver: Creates a WebDriver using the current configuration
+            get_config: Returns a hashable description of the current configuration
+            size: Number of sessions to keep ready
+            idle_timeout: Seconds without use after which standby sessions are released
+        """
+        self._create_driver = create_driver
+        self._get_config = get_config
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.last_error = None
+
+        self._ready: List[Tuple[Tuple, Any]] = []
+        self._condition = threading.Condition()
+        self._last_used = time.time()
+        self._retry_at = 0.0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._maintain, daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    @property
+    def ready_count(self) -> int:
+        """Number of sessions currently on standby"""
+        with self._condition:
+            return len(self._ready)
+
+    def acquire(self) -> Optional[Any]:
+        """Take a ready session matching the current configuration
+
+        Returns:
+            A WebDriver the caller now owns, or None if none is ready
+        """
+        config = self._get_config()
+        driver = None
+        with self._condition:
+            self._last_used = time.time()
+            for index, (ready_config, ready_driver) in enumerate(self._ready):
+                if ready_config == config:
+                    driver = ready_driver
+                    del self._ready[index]
+                    break
+            stale = self._take_stale(config)
+            self._condition.notify_all()
+        self._quit_all(stale)
+        return driver
+
+    def touch(self) -> None:
+        """Mark the pool as in use, refilling it if it was released for idleness"""
+        with self._condition:
+            self._last_used = time.time()
+            self._condition.notify_all()
+
+    def refresh(self) -> None:
+        """Replace standby sessions after the configuration changed"""
+        with self._condition:
+            self._last_used = time.time()
+            self._retry_at = 0.0
+            stale = self._take_stale(self._get_config())
+            self._condition.notify_all()
+        self._quit_all(stale)
+
+    def shutdown(self) -> None:
+        """Stop refilling and quit all standby sessions"""
+        # Lets a shut down pool, and the runner and sessions it refers to, be freed
+        atexit.unregister(self.shutdown)
+        with self._condition:
+            self._closed = True
+            stale = [driver for _, driver in self._ready]
+            self._ready = []
+            self._condition.notify_all()
+        self._quit_all(stale)
+
+    def _take_stale(self, config: Tuple) -> List[Any]:
+        """Remove standby sessions that no longer match the configuration (lock held)"""
+        stale = [driver for ready_config, driver in self._ready if ready_config != config]
+        self._ready = [(ready_config, driver) for ready_config, driver in self._ready if ready_config == config]
+        return stale
+
+    @staticmethod
+    def _quit_all(drivers: List[Any]) -> None:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def _maintain(self) -> None:
+        """Background loop that keeps the pool filled and releases idle sessions"""
+        while True:
+            with self._condition:
+                self._condition.wait(timeout=1.0)
+                if self._closed:
+                    return
+                idle = time.time() - self._last_used > self.idle_timeout
+                stale = []
+                if idle:
+                    stale = [driver for _, driver in self._ready]
+                    self._ready = []
+                needed = not idle and len(self._ready) < self.size and time.time() >= self._retry_at
+                config = self._get_config()
+            self._quit_all(stale)
+
+            while needed:
+                try:
+                    driver = self._create_driver()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+                    self._retry_at = time.time() + CREATE_RETRY_DELAY
+                    break
+
+                with self._condition:
+                    keep = not self._closed and config == self._get_config()
+                    if keep:
+                        self._ready.append((config, driver))
+                    needed = keep and len(self._ready) < self.size
+                if not keep:
+                    self._quit_all([driver])
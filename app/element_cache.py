@@ -0,0 +1,96 @@
+"""
+Element Cache module for the UWAutoTest application
+Reuses elements found by earlier actions of a test instead of looking them up again
+"""
+from typing import Any, Callable, Dict, Tuple
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+# Conditions an element must meet before an action uses it, for a locator
+# (first lookup) and for an already found element (cache hit). A present
+# element needs no check: using it detects whether it is still attached.
+CONDITIONS = {
+    "present": (EC.presence_of_element_located, None),
+    "clickable": (EC.element_to_be_clickable, EC.element_to_be_clickable),
+    "visible": (EC.visibility_of_element_located, EC.visibility_of),
+}
+
+
+class ElementCache:
+    """Elements of the current page found by a test, keyed by locator
+
+    Consecutive actions on the same selector (typing into a field and then
+    submitting it, or several assertions on one container) reuse the
+    element instead of repeating the wait and the lookup. The cache holds
+    one test's elements for one document: actions that can load another
+    page clear it, and an element the page has since removed or replaced
+    raises StaleElementReferenceException on use and is looked up again.
+    """
+
+    def __init__(self, wait_time: float):
+        """Initialize an empty cache
+
+        Args:
+            wait_time: Seconds to wait for an element that is not cached
+        """
+        self.wait_time = wait_time
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._elements: Dict[Tuple[str, str], Any] = {}
+        self._wait = None
+        self._wait_driver = None
+
+    def wait(self, driver) -> WebDriverWait:
+        """A WebDriverWait on the driver, created once and reused by every lookup"""
+        if self._wait is None or self._wait_driver is not driver:
+            self._wait = WebDriverWait(driver, self.wait_time)
+            self._wait_driver = driver
+        return self._wait
+
+    def use(self, driver, locator: Tuple[str, str], operation: Callable[[Any], Any],
+            condition: str = "present") -> Any:
+        """Run an operation on the element matching a locator
+
+        Args:
+            driver: WebDriver instance
+            locator: (By strategy, selector) of the element
+            operation: Called with the element; may be called again with a
+                freshly found element if the cached one turned out stale
+            condition: 'present', 'clickable' or 'visible'
+
+        Returns:
+            The operation's return value
+        """
+        locate, recheck = CONDITIONS[condition]
+        element = self._elements.get(locator)
+        if element is not None:
+            try:
+                if recheck is not None:
+                    element = self.wait(driver).until(recheck(element))
+                result = operation(element)
+                self.hits += 1
+                return result
+            except StaleElementReferenceException:
+                self.stale += 1
+                del self._elements[locator]
+
+        self.misses += 1
+        element = self.wait(driver).until(locate(locator))
+        self._elements[locator] = element
+        return operation(element)
+
+    def add(self, locator: Tuple[str, str], element) -> None:
+        """Remember an element found outside of use(), e.g. by a Wait action"""
+        self._elements[locator] = element
+
+    def clear(self) -> None:
+        """Forget all elements, e.g. after an action that may have loaded a new page"""
+        self._elements.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and stale counts for the test result"""
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
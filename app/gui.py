@@ -3,23 +3,91 @@ GUI module for the UWAutoTest application
 """
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import importlib
 import json
 import os
+import queue
+import threading
+import time
 from app.test_manager import TestManager
-from app.test_runner import TestRunner
 from app.models import TestCase, TestAction, ActionType
+from app.actions import action_names, plugin_errors
+from app.parameterize import expand_test_case
+from app.compiler import validate_test_files
+from app.scheduler import DurationHistory, LongestFirstSchedule
+from app.performance import get_load_time, get_request_count
+
+# Number of action rows inserted into the editor at a time
+ACTION_RENDER_CHUNK = 500
 
 class TestingToolGUI:
     def __init__(self, root):
         self.root = root
         self.test_manager = TestManager()
-        self.test_runner = TestRunner()
+        
+        # The test runner pulls in Selenium, so it is created on first use
+        self._test_runner = None
         
         # Current test case being edited
         self.current_test_case = None
         
+        # Number of leading actions that have a row in the actions tree
+        self.rendered_action_count = 0
+        
+        # Test case files parsed in the background, delivered to the Tk thread
+        self.load_queue = queue.Queue()
+        self.load_generation = 0
+        self.pending_loads = 0
+        
+        # Test order of the last loaded suite, used when running it chained
+        self.suite_order = []
+        
+        # Watch mode reruns changed tests; its events are delivered to the Tk thread
+        self.test_watcher = None
+        self.watch_queue = queue.Queue()
+        
+        # Serves live metrics of the current run while enabled in Settings
+        self.metrics_server = None
+        
         # Setup the GUI components
         self.setup_gui()
+        
+        # Import Selenium in the background once the window is on screen
+        self.root.after(200, self.warm_up_test_runner)
+        
+        # Release standby browsers when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    @property
+    def test_runner(self):
+        """The TestRunner, imported and created when first needed"""
+        if self._test_runner is None:
+            from app.test_runner import TestRunner
+            self._test_runner = TestRunner(
+                browser=self.browser_var.get(),
+                headless=self.headless_var.get(),
+                wait_time=self.wait_var.get(),
+                engine=self.engine_var.get(),
+                capture_performance=self.perf_var.get()
+            )
+        return self._test_runner
+    
+    def warm_up_test_runner(self):
+        """Import the test runner module on a background thread
+        
+        Selenium and webdriver-manager take a noticeable time to import. Doing
+        it after the window appears keeps startup fast, and by the time the
+        first test is run the import is usually done.
+        """
+        threading.Thread(target=importlib.import_module, args=("app.test_runner",), daemon=True).start()
+    
+    def on_close(self):
+        """Stop watch mode, quit any standby browsers and close the window"""
+        self.stop_watching()
+        self.stop_metrics_server()
+        if self._test_runner is not None:
+            self._test_runner.disable_warm_standby()
+        self.root.destroy()
     
     def setup_gui(self):
         """Setup the main GUI components"""
@@ -29,22 +97,26 @@ class TestingToolGUI:
         # Create main tabs
         self.test_editor_frame = ttk.Frame(self.notebook)
         self.test_runner_frame = ttk.Frame(self.notebook)
+        self.trace_viewer_frame = ttk.Frame(self.notebook)
         self.settings_frame = ttk.Frame(self.notebook)
         
         # Add the tabs to the notebook
         self.notebook.add(self.test_editor_frame, text="Test Editor")
         self.notebook.add(self.test_runner_frame, text="Test Runner")
+        self.notebook.add(self.trace_viewer_frame, text="Traces")
         self.notebook.add(self.settings_frame, text="Settings")
         self.notebook.pack(expand=1, fill="both")
         
         # Setup each tab
         self.setup_test_editor()
         self.setup_test_runner()
+        self.setup_trace_viewer()
         self.setup_settings()
         
         # Create a status bar
         self.status_var = tk.StringVar()
-        self.status_var.set("Ready")
+        self.status_var.set("Ready" if not plugin_errors else
+                            f"Ready ({len(plugin_errors)} action plugin(s) failed to load: {plugin_errors[0]})")
         self.status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
@@ -89,6 +161,11 @@ class TestingToolGUI:
         self.base_url_entry = ttk.Entry(details_frame, width=40)
         self.base_url_entry.grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
         
+        ttk.Label(details_frame, text="Data Source:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        self.data_source_entry = ttk.Entry(details_frame, width=40)
+        self.data_source_entry.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(details_frame, text="(optional CSV/JSONL for ${var} placeholders)").grid(row=2, column=2, sticky=tk.W)
+        
         # Test actions
         actions_frame = ttk.LabelFrame(right_panel, text="Test Actions")
         actions_frame.pack(fill=tk.BOTH, expand=1, padx=5, pady=5)
@@ -103,7 +180,8 @@ class TestingToolGUI:
         self.actions_tree.column("Value", width=250)
         
         actions_scrollbar = ttk.Scrollbar(actions_frame, orient=tk.VERTICAL, command=self.actions_tree.yview)
-        self.actions_tree.configure(yscrollcommand=actions_scrollbar.set)
+        self.actions_scrollbar = actions_scrollbar
+        self.actions_tree.configure(yscrollcommand=self.on_actions_scroll)
         
         self.actions_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
         actions_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -114,7 +192,8 @@ class TestingToolGUI:
         
         ttk.Label(action_editor_frame, text="Action Type:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
         self.action_type_combo = ttk.Combobox(action_editor_frame, width=20)
-        self.action_type_combo['values'] = [action_type.value for action_type in ActionType]
+        # Built-in actions, then the custom ones registered by plugins
+        self.action_type_combo['values'] = action_names()
         self.action_type_combo.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
         
         ttk.Label(action_editor_frame, text="Target (CSS Selector):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
@@ -163,9 +242,21 @@ class TestingToolGUI:
         
         ttk.Button(btn_frame, text="Load All Tests", command=self.load_all_test_cases).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Run Selected", command=self.run_selected_tests).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Validate", command=self.validate_selected_tests).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Run Matrix...", command=self.run_matrix_dialog).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Save Suite", command=self.save_test_suite).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Load Suite", command=self.load_test_suite).pack(side=tk.LEFT, padx=2)
         
+        # Chained suites run in order on one browser session without resetting it
+        self.chained_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(left_panel, text="Chained: run in order on one browser, skip after a failure",
+                        variable=self.chained_var).pack(anchor=tk.W, padx=5, pady=2)
+        
+        # Watch mode toggle
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(left_panel, text="Watch: rerun selected tests when files change",
+                        variable=self.watch_var, command=self.toggle_watch).pack(anchor=tk.W, padx=5, pady=2)
+        
         # Right panel - Results
         right_panel = ttk.LabelFrame(frame, text="Test Results")
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=1, padx=5, pady=5)
@@ -181,6 +272,47 @@ class TestingToolGUI:
         # Button to clear results
         ttk.Button(right_panel, text="Clear Results", command=self.clear_results).pack(pady=5)
     
+    def setup_trace_viewer(self):
+        """Setup the trace viewer tab"""
+        frame = self.trace_viewer_frame
+        
+        # Currently opened trace
+        self.trace_records = []
+        self.trace_start_time = None
+        
+        top_frame = ttk.Frame(frame)
+        top_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(top_frame, text="Open Trace", command=self.open_trace).pack(side=tk.LEFT, padx=2)
+        ttk.Button(top_frame, text="Open DOM in Browser", command=self.open_trace_dom).pack(side=tk.LEFT, padx=2)
+        self.trace_summary_var = tk.StringVar(value="No trace loaded")
+        ttk.Label(top_frame, textvariable=self.trace_summary_var).pack(side=tk.LEFT, padx=10)
+        
+        # Left panel - Actions of the trace; use the arrow keys to step through them
+        left_panel = ttk.LabelFrame(frame, text="Actions")
+        left_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=0, padx=5, pady=5)
+        
+        columns = ("index", "type", "status", "duration")
+        self.trace_tree = ttk.Treeview(left_panel, columns=columns, show="headings", height=20)
+        self.trace_tree.heading("index", text="#")
+        self.trace_tree.heading("type", text="Action")
+        self.trace_tree.heading("status", text="Status")
+        self.trace_tree.heading("duration", text="ms")
+        self.trace_tree.column("index", width=40)
+        self.trace_tree.column("type", width=120)
+        self.trace_tree.column("status", width=70)
+        self.trace_tree.column("duration", width=60)
+        trace_scrollbar = ttk.Scrollbar(left_panel, orient=tk.VERTICAL, command=self.trace_tree.yview)
+        self.trace_tree.configure(yscrollcommand=trace_scrollbar.set)
+        trace_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.trace_tree.pack(fill=tk.BOTH, expand=1)
+        self.trace_tree.bind('<<TreeviewSelect>>', self.on_trace_action_select)
+        
+        # Right panel - Details of the selected action
+        right_panel = ttk.LabelFrame(frame, text="Details")
+        right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=1, padx=5, pady=5)
+        self.trace_details_text = tk.Text(right_panel, wrap=tk.WORD)
+        self.trace_details_text.pack(fill=tk.BOTH, expand=1)
+    
     def setup_settings(self):
         """Setup the settings tab"""
         frame = self.settings_frame
@@ -204,6 +336,66 @@ class TestingToolGUI:
         self.wait_var = tk.IntVar(value=10)
         ttk.Spinbox(settings_frame, from_=0, to=60, textvariable=self.wait_var, width=5).grid(row=2, column=1, sticky=tk.W)
         
+        # Parallel workers
+        ttk.Label(settings_frame, text="Parallel workers:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        self.workers_var = tk.IntVar(value=1)
+        ttk.Spinbox(settings_frame, from_=1, to=16, textvariable=self.workers_var, width=5).grid(row=3, column=1, sticky=tk.W)
+        
+        # Execution engine
+        ttk.Label(settings_frame, text="Engine:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        self.engine_var = tk.StringVar(value="selenium")
+        ttk.Radiobutton(settings_frame, text="Browser only", variable=self.engine_var, value="selenium").grid(row=4, column=1, sticky=tk.W)
+        ttk.Radiobutton(settings_frame, text="HTTP when possible", variable=self.engine_var, value="auto").grid(row=4, column=2, columnspan=2, sticky=tk.W)
+        
+        # Warm standby browsers
+        self.warm_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Keep a browser ready between runs", variable=self.warm_var).grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(settings_frame, text="Release after idle (minutes):").grid(row=5, column=2, sticky=tk.W, padx=5)
+        self.warm_idle_var = tk.IntVar(value=10)
+        ttk.Spinbox(settings_frame, from_=1, to=120, textvariable=self.warm_idle_var, width=5).grid(row=5, column=3, sticky=tk.W)
+        
+        # Process isolation with hard deadlines
+        self.isolate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Run tests in separate processes and kill hung tests", variable=self.isolate_var).grid(row=6, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(settings_frame, text="Test deadline (seconds):").grid(row=7, column=0, sticky=tk.W, padx=5, pady=5)
+        self.test_timeout_var = tk.IntVar(value=600)
+        ttk.Spinbox(settings_frame, from_=10, to=7200, textvariable=self.test_timeout_var, width=6).grid(row=7, column=1, sticky=tk.W)
+        ttk.Label(settings_frame, text="Action deadline (seconds):").grid(row=7, column=2, sticky=tk.W, padx=5)
+        self.action_timeout_var = tk.IntVar(value=120)
+        ttk.Spinbox(settings_frame, from_=5, to=3600, textvariable=self.action_timeout_var, width=6).grid(row=7, column=3, sticky=tk.W)
+        
+        # Several parallel tests in isolated contexts of one browser process
+        ttk.Label(settings_frame, text="Tests per browser process:").grid(row=8, column=0, sticky=tk.W, padx=5, pady=5)
+        self.contexts_var = tk.IntVar(value=1)
+        ttk.Spinbox(settings_frame, from_=1, to=16, textvariable=self.contexts_var, width=5).grid(row=8, column=1, sticky=tk.W)
+        ttk.Label(settings_frame, text="(Chrome/Edge; each test gets its own isolated context)").grid(row=8, column=2, columnspan=2, sticky=tk.W)
+        
+        # Live metrics for Prometheus or a quick look in the browser
+        self.metrics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Serve live metrics on port", variable=self.metrics_var).grid(row=9, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        self.metrics_port_var = tk.IntVar(value=9464)
+        ttk.Spinbox(settings_frame, from_=1024, to=65535, textvariable=self.metrics_port_var, width=6).grid(row=9, column=2, sticky=tk.W)
+        ttk.Label(settings_frame, text="(http://127.0.0.1:PORT/metrics)").grid(row=9, column=3, sticky=tk.W)
+        
+        # Plan optimizer, opt-in since it changes which steps run
+        self.optimize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Optimize test plans (skip repeated navigations and waits, overwritten inputs, redundant checks)", variable=self.optimize_var).grid(row=11, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        
+        # Profiling of the run itself, written to the profiles directory
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Profile test runs (Python, WebDriver and waiting time; slows runs down)", variable=self.profile_var).grid(row=10, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        
+        # Browser profile built once per run and copied for every session
+        self.template_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Start browsers from a template profile", variable=self.template_var).grid(row=12, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(settings_frame, text="Setup test (optional):").grid(row=12, column=2, sticky=tk.W, padx=5)
+        self.template_setup_var = tk.StringVar(value="")
+        ttk.Entry(settings_frame, textvariable=self.template_setup_var, width=20).grid(row=12, column=3, sticky=tk.W)
+        
+        # Page-load metrics cost extra round trips, so by default only tests that assert on them collect them
+        self.perf_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Record page-load metrics for every navigation (slows down clicks)", variable=self.perf_var).grid(row=13, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        
         # Save directory
         save_frame = ttk.LabelFrame(frame, text="Save Locations")
         save_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -220,17 +412,37 @@ class TestingToolGUI:
         suite_dir_entry.grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
         ttk.Button(save_frame, text="Browse", command=lambda: self.browse_directory(self.suite_dir_var)).grid(row=1, column=2)
         
+        ttk.Label(save_frame, text="Traces Directory:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        self.trace_dir_var = tk.StringVar(value=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "traces"))
+        trace_dir_entry = ttk.Entry(save_frame, textvariable=self.trace_dir_var, width=40)
+        trace_dir_entry.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Button(save_frame, text="Browse", command=lambda: self.browse_directory(self.trace_dir_var)).grid(row=2, column=2)
+        self.trace_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(save_frame, text="Record a trace of every test (page state after each action)", variable=self.trace_var).grid(row=3, column=0, columnspan=3, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(save_frame, text="Screenshot Baselines:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        self.baseline_dir_var = tk.StringVar(value=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "baselines"))
+        baseline_dir_entry = ttk.Entry(save_frame, textvariable=self.baseline_dir_var, width=40)
+        baseline_dir_entry.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Button(save_frame, text="Browse", command=lambda: self.browse_directory(self.baseline_dir_var)).grid(row=4, column=2)
+        self.record_baselines_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(save_frame, text="Record missing baselines instead of failing", variable=self.record_baselines_var).grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Button(save_frame, text="Accept Pending Baselines", command=self.accept_pending_baselines).grid(row=5, column=2, padx=5)
+        
         # Apply settings button
         ttk.Button(frame, text="Apply Settings", command=self.apply_settings).pack(pady=10)
     
     # Test Editor methods
     def new_test_case(self):
         """Create a new test case"""
+        # Discard any test case still being loaded in the background
+        self.load_generation += 1
         self.current_test_case = TestCase(name="New Test Case", base_url="")
         self.test_name_entry.delete(0, tk.END)
         self.test_name_entry.insert(0, self.current_test_case.name)
         self.base_url_entry.delete(0, tk.END)
-        self.actions_tree.delete(*self.actions_tree.get_children())
+        self.data_source_entry.delete(0, tk.END)
+        self.render_actions()
         self.status_var.set("New test case created")
     
     def load_test_case(self):
@@ -245,21 +457,94 @@ class TestingToolGUI:
         )
         
         if file_path:
+            self.load_test_case_in_background(file_path)
+    
+    def load_test_case_in_background(self, file_path):
+        """Parse a test case file on a worker thread and show it when ready
+        
+        Only the most recent request is shown, so quickly clicking through
+        the test case list never leaves the editor on an older selection.
+        """
+        self.load_generation += 1
+        generation = self.load_generation
+        self.status_var.set(f"Loading {os.path.basename(file_path)}...")
+        
+        def worker():
             try:
-                self.current_test_case = self.test_manager.load_test_case(file_path)
-                self.test_name_entry.delete(0, tk.END)
-                self.test_name_entry.insert(0, self.current_test_case.name)
-                self.base_url_entry.delete(0, tk.END)
-                self.base_url_entry.insert(0, self.current_test_case.base_url)
-                
-                # Update actions tree
-                self.actions_tree.delete(*self.actions_tree.get_children())
-                for action in self.current_test_case.actions:
-                    self.actions_tree.insert("", "end", values=(action.action_type.value, action.target, action.value))
-                
-                self.status_var.set(f"Loaded test case: {self.current_test_case.name}")
+                self.load_queue.put((generation, self.test_manager.load_test_case(file_path), None))
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load test case: {str(e)}")
+                self.load_queue.put((generation, None, e))
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.pending_loads += 1
+        if self.pending_loads == 1:
+            self.root.after(20, self.poll_loaded_test_case)
+    
+    def poll_loaded_test_case(self):
+        """Show test cases parsed by load_test_case_in_background"""
+        while True:
+            try:
+                generation, test_case, error = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.pending_loads -= 1
+            if generation != self.load_generation:
+                # A newer selection superseded this load
+                continue
+            if error is not None:
+                messagebox.showerror("Error", f"Failed to load test case: {str(error)}")
+            else:
+                self.show_test_case(test_case)
+        
+        if self.pending_loads > 0:
+            self.root.after(20, self.poll_loaded_test_case)
+    
+    def show_test_case(self, test_case):
+        """Display a test case in the editor"""
+        self.current_test_case = test_case
+        self.test_name_entry.delete(0, tk.END)
+        self.test_name_entry.insert(0, test_case.name)
+        self.base_url_entry.delete(0, tk.END)
+        self.base_url_entry.insert(0, test_case.base_url)
+        self.data_source_entry.delete(0, tk.END)
+        self.data_source_entry.insert(0, test_case.data_source)
+        
+        # Update actions tree
+        self.render_actions()
+        
+        self.status_var.set(f"Loaded test case: {test_case.name} ({len(test_case.actions)} actions)")
+    
+    def action_row_values(self, action):
+        """Values shown for an action in the actions tree"""
+        return (action.action_type.value, action.target, action.value)
+    
+    def render_actions(self):
+        """Reset the actions tree and render the first chunk of actions
+        
+        Large test cases are rendered lazily: further rows are inserted as
+        the user scrolls towards the end of the rendered ones.
+        """
+        self.actions_tree.delete(*self.actions_tree.get_children())
+        self.rendered_action_count = 0
+        self.render_more_actions()
+    
+    def render_more_actions(self, up_to=None):
+        """Insert the next chunk of action rows, or all rows up to an index"""
+        if not self.current_test_case:
+            return
+        actions = self.current_test_case.actions
+        end = self.rendered_action_count + ACTION_RENDER_CHUNK if up_to is None else up_to + 1
+        end = min(end, len(actions))
+        for action in actions[self.rendered_action_count:end]:
+            self.actions_tree.insert("", "end", values=self.action_row_values(action))
+        self.rendered_action_count = max(self.rendered_action_count, end)
+    
+    def on_actions_scroll(self, first, last):
+        """Update the scrollbar and render more rows near the end of the tree"""
+        self.actions_scrollbar.set(first, last)
+        if (self.current_test_case and float(last) > 0.9
+                and self.rendered_action_count < len(self.current_test_case.actions)):
+            self.root.after_idle(self.render_more_actions)
     
     def save_test_case(self):
         """Save the current test case to file"""
@@ -273,6 +558,7 @@ class TestingToolGUI:
         # Update test case with current values
         self.current_test_case.name = self.test_name_entry.get()
         self.current_test_case.base_url = self.base_url_entry.get()
+        self.current_test_case.data_source = self.data_source_entry.get()
         
         # Check if test case name is provided
         if not self.current_test_case.name:
@@ -335,8 +621,10 @@ class TestingToolGUI:
             action = TestAction(action_type=action_type, target=target, value=value)
             self.current_test_case.actions.append(action)
             
-            # Add to tree view
-            self.actions_tree.insert("", "end", values=(action_type.value, target, value))
+            # Add to tree view, unless it lies beyond the rows rendered so far
+            if self.rendered_action_count == len(self.current_test_case.actions) - 1:
+                self.actions_tree.insert("", "end", values=self.action_row_values(action))
+                self.rendered_action_count += 1
             
             # Clear input fields
             self.action_type_combo.set("")
@@ -396,6 +684,7 @@ class TestingToolGUI:
         
         # Remove from tree view
         self.actions_tree.delete(selection[0])
+        self.rendered_action_count -= 1
         
         self.status_var.set(f"Deleted action at position {index+1}")
     
@@ -415,15 +704,12 @@ class TestingToolGUI:
             self.current_test_case.actions[index], self.current_test_case.actions[index-1] = \
                 self.current_test_case.actions[index-1], self.current_test_case.actions[index]
             
-            # Refresh tree view
-            self.actions_tree.delete(*self.actions_tree.get_children())
-            for action in self.current_test_case.actions:
-                self.actions_tree.insert("", "end", values=(action.action_type.value, action.target, action.value))
-            
-            # Select the moved item
-            item = self.actions_tree.get_children()[index-1]
+            # Move the row in the tree view
+            item = selection[0]
+            self.actions_tree.move(item, "", index-1)
             self.actions_tree.selection_set(item)
             self.actions_tree.focus(item)
+            self.actions_tree.see(item)
             
             self.status_var.set(f"Moved action up")
     
@@ -443,15 +729,13 @@ class TestingToolGUI:
             self.current_test_case.actions[index], self.current_test_case.actions[index+1] = \
                 self.current_test_case.actions[index+1], self.current_test_case.actions[index]
             
-            # Refresh tree view
-            self.actions_tree.delete(*self.actions_tree.get_children())
-            for action in self.current_test_case.actions:
-                self.actions_tree.insert("", "end", values=(action.action_type.value, action.target, action.value))
-            
-            # Select the moved item
-            item = self.actions_tree.get_children()[index+1]
+            # Make sure the row it swaps with is rendered, then move the row
+            self.render_more_actions(up_to=index+1)
+            item = selection[0]
+            self.actions_tree.move(item, "", index+1)
             self.actions_tree.selection_set(item)
             self.actions_tree.focus(item)
+            self.actions_tree.see(item)
             
             self.status_var.set(f"Moved action down")
     
@@ -466,21 +750,7 @@ class TestingToolGUI:
         test_path = os.path.join(test_dir, f"{test_name}.json")
         
         if os.path.exists(test_path):
-            try:
-                self.current_test_case = self.test_manager.load_test_case(test_path)
-                self.test_name_entry.delete(0, tk.END)
-                self.test_name_entry.insert(0, self.current_test_case.name)
-                self.base_url_entry.delete(0, tk.END)
-                self.base_url_entry.insert(0, self.current_test_case.base_url)
-                
-                # Update actions tree
-                self.actions_tree.delete(*self.actions_tree.get_children())
-                for action in self.current_test_case.actions:
-                    self.actions_tree.insert("", "end", values=(action.action_type.value, action.target, action.value))
-                
-                self.status_var.set(f"Loaded test case: {self.current_test_case.name}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load test case: {str(e)}")
+            self.load_test_case_in_background(test_path)
     
     def on_action_select(self, event):
         """Handle action selection event"""
@@ -521,6 +791,25 @@ class TestingToolGUI:
         self.status_var.set("Loaded all test cases")
     
     def run_selected_tests(self):
+        """Run the selected tests, under the profiler if enabled in Settings"""
+        if not self.profile_var.get():
+            self._run_selected_tests()
+            return
+        from app.profiling import RunProfiler, DEFAULT_PROFILE_DIR
+        
+        profiler = RunProfiler(os.path.join(DEFAULT_PROFILE_DIR, time.strftime("%Y%m%d-%H%M%S")))
+        profiler.start()
+        self.test_runner.profiler = profiler
+        try:
+            self._run_selected_tests()
+        finally:
+            self.test_runner.profiler = None
+            profiler.stop()
+        self.results_text.insert(tk.END, "\n=== Profile ===\n")
+        self.results_text.insert(tk.END, "\n".join(profiler.summary_lines()) + "\n")
+        self.results_text.see("1.0")
+    
+    def _run_selected_tests(self):
         """Run the selected tests"""
         selection = self.test_suite_listbox.curselection()
         if not selection:
@@ -529,59 +818,549 @@ class TestingToolGUI:
         
         # Get selected test names
         test_names = [self.test_suite_listbox.get(i) for i in selection]
+        chained = self.chained_var.get()
+        if chained:
+            # Chained tests build on each other, so keep the loaded suite's order
+            test_names.sort(key=lambda name: self.suite_order.index(name) if name in self.suite_order
+                            else len(self.suite_order))
         
         # Clear results
         self.clear_results()
         
+        # Check every selected test before starting a browser
+        if not self.report_invalid_tests(test_names):
+            self.results_text.insert(tk.END, "No tests were run. Fix the problems above and try again.\n")
+            self.status_var.set("Test run aborted: invalid test cases")
+            return
+        
         # Get the browser and headless settings
         browser = self.browser_var.get()
         headless = self.headless_var.get()
         wait_time = self.wait_var.get()
         
+        max_workers = max(1, self.workers_var.get())
+        
         # Run tests
         test_dir = self.test_dir_var.get()
         
-        self.results_text.insert(tk.END, f"Running {len(test_names)} test(s) with {browser} browser...\n\n")
+        mode = " chained on one browser session" if chained else ""
+        self.results_text.insert(tk.END, f"Running {len(test_names)} test(s) with {browser} browser{mode}...\n\n")
         self.root.update()
         
+        self.test_runner.browser = browser
+        self.test_runner.headless = headless
+        self.test_runner.wait_time = wait_time
+        self.test_runner.engine = self.engine_var.get()
+        self.test_runner.baseline_dir = self.baseline_dir_var.get()
+        update_baselines = "missing" if self.record_baselines_var.get() else None
+        self.test_runner.update_baselines = update_baselines
+        self.test_runner.optimize = self.optimize_var.get()
+        self.test_runner.capture_performance = self.perf_var.get()
+        metrics = self.test_runner.metrics = self.start_run_metrics()
+        trace_dir = self.trace_dir_var.get() if self.trace_var.get() else None
+        if trace_dir:
+            self.test_runner.enable_tracing(trace_dir)
+        else:
+            self.test_runner.disable_tracing()
+        
+        template = None
+        if self.template_var.get():
+            template = self.build_profile_template(test_dir)
+            if template is None:
+                self.status_var.set("Test run aborted: template profile could not be built")
+                return
+            self.test_runner.use_profile_template(template)
+        
         success_count = 0
+        skipped_count = 0
+        run_count = 0
         
-        for test_name in test_names:
-            try:
-                test_path = os.path.join(test_dir, f"{test_name}.json")
-                test_case = self.test_manager.load_test_case(test_path)
-                
-                self.results_text.insert(tk.END, f"=== Running test: {test_name} ===\n")
+        def iter_test_cases():
+            """Load selected tests one by one, expanding data-driven ones per row"""
+            for test_name in test_names:
+                try:
+                    test_path = os.path.join(test_dir, f"{test_name}.json")
+                    test_case = self.test_manager.load_test_case(test_path)
+                    yield from expand_test_case(test_case, test_dir)
+                except Exception as e:
+                    self.results_text.insert(tk.END, f"ERROR: {test_name}: {str(e)}\n\n")
+                    self.root.update()
+        
+        history = DurationHistory.for_test_dir(test_dir)
+        test_cases = iter_test_cases()
+        schedule = None
+        if max_workers > 1 and not chained:
+            # Start the tests predicted to take longest first
+            test_cases = schedule = LongestFirstSchedule(test_cases, history, max_workers)
+        
+        isolated_runner = None
+        context_runner = None
+        start_time = time.time()
+        if chained:
+            results = self.test_runner.run_chain(test_cases)
+        elif self.contexts_var.get() > 1 and not self.isolate_var.get() and browser in ("Chrome", "Edge"):
+            # Fit several tests into one browser process, each in its own context
+            from app.contexts import ContextRunner
+            context_runner = ContextRunner(self.test_runner, contexts_per_browser=self.contexts_var.get())
+            results = context_runner.run_tests(test_cases, max_workers=max_workers)
+        elif self.isolate_var.get():
+            # A hung or crashing test only takes down its own worker process
+            from app.isolation import IsolatedRunner
+            isolated_runner = IsolatedRunner(
+                browser=browser, headless=headless, wait_time=wait_time, engine=self.engine_var.get(),
+                capture_performance=self.perf_var.get(), test_timeout=self.test_timeout_var.get(), action_timeout=self.action_timeout_var.get(),
+                trace_dir=trace_dir, baseline_dir=self.baseline_dir_var.get(), update_baselines=update_baselines,
+                optimize=self.optimize_var.get(), profile_template=template.root if template else None
+            )
+            isolated_runner.metrics = metrics
+            results = isolated_runner.run_tests(test_cases, max_workers=max_workers)
+        else:
+            results = self.test_runner.run_tests(test_cases, max_workers=max_workers)
+        
+        try:
+            for test_case, result in results:
+                history.record(test_case, result)
+                run_count += 1
+                self.results_text.insert(tk.END, f"=== Test: {test_case.name} ===\n")
                 self.results_text.insert(tk.END, f"Base URL: {test_case.base_url}\n")
                 self.results_text.insert(tk.END, f"Actions: {len(test_case.actions)}\n\n")
-                self.root.update()
-                
-                # Run the test
-                result = self.test_runner.run_test(
-                    test_case, 
-                    browser=browser, 
-                    headless=headless,
-                    wait_time=wait_time
-                )
                 
+                if result.get("engine") == "http":
+                    self.results_text.insert(tk.END, "Engine: HTTP (no browser)\n")
                 if result["success"]:
                     self.results_text.insert(tk.END, "TEST PASSED\n")
                     self.results_text.insert(tk.END, f"Duration: {result['duration']:.2f} seconds\n\n")
                     success_count += 1
+                elif result.get("skipped"):
+                    self.results_text.insert(tk.END, "TEST SKIPPED\n")
+                    self.results_text.insert(tk.END, f"Reason: {result['error']}\n\n")
+                    skipped_count += 1
                 else:
-                    self.results_text.insert(tk.END, "TEST FAILED\n")
+                    self.results_text.insert(tk.END, "TEST TIMED OUT\n" if result.get("timed_out") else "TEST FAILED\n")
                     self.results_text.insert(tk.END, f"Error: {result['error']}\n\n")
-                
-            except Exception as e:
-                self.results_text.insert(tk.END, f"ERROR: {str(e)}\n\n")
+                if result.get("trace"):
+                    self.results_text.insert(tk.END, f"Trace: {result['trace']}\n\n")
+                self.show_performance(result)
+                self.status_var.set(f"Running tests... Passed: {success_count}/{run_count}")
+                self.root.update()
+        except Exception as e:
+            self.results_text.insert(tk.END, f"ERROR: {str(e)}\n\n")
+        finally:
+            if isolated_runner is not None:
+                isolated_runner.shutdown()
+            if context_runner is not None:
+                context_runner.shutdown()
+            if template is not None:
+                self.test_runner.use_profile_template(None)
+                template.cleanup()
+            if self.test_runner.trace_writer is not None:
+                # Make the traces complete before they are opened in the viewer
+                self.test_runner.trace_writer.flush()
+            history.save()
         
         self.results_text.insert(tk.END, f"=== Test Run Complete ===\n")
-        self.results_text.insert(tk.END, f"Passed: {success_count}/{len(test_names)}\n")
-        self.status_var.set(f"Test run complete. Passed: {success_count}/{len(test_names)}")
+        self.results_text.insert(tk.END, f"Passed: {success_count}/{run_count}\n")
+        if skipped_count:
+            self.results_text.insert(tk.END, f"Skipped: {skipped_count}\n")
+        if schedule is not None:
+            self.results_text.insert(tk.END, f"Makespan: {time.time() - start_time:.1f}s "
+                                             f"(predicted {schedule.predicted_makespan:.1f}s, longest first)\n")
+        self.show_run_metrics(metrics)
+        self.status_var.set(f"Test run complete. Passed: {success_count}/{run_count}")
         
         # Scroll to the top
         self.results_text.see("1.0")
     
+    def run_matrix_dialog(self):
+        """Ask for browsers, modes and viewports, then run the selected tests on each combination"""
+        selection = self.test_suite_listbox.curselection()
+        if not selection:
+            messagebox.showwarning("Warning", "No tests selected")
+            return
+        test_names = [self.test_suite_listbox.get(i) for i in selection]
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Run Matrix")
+        dialog.transient(self.root)
+        
+        ttk.Label(dialog, text="Browsers:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        browser_vars = {}
+        for column, browser in enumerate(("Chrome", "Firefox", "Edge"), start=1):
+            browser_vars[browser] = tk.BooleanVar(value=browser == self.browser_var.get())
+            ttk.Checkbutton(dialog, text=browser, variable=browser_vars[browser]).grid(row=0, column=column, sticky=tk.W)
+        
+        ttk.Label(dialog, text="Modes:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        modes_var = tk.StringVar(value="headless" if self.headless_var.get() else "headed")
+        for column, mode in enumerate(("headless", "headed", "both"), start=1):
+            ttk.Radiobutton(dialog, text=mode.capitalize(), variable=modes_var, value=mode).grid(row=1, column=column, sticky=tk.W)
+        
+        ttk.Label(dialog, text="Viewports:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        viewports_var = tk.StringVar(value="max")
+        ttk.Entry(dialog, textvariable=viewports_var, width=30).grid(row=2, column=1, columnspan=3, sticky=tk.W)
+        ttk.Label(dialog, text="Comma-separated, e.g. max,1280x800,375x667").grid(row=3, column=1, columnspan=3, sticky=tk.W)
+        
+        def start():
+            from app.matrix import build_matrix, parse_viewport
+            
+            browsers = [browser for browser, var in browser_vars.items() if var.get()]
+            if not browsers:
+                messagebox.showwarning("Warning", "Select at least one browser", parent=dialog)
+                return
+            modes = {"headless": [True], "headed": [False], "both": [True, False]}[modes_var.get()]
+            try:
+                viewports = [parse_viewport(viewport) for viewport in viewports_var.get().split(",")]
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                return
+            dialog.destroy()
+            self.run_matrix(test_names, build_matrix(browsers, modes, viewports))
+        
+        btn_row = ttk.Frame(dialog)
+        btn_row.grid(row=4, column=0, columnspan=4, pady=10)
+        ttk.Button(btn_row, text="Run", command=start).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_row, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+    
+    def run_matrix(self, test_names, cells):
+        """Run tests on every cell of a browser matrix and show the combined table
+        
+        Args:
+            test_names: Names of the tests to run
+            cells: MatrixCells to run them on
+        """
+        from app.matrix import MatrixRunner, MatrixReport
+        
+        self.clear_results()
+        if not self.report_invalid_tests(test_names):
+            self.results_text.insert(tk.END, "No tests were run. Fix the problems above and try again.\n")
+            self.status_var.set("Matrix run aborted: invalid test cases")
+            return
+        
+        test_dir = self.test_dir_var.get()
+        # Every cell gets a worker unless more were configured, so all browsers run side by side
+        max_workers = max(len(cells), self.workers_var.get())
+        self.results_text.insert(tk.END, f"Running {len(test_names)} test(s) on {len(cells)} configuration(s) "
+                                         f"with {max_workers} worker(s)...\n\n")
+        self.root.update()
+        
+        def iter_test_cases():
+            for test_name in test_names:
+                try:
+                    test_case = self.test_manager.load_test_case(os.path.join(test_dir, f"{test_name}.json"))
+                    yield from expand_test_case(test_case, test_dir)
+                except Exception as e:
+                    self.results_text.insert(tk.END, f"ERROR: {test_name}: {str(e)}\n\n")
+                    self.root.update()
+        
+        trace_dir = self.trace_dir_var.get() if self.trace_var.get() else None
+        matrix = MatrixRunner(cells, wait_time=self.wait_var.get(), engine=self.engine_var.get(), trace_dir=trace_dir,
+                              baseline_dir=self.baseline_dir_var.get(), capture_performance=self.perf_var.get())
+        metrics = self.start_run_metrics()
+        if metrics is not None:
+            matrix.enable_metrics(metrics)
+        report = MatrixReport(cells)
+        start_time = time.time()
+        try:
+            for cell, test_case, result in matrix.run_tests(iter_test_cases(), max_workers=max_workers):
+                report.record(cell, test_case, result)
+                status = "PASSED" if result["success"] else f"FAILED: {result['error']}"
+                self.results_text.insert(tk.END, f"[{cell.label}] {test_case.name}: {status} "
+                                                 f"({result['duration']:.2f}s)\n")
+                self.status_var.set(f"Running matrix... {len(report.results)} result(s)")
+                self.root.update()
+        except Exception as e:
+            self.results_text.insert(tk.END, f"ERROR: {str(e)}\n\n")
+        finally:
+            matrix.shutdown()
+        
+        self.results_text.insert(tk.END, f"\n=== Matrix Complete ({time.time() - start_time:.1f}s) ===\n")
+        self.results_text.insert(tk.END, "\n".join(report.format_table()) + "\n")
+        self.show_run_metrics(metrics)
+        self.status_var.set("Matrix run complete: " + ("all passed" if report.all_passed else "some tests failed"))
+    
+    def start_run_metrics(self):
+        """Create the metrics of a new run and serve them, if enabled in Settings
+        
+        The server keeps running between runs and always serves the latest run.
+        
+        Returns:
+            RunMetrics, or None when live metrics are off
+        """
+        if not self.metrics_var.get():
+            self.stop_metrics_server()
+            return None
+        from app.metrics import RunMetrics, MetricsServer
+        
+        metrics = RunMetrics()
+        port = self.metrics_port_var.get()
+        if self.metrics_server is not None and self.metrics_server.port != port:
+            self.stop_metrics_server()
+        if self.metrics_server is None:
+            server = MetricsServer(metrics, port=port)
+            try:
+                server.start()
+            except OSError as e:
+                self.results_text.insert(tk.END, f"Could not serve metrics on port {port}: {str(e)}\n\n")
+                return metrics
+            self.metrics_server = server
+            self.results_text.insert(tk.END, f"Serving metrics on {server.url}\n\n")
+        self.metrics_server.metrics = metrics
+        return metrics
+    
+    def stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+    
+    def show_run_metrics(self, metrics):
+        """Add the metrics summary of a finished run to the results"""
+        if metrics is None:
+            return
+        self.results_text.insert(tk.END, "\n=== Metrics ===\n")
+        self.results_text.insert(tk.END, "\n".join(metrics.summary_lines()) + "\n")
+    
+    def build_profile_template(self, test_dir):
+        """Build the template profile for a run, running the setup test on it if one is set
+        
+        Args:
+            test_dir: Directory of the setup test
+            
+        Returns:
+            ProfileTemplate, or None if it could not be built
+        """
+        from app.browser_profile import build_profile_template
+        
+        setup_name = self.template_setup_var.get().strip()
+        setup_test = None
+        if setup_name:
+            try:
+                setup_test = self.test_manager.load_test_case(os.path.join(test_dir, f"{setup_name}.json"))
+            except Exception as e:
+                self.results_text.insert(tk.END, f"ERROR: Setup test {setup_name}: {str(e)}\n\n")
+                return None
+        self.results_text.insert(tk.END, "Building a template profile" +
+                                 (f" with '{setup_name}'" if setup_test else "") + "...\n")
+        self.root.update()
+        try:
+            template = build_profile_template(self.test_runner, setup_test)
+        except Exception as e:
+            self.results_text.insert(tk.END, f"Could not build the template profile: {str(e)}\n\n")
+            return None
+        self.results_text.insert(tk.END, template.describe() + "\n\n")
+        return template
+    
+    def report_invalid_tests(self, test_names):
+        """Validate tests and list any problems in the results area
+        
+        Args:
+            test_names: Names of the tests to check
+            
+        Returns:
+            True if all tests are valid
+        """
+        problems = validate_test_files(test_names, self.test_dir_var.get(), self.test_manager)
+        for test_name, issues in problems.items():
+            self.results_text.insert(tk.END, f"=== Invalid test: {test_name} ===\n")
+            for issue in issues:
+                self.results_text.insert(tk.END, f"  {issue}\n")
+            self.results_text.insert(tk.END, "\n")
+        return not problems
+    
+    def validate_selected_tests(self):
+        """Check the selected tests for invalid selectors, URLs and values"""
+        selection = self.test_suite_listbox.curselection()
+        if not selection:
+            messagebox.showwarning("Warning", "No tests selected")
+            return
+        
+        test_names = [self.test_suite_listbox.get(i) for i in selection]
+        self.clear_results()
+        if self.report_invalid_tests(test_names):
+            self.results_text.insert(tk.END, f"All {len(test_names)} selected test(s) are valid\n\n")
+            self.show_optimization_report(test_names)
+            self.status_var.set("Validation passed")
+        else:
+            self.status_var.set("Validation found invalid test cases")
+    
+    def show_optimization_report(self, test_names):
+        """List the steps the optimizer would skip and the estimated time saved"""
+        from app.optimizer import dry_run, format_optimization_report
+        
+        test_dir = self.test_dir_var.get()
+        optimizations = [dry_run(self.test_manager.load_test_case(os.path.join(test_dir, f"{name}.json")))
+                         for name in test_names]
+        if not any(optimization.rewrites for optimization in optimizations):
+            return
+        self.results_text.insert(tk.END, "=== Optimizer (dry run) ===\n")
+        self.results_text.insert(tk.END, "\n".join(format_optimization_report(optimizations)) + "\n")
+        self.results_text.insert(tk.END, "Tick 'Optimize test plans' in Settings to run tests this way.\n")
+    
+    def toggle_watch(self):
+        """Start or stop watch mode from the Watch checkbox"""
+        if self.watch_var.get():
+            self.start_watching()
+        else:
+            self.stop_watching()
+            self.status_var.set("Watch mode stopped")
+    
+    def start_watching(self):
+        """Rerun the selected tests (or all tests) whenever their files change"""
+        from app.watcher import TestWatcher
+        
+        test_names = [self.test_suite_listbox.get(i) for i in self.test_suite_listbox.curselection()]
+        self.test_runner.browser = self.browser_var.get()
+        self.test_runner.headless = self.headless_var.get()
+        self.test_runner.wait_time = self.wait_var.get()
+        self.test_runner.engine = self.engine_var.get()
+        self.test_runner.capture_performance = self.perf_var.get()
+        
+        self.test_watcher = TestWatcher(
+            self.test_runner, self.test_dir_var.get(), self.suite_dir_var.get(), test_names=test_names,
+            on_result=lambda test_case, result: self.watch_queue.put(("result", test_case, result)),
+            on_rerun=lambda names, changed: self.watch_queue.put(("rerun", names, changed)),
+            on_error=lambda message: self.watch_queue.put(("error", message, None))
+        )
+        self.test_watcher.start()
+        scope = f"{len(test_names)} selected test(s)" if test_names else "all tests"
+        self.results_text.insert(tk.END, f"Watching {scope} for changes ({self.test_watcher.backend})...\n\n")
+        self.status_var.set("Watch mode on")
+        self.root.after(100, self.poll_watch_events)
+    
+    def stop_watching(self):
+        """Stop watch mode and quit its browser"""
+        if self.test_watcher is not None:
+            self.test_watcher.stop()
+            self.test_watcher = None
+        self.watch_var.set(False)
+    
+    def poll_watch_events(self):
+        """Show reruns and results reported by the test watcher"""
+        while True:
+            try:
+                kind, first, second = self.watch_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "rerun":
+                files = ", ".join(sorted(os.path.basename(path) for path in second))
+                self.results_text.insert(tk.END, f"--- Changed: {files}; rerunning {', '.join(first)} ---\n\n")
+            elif kind == "error":
+                self.results_text.insert(tk.END, f"ERROR: {first}\n\n")
+            else:
+                test_case, result = first, second
+                self.results_text.insert(tk.END, f"=== Test: {test_case.name} ===\n")
+                if result["success"]:
+                    self.results_text.insert(tk.END, f"TEST PASSED ({result['duration']:.2f} seconds)\n\n")
+                else:
+                    self.results_text.insert(tk.END, "TEST FAILED\n")
+                    self.results_text.insert(tk.END, f"Error: {result['error']}\n\n")
+                self.show_performance(result)
+                self.status_var.set(f"Watch mode: {test_case.name} {'passed' if result['success'] else 'failed'}")
+            self.results_text.see(tk.END)
+        
+        if self.test_watcher is not None:
+            self.root.after(100, self.poll_watch_events)
+    
+    # Trace viewer methods
+    def open_trace(self):
+        """Load a trace file into the trace viewer"""
+        from app.trace import read_trace
+        
+        trace_dir = self.trace_dir_var.get()
+        file_path = filedialog.askopenfilename(
+            initialdir=trace_dir if os.path.isdir(trace_dir) else None,
+            title="Open Trace",
+            filetypes=(("Trace files", "*.trace.jsonl"), ("All files", "*.*"))
+        )
+        if not file_path:
+            return
+        try:
+            trace = read_trace(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load trace: {str(e)}")
+            return
+        
+        self.trace_records = trace["actions"]
+        self.trace_start_time = trace["start"]["time"] if trace["start"] else None
+        self.trace_tree.delete(*self.trace_tree.get_children())
+        for position, record in enumerate(self.trace_records):
+            self.trace_tree.insert("", tk.END, iid=str(position), values=(
+                record.get("index", 0) + 1,
+                record.get("action_type"),
+                "OK" if record.get("success") else "FAILED",
+                f"{record.get('duration', 0) * 1000:.0f}"
+            ))
+        
+        name = trace["start"]["test"] if trace["start"] else os.path.basename(file_path)
+        end = trace["end"]
+        if end is None:
+            outcome = "incomplete (the run was interrupted)"
+        else:
+            outcome = f"{'passed' if end['success'] else 'failed'} in {end['duration']:.2f}s"
+        self.trace_summary_var.set(f"{name}: {outcome}")
+        self.trace_details_text.delete("1.0", tk.END)
+        if end is not None and end.get("error"):
+            self.trace_details_text.insert(tk.END, f"Error: {end['error']}\n")
+        if self.trace_records:
+            # Start on the failing action, which is usually the one of interest
+            self.trace_tree.selection_set(str(len(self.trace_records) - 1))
+            self.trace_tree.see(str(len(self.trace_records) - 1))
+    
+    def selected_trace_record(self):
+        """The action record selected in the trace viewer, or None"""
+        selection = self.trace_tree.selection()
+        if not selection:
+            return None
+        return self.trace_records[int(selection[0])]
+    
+    def on_trace_action_select(self, event):
+        """Show the details of the selected trace action"""
+        from app.trace import format_action_record
+        
+        record = self.selected_trace_record()
+        if record is None:
+            return
+        self.trace_details_text.delete("1.0", tk.END)
+        self.trace_details_text.insert(tk.END, "\n".join(format_action_record(record, self.trace_start_time)))
+    
+    def open_trace_dom(self):
+        """Open the DOM snapshot of the selected trace action in the web browser"""
+        import html
+        import tempfile
+        import webbrowser
+        from app.trace import record_dom
+        
+        record = self.selected_trace_record()
+        dom = record_dom(record) if record is not None else None
+        if dom is None:
+            messagebox.showwarning("Warning", "The selected action has no DOM snapshot")
+            return
+        with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False, encoding="utf-8") as f:
+            # Resolve relative links and styles against the page the snapshot came from
+            if record.get("url"):
+                f.write(f'<base href="{html.escape(record["url"], quote=True)}">')
+            f.write(dom)
+        webbrowser.open(f"file://{f.name}")
+    
+    def show_performance(self, result):
+        """Append the page-load metrics of a test result to the results area"""
+        if not result.get("performance"):
+            return
+        
+        self.results_text.insert(tk.END, "Page loads:\n")
+        for entry in result["performance"]:
+            metrics = entry["metrics"]
+            load_time = get_load_time(metrics, "load")
+            lcp = metrics.get("lcp")
+            cls = metrics.get("cls")
+            line = f"  Action #{entry['action_index']+1} ({entry['action_type']}) {metrics.get('url')}: "
+            line += f"load {load_time:.0f}ms" if load_time is not None else "load n/a"
+            line += f", {get_request_count(metrics)} requests"
+            if lcp is not None:
+                line += f", LCP {lcp:.0f}ms"
+            if cls is not None:
+                line += f", CLS {cls:.3f}"
+            self.results_text.insert(tk.END, line + "\n")
+        self.results_text.insert(tk.END, "\n")
+    
     def save_test_suite(self):
         """Save the current test suite to file"""
         selection = self.test_suite_listbox.curselection()
@@ -604,7 +1383,7 @@ class TestingToolGUI:
         
         if file_path:
             try:
-                self.test_manager.save_test_suite(test_names, file_path)
+                self.test_manager.save_test_suite(test_names, file_path, chained=self.chained_var.get())
                 self.status_var.set(f"Saved test suite with {len(test_names)} tests")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save test suite: {str(e)}")
@@ -622,7 +1401,10 @@ class TestingToolGUI:
         
         if file_path:
             try:
-                test_names = self.test_manager.load_test_suite(file_path)
+                suite = self.test_manager.load_test_suite_config(file_path)
+                test_names = suite["tests"]
+                self.suite_order = list(test_names)
+                self.chained_var.set(bool(suite.get("chained")))
                 
                 # Update test suite listbox
                 self.test_suite_listbox.selection_clear(0, tk.END)
@@ -648,6 +1430,21 @@ class TestingToolGUI:
         if directory:
             string_var.set(directory)
     
+    def accept_pending_baselines(self):
+        """Make the screenshots of failed Assert Screenshot comparisons the new baselines"""
+        from app.visual import BaselineStore
+        
+        store = BaselineStore(self.baseline_dir_var.get())
+        pending = store.pending()
+        if not pending:
+            messagebox.showinfo("Baselines", "No pending screenshots to accept")
+            return
+        if not messagebox.askyesno("Baselines", f"Accept {len(pending)} pending screenshot(s) as new baselines?\n\n"
+                                   + "\n".join(sorted(pending)[:20])):
+            return
+        accepted = store.accept()
+        self.status_var.set(f"Accepted {len(accepted)} baseline(s)")
+    
     def apply_settings(self):
         """Apply the settings"""
         # Create directories if they don't exist
@@ -655,10 +1452,21 @@ class TestingToolGUI:
         os.makedirs(self.suite_dir_var.get(), exist_ok=True)
         
         # Update test runner with browser settings
-        if hasattr(self, 'test_runner'):
+        if self._test_runner is not None:
             self.test_runner.browser = self.browser_var.get()
             self.test_runner.headless = self.headless_var.get()
             self.test_runner.wait_time = self.wait_var.get()
+            self.test_runner.engine = self.engine_var.get()
+            self.test_runner.capture_performance = self.perf_var.get()
+        
+        # Start, re-create or release the warm standby browsers
+        if self.warm_var.get():
+            self.test_runner.enable_warm_standby(
+                size=max(1, self.workers_var.get()),
+                idle_timeout=self.warm_idle_var.get() * 60
+            )
+        elif self._test_runner is not None:
+            self.test_runner.disable_warm_standby()
         
         messagebox.showinfo("Settings", "Settings applied successfully")
         self.status_var.set("Settings applied")
@@ -0,0 +1,331 @@
+"""
+HTTP Engine module for the UWAutoTest application
+Runs browserless test cases with a pooled HTTP client and an HTML parser
+"""
+import re
+import time
+import email.message
+import http.cookiejar
+import urllib.request
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin, urlencode, urlsplit, urlunsplit
+
+from app.models import TestCase, ActionType
+from app.compiler import CompiledAction, CompiledPlan, compile_test_case
+
+
+# Actions the HTTP engine can execute without JavaScript
+HTTP_ACTION_TYPES = {
+    ActionType.NAVIGATE,
+    ActionType.INPUT,
+    ActionType.SUBMIT,
+    ActionType.WAIT,
+    ActionType.ASSERT_TEXT,
+    ActionType.ASSERT_ELEMENT,
+}
+
+MAX_REDIRECTS = 10
+
+USER_AGENT = "Mozilla/5.0 (compatible; UWAutoTest HTTP engine)"
+
+
+class NotEligibleError(Exception):
+    """Raised when a page needs a real browser to run the test faithfully"""
+    pass
+
+
+def http_engine_available() -> bool:
+    """Check whether the optional HTML parsing dependencies are installed
+
+    Returns:
+        True if beautifulsoup4 and urllib3 can be imported
+    """
+    try:
+        import bs4  # noqa: F401
+        import urllib3  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_eligible(test_case: TestCase) -> bool:
+    """Check whether a test case can run without a browser
+
+    A test is eligible when it only navigates, fills and submits plain
+    forms, waits and makes positive assertions about the served HTML.
+    Asserting that an element does NOT exist is left to the browser,
+    since JavaScript could add the element after the page loads.
+
+    Args:
+        test_case: The TestCase to check
+
+    Returns:
+        True if the HTTP engine can run the test case
+    """
+    pending_input = False
+    for action in test_case.actions:
+        if action.action_type not in HTTP_ACTION_TYPES:
+            return False
+        if action.action_type == ActionType.ASSERT_ELEMENT and action.value.strip().lower() == "false":
+            return False
+        if action.action_type == ActionType.WAIT and not action.value.strip().isdigit() and not action.target:
+            return False
+        if action.action_type == ActionType.INPUT:
+            pending_input = True
+        elif action.action_type == ActionType.SUBMIT:
+            pending_input = False
+        elif action.action_type == ActionType.NAVIGATE and pending_input:
+            # Typed input that is never submitted only has effects through JavaScript
+            return False
+    return not pending_input and bool(test_case.actions) and \
+        test_case.actions[0].action_type == ActionType.NAVIGATE
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace the way rendered element text does"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class _CookieResponse:
+    """Adapter exposing response headers the way http.cookiejar expects"""
+
+    def __init__(self, headers):
+        self._message = email.message.Message()
+        for name, value in headers.items():
+            self._message[name] = value
+
+    def info(self):
+        return self._message
+
+
+class HttpEngine:
+    """Executes eligible test cases over HTTP with pooled connections"""
+
+    def __init__(self, wait_time=10, pool_size=32):
+        """Initialize the HTTP engine
+
+        Args:
+            wait_time: Request timeout in seconds
+            pool_size: Maximum number of pooled connections per host
+        """
+        import urllib3
+
+        self.wait_time = wait_time
+        # The pool manager is thread-safe and shared by all tests
+        self._http = urllib3.PoolManager(
+            maxsize=pool_size,
+            block=False,
+            retries=False,
+            headers={"User-Agent": USER_AGENT}
+        )
+
+    def _fetch(self, session: Dict[str, Any], method: str, url: str, fields: Optional[List] = None) -> None:
+        """Fetch a page, following redirects and keeping cookies
+
+        Args:
+            session: Per-test state (cookies, current URL and document)
+            method: HTTP method
+            url: Absolute URL to fetch
+            fields: Form fields to send as query string (GET) or body (POST)
+        """
+        from bs4 import BeautifulSoup
+
+        body = None
+        headers = {}
+        if fields is not None:
+            if method == "GET":
+                parts = urlsplit(url)
+                url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(fields), ""))
+            else:
+                body = urlencode(fields)
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        for _ in range(MAX_REDIRECTS + 1):
+            request = urllib.request.Request(url, method=method)
+            session["cookies"].add_cookie_header(request)
+            headers.update(request.unredirected_hdrs)
+
+            response = self._http.request(
+                method, url, body=body, headers=headers, redirect=False,
+                timeout=self.wait_time, preload_content=True
+            )
+            session["cookies"].extract_cookies(_CookieResponse(response.headers), request)
+
+            location = response.headers.get("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                if response.status in (301, 302, 303):
+                    method, body = "GET", None
+                    headers.pop("Content-Type", None)
+                headers.pop("Cookie", None)
+                continue
+
+            content_type = response.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type:
+                raise NotEligibleError(f"Non-HTML response ({content_type}) from {url}")
+
+            session["url"] = url
+            session["document"] = BeautifulSoup(response.data, "html.parser")
+            session["form_values"] = {}
+            return
+
+        raise AssertionError(f"Too many redirects while loading {url}")
+
+    def _select(self, session: Dict[str, Any], selector: str):
+        """Find the first element matching a CSS selector on the current page"""
+        if session["document"] is None:
+            raise AssertionError("No page has been loaded")
+        return session["document"].select_one(selector)
+
+    def _require(self, session: Dict[str, Any], selector: str):
+        """Find an element or fail like the browser would after waiting"""
+        element = self._select(session, selector)
+        if element is None:
+            raise NotEligibleError(f"Element '{selector}' is not in the served HTML")
+        return element
+
+    def _form_fields(self, session: Dict[str, Any], form, submitter=None) -> List:
+        """Collect the fields a browser would send when submitting a form"""
+        fields = []
+        for element in form.find_all(["input", "select", "textarea", "button"]):
+            name = element.get("name")
+            if not name or element.has_attr("disabled"):
+                continue
+            typed = session["form_values"].get(id(element))
+            if element.name == "input":
+                input_type = (element.get("type") or "text").lower()
+                if input_type in ("checkbox", "radio"):
+                    if element.has_attr("checked"):
+                        fields.append((name, element.get("value", "on")))
+                elif input_type in ("submit", "image", "button", "reset"):
+                    if element is submitter:
+                        fields.append((name, element.get("value", "")))
+                elif input_type == "file":
+                    raise NotEligibleError("File uploads need a browser")
+                else:
+                    fields.append((name, typed if typed is not None else element.get("value", "")))
+            elif element.name == "textarea":
+                fields.append((name, typed if typed is not None else element.get_text()))
+            elif element.name == "select":
+                option = element.find("option", selected=True) or element.find("option")
+                if option is not None:
+                    fields.append((name, option.get("value", option.get_text())))
+            elif element.name == "button" and element is submitter:
+                fields.append((name, element.get("value", "")))
+        return fields
+
+    def _execute_action(self, session: Dict[str, Any], step: CompiledAction) -> None:
+        """Execute a single compiled test action over HTTP
+
+        Args:
+            session: Per-test state
+            step: The CompiledAction to execute
+        """
+        action = step.action
+        if action.action_type == ActionType.NAVIGATE:
+            self._fetch(session, "GET", step.url)
+
+        elif action.action_type == ActionType.INPUT:
+            element = self._require(session, step.locator[1])
+            if element.name not in ("input", "textarea"):
+                raise NotEligibleError(f"Element '{action.target}' is not a plain form field")
+            session["form_values"][id(element)] = action.value
+
+        elif action.action_type == ActionType.SUBMIT:
+            element = self._require(session, step.locator[1])
+            form = element if element.name == "form" else element.find_parent("form")
+            if form is None:
+                raise NotEligibleError(f"Element '{action.target}' is not inside a form")
+            if form.has_attr("onsubmit") or "multipart" in (form.get("enctype") or ""):
+                raise NotEligibleError("Form submission depends on the browser")
+            submitter = element if element.name in ("input", "button") else None
+            method = (form.get("method") or "GET").upper()
+            url = urljoin(session["url"], form.get("action") or session["url"])
+            self._fetch(session, method if method == "POST" else "GET", url, self._form_fields(session, form, submitter))
+
+        elif action.action_type == ActionType.WAIT:
+            if step.wait_seconds is not None:
+                time.sleep(step.wait_seconds)
+            elif step.locator:
+                self._require(session, step.locator[1])
+
+        elif action.action_type == ActionType.ASSERT_TEXT:
+            element = self._require(session, step.locator[1])
+            actual_text = normalize_text(element.get_text(" "))
+            if normalize_text(action.value) not in actual_text:
+                raise AssertionError(f"Text '{action.value}' not found in element. Actual text: '{actual_text}'")
+
+        elif action.action_type == ActionType.ASSERT_ELEMENT:
+            self._require(session, step.locator[1])
+
+        else:
+            raise NotEligibleError(f"{action.action_type.value} actions need a browser")
+
+    def run_test(self, test_case: TestCase) -> Dict[str, Any]:
+        """Compile and run a test case over HTTP
+
+        Args:
+            test_case: An eligible TestCase (see is_eligible)
+
+        Returns:
+            Dictionary with test results (see run_plan)
+
+        Raises:
+            PlanValidationError: If the test case is invalid
+        """
+        return self.run_plan(compile_test_case(test_case))
+
+    def run_plan(self, plan: CompiledPlan) -> Dict[str, Any]:
+        """Run a compiled test case over HTTP
+
+        Args:
+            plan: Compiled plan of an eligible TestCase (see is_eligible)
+
+        Returns:
+            Dictionary with test results, in the same format as TestRunner.run_test.
+            "needs_browser" is set when the page turned out to depend on a browser.
+        """
+        result = {
+            "success": False,
+            "error": None,
+            "duration": 0,
+            "screenshots": [],
+            "performance": [],
+            "actions": [],
+            "engine": "http",
+            "needs_browser": False
+        }
+        session = {
+            "cookies": http.cookiejar.CookieJar(),
+            "url": None,
+            "document": None,
+            "form_values": {}
+        }
+        start_time = time.time()
+
+        try:
+            for step in plan.steps:
+                i, action = step.index, step.action
+                action_start = time.time()
+                try:
+                    self._execute_action(session, step)
+                except NotEligibleError as e:
+                    result["needs_browser"] = True
+                    result["error"] = f"Action #{i+1} ({action.action_type.value}) needs a browser: {str(e)}"
+                    return result
+                except Exception as e:
+                    result["error"] = f"Error on action #{i+1} ({action.action_type.value}): {str(e)}"
+                    return result
+                finally:
+                    result["actions"].append({
+                        "index": i,
+                        "action_type": action.action_type.value,
+                        "duration": time.time() - action_start,
+                        "success": result["error"] is None
+                    })
+
+            result["success"] = True
+        finally:
+            result["duration"] = time.time() - start_time
+
+        return result
@@ -0,0 +1,380 @@
+"""
+Isolation module for the UWAutoTest application
+Runs tests in supervised child processes with hard deadlines
+"""
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models import TestCase
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a new worker may take to import Selenium and report that it is ready
+WORKER_START_TIMEOUT = 60.0
+
+# Seconds a worker gets to exit on its own before it is killed
+WORKER_EXIT_TIMEOUT = 5.0
+
+
+def kill_process_tree(process: subprocess.Popen) -> None:
+    """Kill a worker together with the drivers and browsers it started
+
+    Workers run in their own process group (a new console process group on
+    Windows), which the drivers and browsers they launch inherit, so
+    everything is killed even when the worker itself already exited.
+
+    Args:
+        process: The worker process
+    """
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+    try:
+        process.wait(timeout=WORKER_EXIT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def worker_failure_result(error: str, duration: float, timed_out: bool = False) -> Dict[str, Any]:
+    """Build the result of a test whose worker crashed or was killed"""
+    return {
+        "success": False,
+        "timed_out": timed_out,
+        "error": error,
+        "duration": duration,
+        "screenshots": [],
+        "performance": [],
+        "actions": [],
+        "engine": "selenium"
+    }
+
+
+class WorkerProcess:
+    """A child process that runs one test at a time with a TestRunner
+
+    The worker reports the start of every action, which lets the parent
+    enforce a deadline per action as well as per test. A worker that misses
+    a deadline or crashes is killed with its browsers and started again for
+    the next test.
+    """
+
+    def __init__(self, runner_options: Dict[str, Any], test_timeout: Optional[float],
+                 action_timeout: Optional[float], warm: bool = False):
+        """Initialize the worker (the process is started on first use)
+
+        Args:
+            runner_options: Keyword arguments for the TestRunner in the child
+            test_timeout: Seconds a whole test may take, or None for no limit
+            action_timeout: Seconds a single action may take on top of any
+                fixed Wait delay, or None for no limit
+            warm: Keep a browser on standby inside the worker
+        """
+        self.runner_options = runner_options
+        self.test_timeout = test_timeout
+        self.action_timeout = action_timeout
+        self.warm = warm
+        self.process = None
+        self._messages = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> None:
+        """Start the child process and wait until it is ready for tests"""
+        config = json.dumps({"runner": self.runner_options, "warm": self.warm})
+        popen_options = {}
+        if os.name == "posix":
+            popen_options["start_new_session"] = True
+        else:
+            popen_options["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "app.isolation", config],
+            cwd=PROJECT_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, bufsize=1, **popen_options
+        )
+        self._messages = queue.Queue()
+        threading.Thread(target=self._read_messages, args=(self.process, self._messages), daemon=True).start()
+
+        message = self._next_message(time.time() + WORKER_START_TIMEOUT)
+        if message is None or message.get("event") != "ready":
+            self.stop()
+            raise RuntimeError("Test worker process failed to start" if message is None
+                               else f"Test worker process failed to start: {message.get('error')}")
+
+    @staticmethod
+    def _read_messages(process: subprocess.Popen, messages: queue.Queue) -> None:
+        """Forward protocol messages from the worker's stdout (None marks the end)"""
+        for line in process.stdout:
+            try:
+                messages.put(json.loads(line))
+            except ValueError:
+                continue
+        messages.put(None)
+
+    def _next_message(self, deadline: Optional[float]) -> Optional[Dict[str, Any]]:
+        """Wait for the next message until the deadline
+
+        Returns:
+            The message, None if the worker exited, or {"event": "timeout"}
+        """
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        try:
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return {"event": "timeout"}
+
+    def run(self, test_case: TestCase) -> Dict[str, Any]:
+        """Run a test case in the worker, enforcing the deadlines
+
+        Args:
+            test_case: The TestCase to run
+
+        Returns:
+            Dictionary with test results. Tests that missed a deadline have
+            "timed_out" set.
+        """
+        if not self.alive:
+            try:
+                self.start()
+            except Exception as e:
+                return worker_failure_result(str(e), 0.0)
+
+        start_time = time.time()
+        test_deadline = start_time + self.test_timeout if self.test_timeout else None
+        action_deadline = None
+        current_action = None
+
+        try:
+            self.process.stdin.write(json.dumps(test_case.to_dict()) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            pass  # The worker died; reported below when its output ends
+
+        while True:
+            deadlines = [deadline for deadline in (test_deadline, action_deadline) if deadline is not None]
+            message = self._next_message(min(deadlines) if deadlines else None)
+
+            if message is None:
+                code = self.process.wait()
+                self.stop()
+                return worker_failure_result(f"Test worker process exited unexpectedly (exit code {code})",
+                                             time.time() - start_time)
+
+            event = message.get("event")
+            if event == "action":
+                current_action = message
+                if self.action_timeout:
+                    action_deadline = time.time() + self.action_timeout + message.get("wait_seconds", 0)
+            elif event == "result":
+                return message["result"]
+            elif event == "timeout":
+                self.stop(kill=True)
+                duration = time.time() - start_time
+                if test_deadline is not None and time.time() >= test_deadline:
+                    error = f"Test exceeded its {self.test_timeout:.0f}s deadline"
+                else:
+                    error = f"Action exceeded its {self.action_timeout:.0f}s deadline"
+                if current_action is not None:
+                    error += f" on action #{current_action['index'] + 1} ({current_action['action_type']})"
+                return worker_failure_result(f"{error}; the worker and its browser were killed", duration,
+                                             timed_out=True)
+
+    def stop(self, kill: bool = False) -> None:
+        """Stop the worker, killing it and its browsers if needed
+
+        Args:
+            kill: Kill right away instead of letting the worker quit its browsers
+        """
+        if self.process is None:
+            return
+        if not kill and self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=WORKER_EXIT_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        # Also reaps drivers and browsers left behind by a crashed worker
+        kill_process_tree(self.process)
+        self.process = None
+
+
+class IsolatedRunner:
+    """Runs tests in supervised worker processes
+
+    Has the same run_test/run_tests interface as TestRunner. A test that
+    hangs, or a driver that crashes, only affects its own worker, which is
+    killed together with its browser and replaced.
+    """
+
+    def __init__(self, browser="Chrome", headless=False, wait_time=10, capture_performance=False,
+                 engine="selenium", driver_path=None, test_timeout=600.0, action_timeout=120.0,
+                 warm=False, trace_dir=None, trace_dom=True, baseline_dir=None, update_baselines=None,
+                 optimize=False, profile_template=None):
+        """Initialize the isolated runner
+
+        Args:
+            browser: Browser to use ('Chrome', 'Firefox', or 'Edge')
+            headless: Whether to run in headless mode
+            wait_time: Implicit wait time in seconds
+            capture_performance: Whether to collect page-load metrics after every navigation (see TestRunner)
+            engine: 'selenium' or 'auto' (see TestRunner)
+            driver_path: Path to a local driver executable
+            test_timeout: Seconds a whole test may take, or None for no limit
+            action_timeout: Seconds a single action may take (a fixed Wait delay
+                is added to it), or None for no limit
+            warm: Keep a browser on standby inside each worker
+            trace_dir: Directory to record a trace file per test in, or None
+            trace_dom: Whether traces include a DOM snapshot after every action
+            baseline_dir: Baseline store used by Assert Screenshot actions
+            update_baselines: None, 'missing' or 'all' (see TestRunner)
+            optimize: Whether to drop redundant steps from test plans
+            profile_template: Directory of a template profile that the
+                workers' browser sessions start from copies of
+        """
+        self.runner_options = {
+            "browser": browser,
+            "headless": headless,
+            "wait_time": wait_time,
+            "capture_performance": capture_performance,
+            "engine": engine,
+            "driver_path": driver_path,
+            "trace_dir": trace_dir,
+            "trace_dom": trace_dom,
+            "baseline_dir": baseline_dir,
+            "update_baselines": update_baselines,
+            "optimize": optimize,
+            "profile_template": profile_template
+        }
+        self.test_timeout = test_timeout
+        self.action_timeout = action_timeout
+        self.warm = warm
+        self.workers: List[WorkerProcess] = []
+        # Optional RunMetrics; actions and timings come from the results the workers send back
+        self.metrics = None
+
+    def _get_workers(self, count: int) -> List[WorkerProcess]:
+        while len(self.workers) < count:
+            self.workers.append(WorkerProcess(self.runner_options, self.test_timeout, self.action_timeout,
+                                              warm=self.warm))
+        return self.workers[:count]
+
+    def _run(self, worker: WorkerProcess, test_case: TestCase) -> Dict[str, Any]:
+        """Run a test case on a worker, reporting it to the metrics"""
+        if self.metrics is None:
+            return worker.run(test_case)
+        self.metrics.test_started()
+        result = None
+        try:
+            result = worker.run(test_case)
+            return result
+        finally:
+            self.metrics.test_finished(result)
+
+    def run_test(self, test_case: TestCase) -> Dict[str, Any]:
+        """Run a test case in a worker process
+
+        Args:
+            test_case: The TestCase to run
+
+        Returns:
+            Dictionary with test results
+        """
+        return self._run(self._get_workers(1)[0], test_case)
+
+    def run_tests(self, test_cases: Iterable[TestCase], max_workers: int = 1) -> Iterator[Tuple[TestCase, Dict[str, Any]]]:
+        """Run a stream of test cases on a pool of worker processes
+
+        Test cases are pulled from the iterable on the calling thread, one
+        per idle worker.
+
+        Args:
+            test_cases: Iterable (typically a generator) of TestCases to run
+            max_workers: Number of worker processes
+
+        Yields:
+            (test_case, result) tuples in completion order
+        """
+        iterator = iter(test_cases)
+        idle = list(self._get_workers(max(1, max_workers)))
+        with ThreadPoolExecutor(max_workers=len(idle)) as executor:
+            pending = {}
+
+            def submit():
+                while idle:
+                    test_case = next(iterator, None)
+                    if test_case is None:
+                        break
+                    worker = idle.pop()
+                    pending[executor.submit(self._run, worker, test_case)] = (worker, test_case)
+                if self.metrics is not None:
+                    self.metrics.set_pending(len(pending))
+
+            submit()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    worker, test_case = pending.pop(future)
+                    idle.append(worker)
+                    yield test_case, future.result()
+                submit()
+
+    def shutdown(self) -> None:
+        """Stop all worker processes and their browsers"""
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+
+
+def worker_main() -> None:
+    """Entry point of a worker process: run test cases read from stdin"""
+    config = json.loads(sys.argv[1])
+
+    # Keep stdout for protocol messages; anything libraries print goes to stderr
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    try:
+        from app.test_runner import TestRunner
+        runner = TestRunner(**config["runner"])
+    except Exception as e:
+        send({"event": "error", "error": str(e)})
+        return
+
+    def on_action_start(test_case, step):
+        send({"event": "action", "index": step.index, "action_type": step.action_type.value,
+              "wait_seconds": step.wait_seconds or 0})
+
+    runner.on_action_start = on_action_start
+    if config.get("warm"):
+        runner.enable_warm_standby(size=1)
+    send({"event": "ready"})
+
+    try:
+        for line in sys.stdin:
+            test_case = TestCase.from_dict(json.loads(line))
+            send({"event": "result", "result": runner.run_test(test_case)})
+    finally:
+        runner.disable_warm_standby()
+        runner.disable_tracing()
+
+
+if __name__ == "__main__":
+    worker_main()
@@ -0,0 +1,357 @@
+"""
+Load Test module for the UWAutoTest application
+Replays test cases concurrently at a target rate or number of virtual users
+"""
+import math
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable
+
+from app.models import TestCase
+from app.scheduler import history_key
+from app.test_runner import TestRunner
+
+
+RAMP_UP = "ramp-up"
+STEADY = "steady"
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class LoadProfile:
+    """Describes how much load to generate and for how long"""
+    duration: float = 60.0         # Total run time in seconds, including ramp-up
+    users: int = 1                 # Virtual users, one headless browser each
+    rate: Optional[float] = None   # Target test starts per second; None runs users in a closed loop
+    ramp_up: float = 0.0           # Seconds over which users or rate ramp up linearly
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list
+
+    Args:
+        sorted_values: Values sorted in ascending order
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile value, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """Summarize a list of latencies in seconds
+
+    Args:
+        latencies: Latency samples in seconds
+
+    Returns:
+        Dictionary with count, mean, max and percentiles
+    """
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "max": values[-1] if values else 0.0
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(values, pct)
+    return summary
+
+
+class LoadStats:
+    """Thread-safe aggregation of load test results per phase"""
+
+    def __init__(self):
+        """Initialize empty statistics"""
+        self._lock = threading.Lock()
+        self.phases = {
+            phase: {"started": 0, "completed": 0, "failed": 0, "tests": [], "actions": {}, "errors": {}}
+            for phase in (RAMP_UP, STEADY)
+        }
+        self.late_starts = 0
+        self.max_backlog = 0
+        self._interval_completed = 0
+        self._interval_failed = 0
+
+    def record(self, phase: str, test_case: TestCase, result: Dict[str, Any]) -> None:
+        """Record the outcome of one test iteration
+
+        Args:
+            phase: Phase the iteration started in
+            test_case: The TestCase that ran
+            result: Result dictionary returned by TestRunner.run_test
+        """
+        with self._lock:
+            stats = self.phases[phase]
+            stats["completed"] += 1
+            stats["tests"].append(result["duration"])
+            self._interval_completed += 1
+            if not result["success"]:
+                stats["failed"] += 1
+                self._interval_failed += 1
+                error = (result["error"] or "Unknown error").splitlines()[0]
+                stats["errors"][error] = stats["errors"].get(error, 0) + 1
+            # Rows of a data-driven test share their action series, e.g. 'login #1 Navigate'
+            test_name = history_key(test_case)
+            for action in result.get("actions", []):
+                key = f"{test_name} #{action['index']+1} {action['action_type']}"
+                stats["actions"].setdefault(key, []).append(action["duration"])
+
+    def record_start(self, phase: str) -> None:
+        """Record that a test iteration started
+
+        Args:
+            phase: Phase the iteration started in
+        """
+        with self._lock:
+            self.phases[phase]["started"] += 1
+
+    def record_late_start(self) -> None:
+        """Record a test that started more than a second after it was scheduled"""
+        with self._lock:
+            self.late_starts += 1
+
+    def record_backlog(self, backlog: int) -> None:
+        """Track the largest number of scheduled tests waiting for a free browser
+
+        Args:
+            backlog: Current number of waiting tests
+        """
+        with self._lock:
+            self.max_backlog = max(self.max_backlog, backlog)
+
+    def take_interval(self) -> Dict[str, int]:
+        """Return and reset the counts since the previous call
+
+        Returns:
+            Dictionary with completed and failed counts for the interval
+        """
+        with self._lock:
+            interval = {"completed": self._interval_completed, "failed": self._interval_failed}
+            self._interval_completed = 0
+            self._interval_failed = 0
+            return interval
+
+    def report(self, elapsed: float, ramp_up: float) -> Dict[str, Any]:
+        """Build a summary report of all phases
+
+        Args:
+            elapsed: Total run time in seconds
+            ramp_up: Ramp-up length in seconds
+
+        Returns:
+            Report dictionary with throughput, error rate and latency percentiles
+        """
+        with self._lock:
+            report = {"elapsed": elapsed, "late_starts": self.late_starts, "max_backlog": self.max_backlog, "phases": {}}
+            phase_lengths = {RAMP_UP: min(ramp_up, elapsed), STEADY: max(0.0, elapsed - ramp_up)}
+            for phase, stats in self.phases.items():
+                length = phase_lengths[phase]
+                completed = stats["completed"]
+                report["phases"][phase] = {
+                    "duration": length,
+                    "started": stats["started"],
+                    "completed": completed,
+                    "failed": stats["failed"],
+                    "throughput": completed / length if length > 0 else 0.0,
+                    "error_rate": stats["failed"] / completed if completed else 0.0,
+                    "test_latency": summarize_latencies(stats["tests"]),
+                    "action_latency": {key: summarize_latencies(values) for key, values in stats["actions"].items()},
+                    "errors": dict(stats["errors"])
+                }
+            return report
+
+
+class LoadTester:
+    """Replays test cases on a pool of headless browsers to generate load"""
+
+    def __init__(self, runner: TestRunner, test_cases: List[TestCase], profile: LoadProfile,
+                 weights: Optional[List[float]] = None):
+        """Initialize the load tester
+
+        Args:
+            runner: TestRunner configured with the browser and wait time to use
+            test_cases: Test cases making up the traffic mix
+            profile: How much load to generate
+            weights: Relative weight of each test case in the mix (defaults to equal)
+        """
+        if not test_cases:
+            raise ValueError("At least one test case is required for a load test")
+        if weights is not None and len(weights) != len(test_cases):
+            raise ValueError("Weights must match the number of test cases")
+
+        self.runner = runner
+        self.test_cases = test_cases
+        self.weights = weights or [1.0] * len(test_cases)
+        self.profile = profile
+        self.stats = LoadStats()
+        self._stop = threading.Event()
+        self._start_time = 0.0
+
+    def stop(self) -> None:
+        """Stop the load test early"""
+        self._stop.set()
+
+    def _elapsed(self) -> float:
+        return time.time() - self._start_time
+
+    def _phase(self) -> str:
+        return RAMP_UP if self._elapsed() < self.profile.ramp_up else STEADY
+
+    def _pick_test_case(self, rng: random.Random) -> TestCase:
+        return rng.choices(self.test_cases, weights=self.weights)[0]
+
+    def _run_iteration(self, driver, test_case: TestCase):
+        """Run one test case on a worker's driver, replacing the driver if it died
+
+        Returns:
+            The (possibly new) driver to use for the next iteration
+        """
+        phase = self._phase()
+        self.stats.record_start(phase)
+        if driver is None:
+            try:
+                driver = self.runner._acquire_driver()
+            except Exception as e:
+                self.stats.record(phase, test_case, {
+                    "success": False, "duration": 0.0, "actions": [],
+                    "error": f"WebDriver initialization failed: {str(e)}"
+                })
+                return None
+
+        result = self.runner.run_test(test_case, driver=driver)
+        self.stats.record(phase, test_case, result)
+
+        try:
+            self.runner.reset_driver(driver)
+        except Exception:
+            # The session is unusable; start a fresh browser next time
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = None
+        return driver
+
+    def _closed_loop_worker(self, user_index: int) -> None:
+        """Virtual user that runs tests back to back until the run ends"""
+        rng = random.Random(user_index)
+        if self.profile.users > 1 and self.profile.ramp_up > 0:
+            # Stagger user start times evenly across the ramp-up phase
+            delay = self.profile.ramp_up * user_index / self.profile.users
+            if self._stop.wait(delay):
+                return
+
+        driver = None
+        try:
+            while not self._stop.is_set() and self._elapsed() < self.profile.duration:
+                driver = self._run_iteration(driver, self._pick_test_case(rng))
+        finally:
+            if driver:
+                driver.quit()
+
+    def _open_loop_worker(self, arrivals: queue.Queue) -> None:
+        """Worker that runs tests as the arrival scheduler releases them"""
+        driver = None
+        try:
+            while True:
+                arrival = arrivals.get()
+                if arrival is None:
+                    return
+                if self._stop.is_set():
+                    # Drain the queue without running anything after a stop
+                    continue
+                scheduled_time, test_case = arrival
+                if time.time() - scheduled_time > 1.0:
+                    self.stats.record_late_start()
+                driver = self._run_iteration(driver, test_case)
+        finally:
+            if driver:
+                driver.quit()
+
+    def _schedule_arrivals(self, arrivals: queue.Queue) -> None:
+        """Release test starts at the target rate, ramping up linearly"""
+        rng = random.Random(0)
+        next_arrival = self._start_time
+        while not self._stop.is_set():
+            now = time.time()
+            elapsed = now - self._start_time
+            if elapsed >= self.profile.duration:
+                break
+            if now >= next_arrival:
+                arrivals.put((next_arrival, self._pick_test_case(rng)))
+                self.stats.record_backlog(arrivals.qsize())
+                rate = self.profile.rate
+                if self.profile.ramp_up > 0 and elapsed < self.profile.ramp_up:
+                    rate = max(rate * elapsed / self.profile.ramp_up, rate * 0.05)
+                next_arrival += 1.0 / rate
+            else:
+                self._stop.wait(min(next_arrival - now, 0.1))
+
+    def run(self, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            progress_interval: float = 5.0) -> Dict[str, Any]:
+        """Run the load test to completion
+
+        Args:
+            on_progress: Called every progress_interval seconds with live figures
+            progress_interval: Seconds between progress callbacks
+
+        Returns:
+            Report dictionary (see LoadStats.report)
+        """
+        self._stop.clear()
+        self._start_time = time.time()
+        threads = []
+        arrivals = queue.Queue()
+
+        if self.profile.rate:
+            for _ in range(self.profile.users):
+                threads.append(threading.Thread(target=self._open_loop_worker, args=(arrivals,), daemon=True))
+        else:
+            for user_index in range(self.profile.users):
+                threads.append(threading.Thread(target=self._closed_loop_worker, args=(user_index,), daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        scheduler = None
+        if self.profile.rate:
+            scheduler = threading.Thread(target=self._schedule_arrivals, args=(arrivals,), daemon=True)
+            scheduler.start()
+
+        last_progress = time.time()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                if scheduler is not None and not scheduler.is_alive():
+                    # Arrivals are done; let workers drain the queue and exit
+                    for _ in threads:
+                        arrivals.put(None)
+                    scheduler = None
+                time.sleep(0.2)
+                if on_progress and time.time() - last_progress >= progress_interval:
+                    interval_length = time.time() - last_progress
+                    last_progress = time.time()
+                    interval = self.stats.take_interval()
+                    on_progress({
+                        "elapsed": self._elapsed(),
+                        "phase": self._phase(),
+                        "throughput": interval["completed"] / interval_length,
+                        "error_rate": interval["failed"] / interval["completed"] if interval["completed"] else 0.0,
+                        "backlog": arrivals.qsize()
+                    })
+        except KeyboardInterrupt:
+            self.stop()
+            for _ in threads:
+                arrivals.put(None)
+            for thread in threads:
+                thread.join()
+
+        return self.stats.report(self._elapsed(), self.profile.ramp_up)
@@ -0,0 +1,227 @@
+"""
+Matrix module for the UWAutoTest application
+Runs test cases across combinations of browsers, headless modes and viewports
+"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models import TestCase
+
+
+BROWSERS = ("Chrome", "Firefox", "Edge")
+
+VIEWPORT_PATTERN = re.compile(r"^\s*(\d+)\s*[xX]\s*(\d+)\s*$")
+
+
+def parse_viewport(text: str) -> Optional[Tuple[int, int]]:
+    """Parse a viewport such as '1280x800'
+
+    Args:
+        text: Viewport as WIDTHxHEIGHT, or 'max' for a maximized window
+
+    Returns:
+        (width, height), or None for a maximized window
+
+    Raises:
+        ValueError: If the text is not a valid viewport
+    """
+    if text.strip().lower() in ("", "max", "maximized"):
+        return None
+    match = VIEWPORT_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid viewport '{text}': expected WIDTHxHEIGHT, e.g. 1280x800")
+    return int(match.group(1)), int(match.group(2))
+
+
+@dataclass(frozen=True)
+class MatrixCell:
+    """One browser configuration of a matrix run"""
+    browser: str
+    headless: bool
+    viewport: Optional[Tuple[int, int]] = None
+
+    @property
+    def label(self) -> str:
+        viewport = f"{self.viewport[0]}x{self.viewport[1]}" if self.viewport else "max"
+        return f"{self.browser}/{'headless' if self.headless else 'headed'}/{viewport}"
+
+
+def build_matrix(browsers: Iterable[str], headless_modes: Iterable[bool],
+                 viewports: Iterable[Optional[Tuple[int, int]]]) -> List[MatrixCell]:
+    """Build every combination of browser, headless mode and viewport
+
+    Args:
+        browsers: Browser names
+        headless_modes: Headless settings (True, False or both)
+        viewports: Window sizes, None meaning a maximized window
+
+    Returns:
+        List of matrix cells
+    """
+    for browser in browsers:
+        if browser not in BROWSERS:
+            raise ValueError(f"Unsupported browser: {browser}")
+    return [
+        MatrixCell(browser, headless, viewport)
+        for browser in browsers
+        for headless in headless_modes
+        for viewport in viewports
+    ]
+
+
+class MatrixRunner:
+    """Runs test cases on every cell of a browser matrix with one shared worker pool
+
+    Each cell has its own TestRunner, and so its own warm standby pool when
+    enabled. Work is queued test by test across all cells, so every browser
+    makes progress at the same time. The run then takes about as long as
+    the slowest browser instead of the sum of all browsers.
+    """
+
+    def __init__(self, cells: List[MatrixCell], wait_time=10, engine="selenium", driver_path=None,
+                 trace_dir=None, baseline_dir=None, capture_performance=False):
+        """Initialize a runner per matrix cell
+
+        Args:
+            cells: Browser configurations to run on
+            wait_time: Implicit wait time in seconds
+            engine: 'selenium' or 'auto' (see TestRunner)
+            driver_path: Local driver executable, only used when a single browser is in the matrix
+            trace_dir: Directory to record a trace file per test in, or None
+            baseline_dir: Baseline store used by Assert Screenshot actions
+            capture_performance: Whether to collect page-load metrics after every navigation
+        """
+        from app.test_runner import TestRunner
+
+        single_browser = len({cell.browser for cell in cells}) == 1
+        self.cells = cells
+        self.runners = {
+            cell: TestRunner(browser=cell.browser, headless=cell.headless, wait_time=wait_time, engine=engine,
+                             driver_path=driver_path if single_browser else None, trace_dir=trace_dir,
+                             window_size=cell.viewport, baseline_dir=baseline_dir,
+                             capture_performance=capture_performance)
+            for cell in cells
+        }
+        self.metrics = None
+
+    def enable_metrics(self, metrics) -> None:
+        """Report the tests of every cell to one RunMetrics"""
+        self.metrics = metrics
+        for runner in self.runners.values():
+            runner.metrics = metrics
+
+    def enable_warm_standby(self, idle_timeout=60.0) -> None:
+        """Keep one browser ready per cell so each test starts without waiting"""
+        for runner in self.runners.values():
+            runner.enable_warm_standby(size=1, idle_timeout=idle_timeout)
+
+    def shutdown(self) -> None:
+        """Release standby browsers and write pending traces"""
+        for runner in self.runners.values():
+            runner.disable_warm_standby()
+            runner.disable_tracing()
+
+    def run_tests(self, test_cases: Iterable[TestCase],
+                  max_workers: int = 1) -> Iterator[Tuple[MatrixCell, TestCase, Dict[str, Any]]]:
+        """Run each test case on every cell
+
+        Args:
+            test_cases: Iterable (typically a generator) of TestCases to run
+            max_workers: Number of tests to run concurrently across all cells
+
+        Yields:
+            (cell, test_case, result) tuples in completion order
+        """
+        jobs = ((cell, test_case) for test_case in test_cases for cell in self.cells)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            pending = {}
+
+            def submit(count):
+                for _ in range(count):
+                    job = next(jobs, None)
+                    if job is None:
+                        return
+                    cell, test_case = job
+                    pending[executor.submit(self.runners[cell].run_test, test_case)] = job
+                if self.metrics is not None:
+                    self.metrics.set_pending(len(pending))
+
+            # Keep the pool saturated with a small backlog of queued tests
+            submit(max(1, max_workers) * 2)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cell, test_case = pending.pop(future)
+                    yield cell, test_case, future.result()
+                submit(max(1, max_workers) * 2 - len(pending))
+
+
+class MatrixReport:
+    """Collects matrix results and formats the combined pass/fail table"""
+
+    def __init__(self, cells: List[MatrixCell]):
+        self.cells = cells
+        self.test_names: List[str] = []
+        self.results: Dict[Tuple[str, MatrixCell], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, cell: MatrixCell, test_case: TestCase, result: Dict[str, Any]) -> None:
+        with self._lock:
+            if test_case.name not in self.test_names:
+                self.test_names.append(test_case.name)
+            self.results[(test_case.name, cell)] = {
+                "success": result["success"],
+                "duration": result["duration"],
+                "error": result["error"]
+            }
+
+    def cell_summary(self, cell: MatrixCell) -> Dict[str, Any]:
+        """Pass count and total duration of one cell"""
+        results = [self.results[(name, cell)] for name in self.test_names if (name, cell) in self.results]
+        return {
+            "passed": sum(1 for result in results if result["success"]),
+            "total": len(results),
+            "duration": sum(result["duration"] for result in results)
+        }
+
+    @property
+    def all_passed(self) -> bool:
+        return all(result["success"] for result in self.results.values())
+
+    def format_table(self) -> List[str]:
+        """Format the results as a table with a row per test and a column per cell"""
+        name_width = max([len("Passed")] + [len(name) for name in self.test_names])
+        widths = [max(len(cell.label), 12) for cell in self.cells]
+        lines = [f"{'Test':<{name_width}}  " + "  ".join(f"{cell.label:<{width}}" for cell, width in zip(self.cells, widths))]
+        for name in self.test_names:
+            row = []
+            for cell, width in zip(self.cells, widths):
+                result = self.results.get((name, cell))
+                text = "-" if result is None else f"{'PASS' if result['success'] else 'FAIL'} {result['duration']:.1f}s"
+                row.append(f"{text:<{width}}")
+            lines.append((f"{name:<{name_width}}  " + "  ".join(row)).rstrip())
+        totals = []
+        for cell, width in zip(self.cells, widths):
+            summary = self.cell_summary(cell)
+            totals.append(f"{summary['passed']}/{summary['total']} {summary['duration']:.1f}s".ljust(width))
+        lines.append((f"{'Passed':<{name_width}}  " + "  ".join(totals)).rstrip())
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report as a JSON-serializable dictionary"""
+        return {
+            "cells": [
+                {"label": cell.label, "browser": cell.browser, "headless": cell.headless,
+                 "viewport": list(cell.viewport) if cell.viewport else None, **self.cell_summary(cell)}
+                for cell in self.cells
+            ],
+            "tests": [
+                {"name": name, "results": {
+                    cell.label: self.results[(name, cell)] for cell in self.cells if (name, cell) in self.results
+                }}
+                for name in self.test_names
+            ]
+        }
@@ -0,0 +1,421 @@
+"""
+Metrics module for the UWAutoTest application
+Keeps live run metrics and exposes them in the Prometheus text format
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# Bucket upper bounds in seconds, from a fast action to a long test
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Minimum seconds between two reads of the process tree, which walks /proc
+RSS_SAMPLE_INTERVAL = 1.0
+
+
+def process_tree_rss(root_pid: int) -> int:
+    """Sum the resident memory of a process and all its descendants (Linux only)
+
+    Args:
+        root_pid: PID at the top of the process tree
+
+    Returns:
+        Resident set size in bytes, or 0 if /proc is unavailable
+    """
+    children = {}
+    rss = {}
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except (AttributeError, ValueError, OSError):
+        return 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as f:
+                rss[pid] = int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(int(fields[1]), []).append(pid)
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Format label pairs as {name="value",...}"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """Base of the metric types: a name, help text and labelled values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{format_labels(self.labels, key)} {format_value(value)}")
+        return lines
+
+    def snapshot(self) -> Any:
+        with self._lock:
+            if not self.labels:
+                return self._values.get((), 0)
+            return {",".join(key): value for key, value in sorted(self._values.items())}
+
+
+class Counter(Metric):
+    """A value that only goes up, e.g. the number of finished tests"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or is read from a callback when rendered"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labels)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _refresh(self) -> None:
+        if self.callback is not None:
+            self.set(self.callback())
+
+    def render(self) -> List[str]:
+        self._refresh()
+        return super().render()
+
+    def snapshot(self) -> Any:
+        self._refresh()
+        return super().snapshot()
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(series["counts"]), series["sum"], series["count"])
+                     for key, series in sorted(self._values.items())]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.labels + ("le",), key + (format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimate a quantile from the buckets (upper bound of the bucket holding it)"""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            if not series or not series["count"]:
+                return 0.0
+            rank = q * series["count"]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series["counts"]):
+                cumulative += bucket_count
+                if cumulative >= rank:
+                    return bound
+        return float("inf")
+
+    def snapshot(self) -> Any:
+        with self._lock:
+            items = sorted(self._values.items())
+        summary = {}
+        for key, series in items:
+            labels = {name: value for name, value in zip(self.labels, key)}
+            summary[",".join(key) or "all"] = {
+                "count": series["count"],
+                "sum": series["sum"],
+                "mean": series["sum"] / series["count"] if series["count"] else 0.0,
+                "p50": self.quantile(0.5, **labels),
+                "p95": self.quantile(0.95, **labels),
+            }
+        return summary
+
+
+class RunMetrics:
+    """Live counters and histograms of test runs
+
+    Runners report into an instance through their `metrics` attribute; the
+    values can be scraped while a run is going (see MetricsServer) and
+    saved with write_snapshot() when it ends.
+    """
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.tests_started = Counter("autotest_tests_started_total", "Tests started")
+        self.tests_finished = Counter("autotest_tests_finished_total", "Tests finished, by outcome", ("outcome",))
+        self.test_duration = Histogram("autotest_test_duration_seconds", "Duration of finished tests")
+        self.action_duration = Histogram("autotest_action_duration_seconds", "Duration of executed actions",
+                                         ("action", "outcome"))
+        self.driver_start = Histogram("autotest_driver_start_seconds",
+                                      "Time to get a browser session for a test", ("source",))
+        self.active_tests = Gauge("autotest_active_tests", "Tests currently running")
+        self.queued_tests = Gauge("autotest_queued_tests", "Tests handed to the worker pool but not started yet",
+                                  callback=self._queued)
+        self.browser_rss = Gauge("autotest_browser_rss_bytes",
+                                 "Resident memory of the drivers and browsers started by this process",
+                                 callback=self._browser_rss)
+        self.metrics: List[Metric] = [
+            self.tests_started, self.tests_finished, self.test_duration, self.action_duration,
+            self.driver_start, self.active_tests, self.queued_tests, self.browser_rss
+        ]
+        self._pending = 0
+        self._rss = (0.0, 0)
+
+    def _queued(self) -> float:
+        return max(0, self._pending - self.active_tests.value())
+
+    def _browser_rss(self) -> float:
+        sampled_at, rss = self._rss
+        if time.time() - sampled_at >= RSS_SAMPLE_INTERVAL:
+            # Drivers and browsers are child processes; leave out our own memory
+            rss = max(0, process_tree_rss(os.getpid()) - self._own_rss())
+            self._rss = (time.time(), rss)
+        return rss
+
+    @staticmethod
+    def _own_rss() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, AttributeError, ValueError):
+            return 0
+
+    def set_pending(self, count: int) -> None:
+        """Report how many tests a worker pool holds, running or waiting"""
+        self._pending = count
+
+    def test_started(self) -> None:
+        self.tests_started.inc()
+        self.active_tests.inc()
+
+    def test_finished(self, result: Optional[Dict[str, Any]]) -> None:
+        """Record the outcome, duration and action timings of a finished test"""
+        self.active_tests.dec()
+        if result is None:
+            # The runner raised instead of returning a result
+            self.tests_finished.inc(outcome="error")
+            return
+        self.count_outcome(result)
+        self.test_duration.observe(result.get("duration", 0))
+        for action in result.get("actions", []):
+            self.action_duration.observe(action["duration"], action=action["action_type"],
+                                         outcome="ok" if action["success"] else "failed")
+
+    def count_outcome(self, result: Dict[str, Any]) -> None:
+        """Count the outcome of a test, including ones skipped without being started"""
+        if result["success"]:
+            outcome = "passed"
+        elif result.get("skipped"):
+            outcome = "skipped"
+        elif result.get("timed_out"):
+            outcome = "timed_out"
+        else:
+            outcome = "failed"
+        self.tests_finished.inc(outcome=outcome)
+
+    def driver_started(self, seconds: float, source: str) -> None:
+        """Record the time a test waited for its browser session
+
+        Args:
+            seconds: Time taken
+            source: 'new' for a launched browser, 'warm' for a standby one,
+                'context' for a browser context in a shared browser
+        """
+        self.driver_start.observe(seconds, source=source)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dictionary"""
+        elapsed = time.time() - self.start_time
+        finished = sum(self.tests_finished.snapshot().values())
+        snapshot = {"elapsed": elapsed, "throughput": finished / elapsed if elapsed > 0 else 0.0}
+        for metric in self.metrics:
+            snapshot[metric.name] = metric.snapshot()
+        return snapshot
+
+    def summary_lines(self) -> List[str]:
+        """A few lines describing the run, for the end of the CLI or GUI output"""
+        snapshot = self.snapshot()
+        outcomes = ", ".join(f"{count:.0f} {outcome}" for outcome, count in
+                             snapshot["autotest_tests_finished_total"].items()) or "none"
+        lines = [
+            f"Tests finished: {outcomes} ({snapshot['throughput'] * 60:.1f}/min)",
+            f"Browser memory: {snapshot['autotest_browser_rss_bytes'] / 1024 / 1024:.0f} MB",
+        ]
+        for source, stats in snapshot["autotest_driver_start_seconds"].items():
+            lines.append(f"Browser start ({source}): {stats['count']} x, mean {stats['mean']:.2f}s")
+        slowest = sorted(snapshot["autotest_action_duration_seconds"].items(),
+                         key=lambda item: item[1]["p95"], reverse=True)[:5]
+        for key, stats in slowest:
+            lines.append(f"Action {key}: {stats['count']} x, p50 <= {stats['p50']}s, p95 <= {stats['p95']}s")
+        return lines
+
+    def write_snapshot(self, path: str) -> None:
+        """Save the metrics: JSON for a .json path, Prometheus text otherwise
+
+        A .prom file can be picked up by the node_exporter textfile collector.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.render())
+        os.replace(temp_path, path)
+
+
+class MetricsServer:
+    """Serves run metrics over HTTP on a background thread
+
+    GET /metrics returns the Prometheus text format for scraping, and
+    GET /metrics.json the same values as JSON.
+    """
+
+    def __init__(self, metrics: RunMetrics, port: int = 9464, host: str = "127.0.0.1"):
+        """Initialize the server
+
+        Args:
+            metrics: Metrics to serve
+            port: TCP port (0 picks a free one)
+            host: Interface to listen on; local only by default
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self) -> None:
+        """Start listening; raises OSError if the port is taken"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # Read on every request, so a long-lived server can move on to the next run's metrics
+                metrics = server.metrics
+                path = self.path.split("?", 1)[0]
+                if path in ("/", "/metrics"):
+                    body, content_type = metrics.render().encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+                elif path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.snapshot()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
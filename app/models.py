@@ -5,10 +5,16 @@ from enum import Enum
 from dataclasses import dataclass, field
 from typing import List, Dict, Any
 import json
+import re
 
 
 class ActionType(Enum):
-    """Types of actions that can be performed in a test case"""
+    """Types of actions that can be performed in a test case
+    
+    Plugins add custom types with ActionType.extend (see app.actions). These
+    behave like members for lookup, comparison and serialization, but are
+    not listed when iterating over ActionType.
+    """
     NAVIGATE = "Navigate"
     CLICK = "Click"
     INPUT = "Input"
@@ -19,6 +25,35 @@ class ActionType(Enum):
     ASSERT_ELEMENT = "Assert Element"
     SCREENSHOT = "Screenshot"
     EXECUTE_SCRIPT = "Execute Script"
+    ASSERT_LOAD_TIME = "Assert Load Time"
+    ASSERT_MAX_REQUESTS = "Assert Max Requests"
+    ASSERT_SCREENSHOT = "Assert Screenshot"
+    CALL_HELPER = "Call Helper"
+    
+    @classmethod
+    def _missing_(cls, value):
+        # Custom types are registered by plugins, loaded the first time an unknown type is seen
+        from app.actions import load_plugins
+        load_plugins()
+        return cls._value2member_map_.get(value)
+    
+    @classmethod
+    def extend(cls, value: str) -> 'ActionType':
+        """Get or add a custom action type
+        
+        Args:
+            value: Name of the action type, as stored in test files
+            
+        Returns:
+            The ActionType for the name
+        """
+        member = cls._value2member_map_.get(value)
+        if member is None:
+            member = object.__new__(cls)
+            member._value_ = value
+            member._name_ = re.sub(r"\W+", "_", value).strip("_").upper()
+            cls._value2member_map_[value] = member
+        return member
 
 
 @dataclass
@@ -52,21 +87,26 @@ class TestCase:
     name: str
     base_url: str
     actions: List[TestAction] = field(default_factory=list)
+    data_source: str = ""  # Optional CSV/JSONL file bound to ${var} placeholders
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
-        return {
+        data = {
             "name": self.name,
             "base_url": self.base_url,
             "actions": [action.to_dict() for action in self.actions]
         }
+        if self.data_source:
+            data["data_source"] = self.data_source
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'TestCase':
         """Create TestCase from dictionary"""
         test_case = cls(
             name=data["name"],
-            base_url=data["base_url"]
+            base_url=data["base_url"],
+            data_source=data.get("data_source", "")
         )
         
         test_case.actions = [TestAction.from_dict(action) for action in data["actions"]]
@@ -0,0 +1,227 @@
+"""
+Optimizer module for the UWAutoTest application
+Rewrites compiled test plans into equivalent plans with fewer browser round trips
+"""
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from app.compiler import (CompiledAction, CompiledPlan, PlanValidationError, PERFORMANCE_ASSERTIONS,
+                          compile_test_case)
+from app.models import TestCase, TestAction, ActionType
+from app.scheduler import ACTION_ESTIMATES, DEFAULT_ACTION_ESTIMATE
+
+
+# Actions that only read the page, so the page is the same before and after them
+READ_ONLY_ACTIONS = {
+    ActionType.WAIT,
+    ActionType.ASSERT_TEXT,
+    ActionType.ASSERT_ELEMENT,
+    ActionType.SCREENSHOT,
+    ActionType.ASSERT_SCREENSHOT,
+    ActionType.ASSERT_LOAD_TIME,
+    ActionType.ASSERT_MAX_REQUESTS,
+}
+
+# Actions that fail on their own when their element does not appear, and so
+# make an Assert Element (true) on the same selector right before them redundant
+ELEMENT_INTERACTIONS = {
+    ActionType.CLICK,
+    ActionType.INPUT,
+    ActionType.SELECT,
+    ActionType.SUBMIT,
+    ActionType.ASSERT_TEXT,
+}
+
+
+@dataclass
+class Rewrite:
+    """One change the optimizer made to a plan"""
+    rule: str
+    index: int                  # Action that was removed or merged away
+    action_type: ActionType
+    reason: str
+    saving: float               # Estimated seconds saved per run
+
+    def __str__(self) -> str:
+        return f"action #{self.index + 1} ({self.action_type.value}): {self.reason} (~{self.saving:.1f}s)"
+
+
+def action_cost(step: CompiledAction) -> float:
+    """Estimated time of an action, excluding a fixed Wait's delay"""
+    if step.action_type == ActionType.WAIT and step.wait_seconds is not None:
+        # A merged delay is still slept in full; only the step itself is saved
+        return 0.0
+    return ACTION_ESTIMATES.get(step.action_type, DEFAULT_ACTION_ESTIMATE)
+
+
+def _drop_redundant_navigations(steps: List[CompiledAction], rewrites: List[Rewrite]) -> List[CompiledAction]:
+    """Drop a Navigate to the URL the page is already on
+
+    The page is known to be on a URL after a Navigate to it, as long as only
+    read-only actions followed. A Navigate whose page load is checked by a
+    following performance assertion is kept, since a reload loads the page
+    differently.
+    """
+    kept = []
+    current_url = None
+    for position, step in enumerate(steps):
+        if step.action_type == ActionType.NAVIGATE:
+            checked = False
+            for later in steps[position + 1:]:
+                if later.action_type in PERFORMANCE_ASSERTIONS:
+                    checked = True
+                    break
+                if later.action_type not in READ_ONLY_ACTIONS:
+                    break
+            if step.url == current_url and not checked:
+                rewrites.append(Rewrite("redundant-navigation", step.index, step.action_type,
+                                        f"page is already on {step.url}", action_cost(step)))
+                continue
+            current_url = step.url
+        elif step.action_type not in READ_ONLY_ACTIONS:
+            # Clicks, typing and scripts can change the page or leave it
+            current_url = None
+        kept.append(step)
+    return kept
+
+
+def _merge_waits(steps: List[CompiledAction], rewrites: List[Rewrite]) -> List[CompiledAction]:
+    """Merge back-to-back fixed Waits, drop zero-second Waits and repeated element Waits"""
+    kept: List[CompiledAction] = []
+    for step in steps:
+        previous = kept[-1] if kept else None
+        if step.action_type == ActionType.WAIT and step.wait_seconds == 0:
+            rewrites.append(Rewrite("merged-waits", step.index, step.action_type, "waits 0 seconds", 0.0))
+            continue
+        if (step.action_type == ActionType.WAIT and previous is not None
+                and previous.action_type == ActionType.WAIT):
+            if step.wait_seconds is not None and previous.wait_seconds is not None:
+                seconds = previous.wait_seconds + step.wait_seconds
+                kept[-1] = replace(previous, wait_seconds=seconds,
+                                   action=TestAction(ActionType.WAIT, previous.action.target, str(seconds)))
+                rewrites.append(Rewrite("merged-waits", step.index, step.action_type,
+                                        f"merged into the wait of action #{previous.index + 1}", action_cost(step)))
+                continue
+            if step.wait_seconds is None and step.locator is not None and step.locator == previous.locator:
+                rewrites.append(Rewrite("merged-waits", step.index, step.action_type,
+                                        f"same element as the wait of action #{previous.index + 1}",
+                                        action_cost(step)))
+                continue
+        kept.append(step)
+    return kept
+
+
+def _drop_overwritten_inputs(steps: List[CompiledAction], rewrites: List[Rewrite]) -> List[CompiledAction]:
+    """Drop an Input that the next action replaces by typing into the same field"""
+    kept = []
+    for position, step in enumerate(steps):
+        following = steps[position + 1] if position + 1 < len(steps) else None
+        if (step.action_type == ActionType.INPUT and following is not None
+                and following.action_type == ActionType.INPUT and following.locator == step.locator):
+            rewrites.append(Rewrite("overwritten-input", step.index, step.action_type,
+                                    f"action #{following.index + 1} clears the field and types again",
+                                    action_cost(step)))
+            continue
+        kept.append(step)
+    return kept
+
+
+def _fold_existence_checks(steps: List[CompiledAction], rewrites: List[Rewrite]) -> List[CompiledAction]:
+    """Fold an Assert Element (true) into the next action when it uses the same element
+
+    The following action waits for the element itself and fails if it never
+    appears, so the separate check only adds a lookup. A failure is then
+    reported on the following action instead of the assertion.
+    """
+    kept = []
+    for position, step in enumerate(steps):
+        following = steps[position + 1] if position + 1 < len(steps) else None
+        if (step.action_type == ActionType.ASSERT_ELEMENT and step.expect_exists and following is not None
+                and following.locator == step.locator
+                and (following.action_type in ELEMENT_INTERACTIONS
+                     or (following.action_type == ActionType.ASSERT_ELEMENT and following.expect_exists))):
+            rewrites.append(Rewrite("folded-assertion", step.index, step.action_type,
+                                    f"action #{following.index + 1} ({following.action_type.value}) "
+                                    f"fails anyway if the element is missing", action_cost(step)))
+            continue
+        kept.append(step)
+    return kept
+
+
+# Rules in the order they are applied; later rules see the result of earlier ones
+RULES = (
+    _merge_waits,
+    _drop_overwritten_inputs,
+    _fold_existence_checks,
+    _drop_redundant_navigations,
+)
+
+
+def optimize_plan(plan: CompiledPlan) -> Tuple[CompiledPlan, List[Rewrite]]:
+    """Rewrite a plan into an equivalent plan without redundant steps
+
+    Kept steps keep their original index, so errors and traces still
+    refer to the action numbers of the test case as written.
+
+    Args:
+        plan: A compiled plan
+
+    Returns:
+        (optimized plan, list of rewrites made)
+    """
+    rewrites: List[Rewrite] = []
+    steps = list(plan.steps)
+    for rule in RULES:
+        steps = rule(steps, rewrites)
+    rewrites.sort(key=lambda rewrite: rewrite.index)
+    return CompiledPlan(test_case=plan.test_case, steps=steps), rewrites
+
+
+@dataclass
+class TestOptimization:
+    """Dry-run result of the optimizer for one test case"""
+    name: str
+    actions_before: int
+    actions_after: int
+    rewrites: List[Rewrite]
+    error: Optional[str] = None
+
+    @property
+    def saving(self) -> float:
+        return sum(rewrite.saving for rewrite in self.rewrites)
+
+
+def dry_run(test_case: TestCase) -> TestOptimization:
+    """Report what the optimizer would change in a test case, without running it"""
+    try:
+        plan = compile_test_case(test_case)
+    except PlanValidationError:
+        return TestOptimization(test_case.name, len(test_case.actions), len(test_case.actions), [],
+                                error="invalid test case")
+    optimized, rewrites = optimize_plan(plan)
+    return TestOptimization(test_case.name, len(plan.steps), len(optimized.steps), rewrites)
+
+
+def format_optimization_report(optimizations: List[TestOptimization]) -> List[str]:
+    """Format a dry-run report with the estimated saving per test and for the whole suite"""
+    lines = []
+    for optimization in optimizations:
+        if optimization.error:
+            lines.append(f"=== {optimization.name}: not optimized ({optimization.error}) ===")
+            continue
+        if not optimization.rewrites:
+            continue
+        lines.append(f"=== {optimization.name}: {optimization.actions_before} -> {optimization.actions_after} "
+                     f"actions, ~{optimization.saving:.1f}s saved ===")
+        lines.extend(f"  {rewrite}" for rewrite in optimization.rewrites)
+        lines.append("")
+    by_rule: Dict[str, int] = {}
+    for optimization in optimizations:
+        for rewrite in optimization.rewrites:
+            by_rule[rewrite.rule] = by_rule.get(rewrite.rule, 0) + 1
+    changed = sum(1 for optimization in optimizations if optimization.rewrites)
+    lines.append(f"{changed} of {len(optimizations)} test(s) can be optimized, "
+                 f"~{sum(optimization.saving for optimization in optimizations):.1f}s saved per run (estimated)")
+    if by_rule:
+        lines.append("  " + ", ".join(f"{rule}: {count}" for rule, count in sorted(by_rule.items())))
+    return lines
@@ -0,0 +1,356 @@
+"""
+Page Helpers module for the UWAutoTest application
+A JavaScript helper library for sessions that call helpers, and scripts cached in the page by hash
+"""
+import hashlib
+import json
+import re
+import threading
+import weakref
+from typing import Any, List, Tuple
+
+
+# Browsers that can register scripts for every new document over the DevTools protocol
+CDP_BROWSERS = ("chrome", "msedge", "MicrosoftEdge")
+
+# Seconds asynchronous helpers such as waitForIdle may run
+HELPER_SCRIPT_TIMEOUT = 60
+
+# Helper name -> (minimum, maximum) number of arguments, counting the selector
+HELPER_ARGUMENTS = {
+    "waitForIdle": (0, 2),
+    "waitFor": (1, 2),
+    "exists": (1, 1),
+    "count": (1, 1),
+    "text": (1, 1),
+    "click": (1, 1),
+    "setValue": (2, 2),
+    "assertText": (2, 3),
+    "assertCount": (2, 2),
+    "table": (1, 1),
+    "assertTableCell": (4, 4),
+}
+
+HELPER_CALL_PATTERN = re.compile(r"^\s*([A-Za-z_]\w*)\s*(?:\((.*)\))?\s*$", re.DOTALL)
+
+# Installs window.__uwat in the page. Safe to run more than once per document.
+HELPER_LIBRARY = r"""
+(function () {
+  if (window.__uwat) return;
+  var lastActivity = Date.now();
+  var pending = 0;
+  function touch() { lastActivity = Date.now(); }
+  try {
+    new MutationObserver(touch).observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+  } catch (e) {}
+  try {
+    new PerformanceObserver(touch).observe({type: "resource"});
+  } catch (e) {}
+  if (window.fetch) {
+    var originalFetch = window.fetch;
+    window.fetch = function () {
+      pending++; touch();
+      return originalFetch.apply(this, arguments).finally(function () { pending--; touch(); });
+    };
+  }
+  if (window.XMLHttpRequest) {
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+      pending++; touch();
+      this.addEventListener("loadend", function () { pending--; touch(); });
+      return originalSend.apply(this, arguments);
+    };
+  }
+
+  // Like querySelector, but also searches open shadow roots
+  function deepQuery(selector, root) {
+    root = root || document;
+    var match = root.querySelector(selector);
+    if (match) return match;
+    var all = root.querySelectorAll("*");
+    for (var i = 0; i < all.length; i++) {
+      if (all[i].shadowRoot) {
+        match = deepQuery(selector, all[i].shadowRoot);
+        if (match) return match;
+      }
+    }
+    return null;
+  }
+  function deepQueryAll(selector, root) {
+    root = root || document;
+    var found = Array.prototype.slice.call(root.querySelectorAll(selector));
+    var all = root.querySelectorAll("*");
+    for (var i = 0; i < all.length; i++) {
+      if (all[i].shadowRoot) found = found.concat(deepQueryAll(selector, all[i].shadowRoot));
+    }
+    return found;
+  }
+  function need(selector) {
+    var element = deepQuery(selector);
+    if (!element) throw new Error("No element matches '" + selector + "'");
+    return element;
+  }
+  function normalize(text) { return (text || "").replace(/\s+/g, " ").trim(); }
+  function poll(check, timeoutMs, describe) {
+    var start = Date.now();
+    return new Promise(function (resolve, reject) {
+      (function next() {
+        var value = check();
+        if (value) { resolve(value); return; }
+        if (Date.now() - start > timeoutMs) { reject(new Error(describe())); return; }
+        setTimeout(next, 50);
+      })();
+    });
+  }
+  function rows(table) {
+    var rowElements = table.rows || table.querySelectorAll("tr, [role=row]");
+    return Array.prototype.map.call(rowElements, function (row) {
+      var cells = row.cells || row.querySelectorAll("th, td, [role=cell], [role=gridcell], [role=columnheader]");
+      return Array.prototype.map.call(cells, function (cell) { return normalize(cell.textContent); });
+    });
+  }
+
+  var helpers = {
+    waitForIdle: function (quietMs, timeoutMs) {
+      quietMs = quietMs == null ? 500 : quietMs;
+      timeoutMs = timeoutMs == null ? 10000 : timeoutMs;
+      return poll(function () {
+        return document.readyState === "complete" && pending === 0 && Date.now() - lastActivity >= quietMs;
+      }, timeoutMs, function () {
+        return "Page did not become idle within " + timeoutMs + "ms (" + pending + " request(s) pending)";
+      });
+    },
+    waitFor: function (selector, timeoutMs) {
+      return poll(function () { return deepQuery(selector); }, timeoutMs == null ? 10000 : timeoutMs,
+                  function () { return "No element matched '" + selector + "' within " + timeoutMs + "ms"; });
+    },
+    exists: function (selector) { return deepQuery(selector) !== null; },
+    count: function (selector) { return deepQueryAll(selector).length; },
+    text: function (selector) { return normalize(need(selector).textContent); },
+    click: function (selector) {
+      var element = need(selector);
+      element.scrollIntoView({block: "center"});
+      element.click();
+      return true;
+    },
+    setValue: function (selector, value) {
+      var element = need(selector);
+      // The prototype's setter, so frameworks that track the value see the change
+      var descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(element), "value");
+      element.focus();
+      if (descriptor && descriptor.set) descriptor.set.call(element, value); else element.value = value;
+      element.dispatchEvent(new Event("input", {bubbles: true}));
+      element.dispatchEvent(new Event("change", {bubbles: true}));
+      return true;
+    },
+    assertText: function (selector, pattern, flags) {
+      var text = normalize(need(selector).textContent);
+      if (!new RegExp(pattern, flags || "").test(text)) {
+        throw new Error("Text of '" + selector + "' does not match /" + pattern + "/: '" + text + "'");
+      }
+      return text;
+    },
+    assertCount: function (selector, expected) {
+      var count = deepQueryAll(selector).length;
+      if (count !== expected) throw new Error("Expected " + expected + " element(s) matching '" + selector + "', found " + count);
+      return count;
+    },
+    table: function (selector) { return rows(need(selector)); },
+    assertTableCell: function (selector, row, column, expected) {
+      var table = rows(need(selector));
+      var columnIndex = typeof column === "number" ? column : (table[0] || []).indexOf(column);
+      if (columnIndex < 0) throw new Error("Table '" + selector + "' has no column '" + column + "'");
+      var rowIndex = row;
+      if (typeof row !== "number") {
+        // A row is named by the text of its first cell
+        rowIndex = table.findIndex(function (cells) { return cells[0] === row; });
+        if (rowIndex < 0) throw new Error("Table '" + selector + "' has no row '" + row + "'");
+      }
+      var actual = (table[rowIndex] || [])[columnIndex];
+      if (actual !== String(expected)) {
+        throw new Error("Cell (" + row + ", " + column + ") of '" + selector + "' is '" + actual + "', expected '" + expected + "'");
+      }
+      return actual;
+    }
+  };
+
+  window.__uwat = {
+    helpers: helpers,
+    scripts: window.__uwat_scripts || {},
+    invoke: function (name, args) {
+      try {
+        return Promise.resolve(helpers[name].apply(null, args));
+      } catch (e) {
+        return Promise.reject(e);
+      }
+    }
+  };
+  window.__uwat_scripts = window.__uwat.scripts;
+})();
+"""
+
+# Calls a helper; the last argument is WebDriver's async callback
+INVOKE_HELPER = """
+var done = arguments[arguments.length - 1];
+if (!window.__uwat) { done({missing: true}); return; }
+window.__uwat.invoke(arguments[0], arguments[1]).then(
+  function (value) { done({value: value}); },
+  function (error) { done({error: String(error && error.message || error)}); });
+"""
+
+# Runs a cached script by hash, with the arguments an Execute Script action passes
+RUN_SCRIPT = """
+var scripts = window.__uwat_scripts || {};
+var script = scripts[arguments[0]];
+if (!script) return {missing: true};
+return {value: script.apply(window, arguments[1])};
+"""
+
+
+def parse_helper_call(value: str, selector: str = "") -> Tuple[str, List[Any]]:
+    """Parse the value of a Call Helper action, e.g. 'assertText("Total: \\\\d+")'
+
+    Args:
+        value: Helper name, optionally followed by JSON arguments in parentheses
+        selector: Target of the action; passed as the first argument when given
+
+    Returns:
+        (helper name, arguments)
+
+    Raises:
+        ValueError: If the helper is unknown or the arguments are invalid
+    """
+    match = HELPER_CALL_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Expected a helper call such as waitForIdle(500), got '{value}'")
+    name, arguments = match.group(1), match.group(2)
+    if name not in HELPER_ARGUMENTS:
+        raise ValueError(f"Unknown page helper '{name}'; available: {', '.join(sorted(HELPER_ARGUMENTS))}")
+    try:
+        args = json.loads(f"[{arguments}]") if arguments and arguments.strip() else []
+    except ValueError as e:
+        raise ValueError(f"Arguments of {name} must be JSON values separated by commas: {e}")
+    if selector:
+        args.insert(0, selector)
+    minimum, maximum = HELPER_ARGUMENTS[name]
+    if not minimum <= len(args) <= maximum:
+        expected = str(minimum) if minimum == maximum else f"{minimum} to {maximum}"
+        raise ValueError(f"{name} takes {expected} argument(s) including the target selector, got {len(args)}")
+    return name, args
+
+
+def script_hash(source: str) -> str:
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+
+def script_definition(source: str) -> str:
+    """JavaScript that stores a script as a function under its hash"""
+    return (f"(window.__uwat_scripts = window.__uwat_scripts || {{}})"
+            f"[{json.dumps(script_hash(source))}] = function () {{\n{source}\n}};")
+
+
+class PageHelperError(AssertionError):
+    """A page helper failed, e.g. an assertion helper did not match"""
+
+
+class PageHelpers:
+    """The helper library and cached scripts of one WebDriver session
+
+    The library is only installed in sessions that call a helper. On Chrome
+    and Edge it is then registered once with
+    Page.addScriptToEvaluateOnNewDocument, so each later document has it
+    before its own scripts run; other browsers get it on the first call on
+    each document.
+
+    Execute Script bodies do not need the library. A script is sent in full
+    the first time the session runs it, which also stores it in the page
+    under its hash. Later runs on the same document only send the hash.
+    Actions that may load a new document call document_changed(), so the
+    first run on the new document defines the script again in the same
+    round trip instead of first asking for it by hash.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.use_cdp = hasattr(driver, "execute_cdp_cmd") and \
+            driver.capabilities.get("browserName") in CDP_BROWSERS
+        self.defined = set()
+        self._prepared = False
+
+    def _prepare(self) -> None:
+        """Allow slow helpers to finish and register the library for new documents"""
+        if self._prepared:
+            return
+        self._prepared = True
+        self.driver.set_script_timeout(HELPER_SCRIPT_TIMEOUT)
+        if self.use_cdp:
+            try:
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HELPER_LIBRARY})
+            except Exception:
+                # Sessions attached to another target may not allow it; fall back to per-document injection
+                self.use_cdp = False
+
+    def document_changed(self) -> None:
+        """Forget which scripts the page has, since a new document may have replaced it"""
+        self.defined.clear()
+
+    def call(self, name: str, args: List[Any]) -> Any:
+        """Call a helper in the current document
+
+        Returns:
+            The helper's return value
+
+        Raises:
+            PageHelperError: If the helper threw, e.g. a failed assertion
+        """
+        self._prepare()
+        reply = self.driver.execute_async_script(INVOKE_HELPER, name, args)
+        if reply.get("missing"):
+            # A document loaded before the library was registered, or a browser without CDP
+            self.driver.execute_script(HELPER_LIBRARY)
+            reply = self.driver.execute_async_script(INVOKE_HELPER, name, args)
+        if "error" in reply:
+            raise PageHelperError(f"{name}: {reply['error']}")
+        return reply.get("value")
+
+    def run_script(self, source: str, args: List[Any]) -> Any:
+        """Run an Execute Script body, sending the source only when the page lacks it
+
+        Args:
+            source: JavaScript function body, which may use arguments[0]
+            args: Arguments, e.g. the target element
+
+        Returns:
+            The script's return value
+        """
+        digest = script_hash(source)
+        if digest in self.defined:
+            reply = self.driver.execute_script(RUN_SCRIPT, digest, args)
+            if not reply.get("missing"):
+                return reply.get("value")
+        # First run on this document: define and run in one round trip
+        self.defined.add(digest)
+        reply = self.driver.execute_script(script_definition(source) + RUN_SCRIPT, digest, args)
+        return reply.get("value")
+
+
+class PageHelperRegistry:
+    """PageHelpers per WebDriver session, dropped when the session object is"""
+
+    def __init__(self):
+        self._helpers = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, driver) -> PageHelpers:
+        with self._lock:
+            helpers = self._helpers.get(driver)
+            if helpers is None:
+                helpers = self._helpers[driver] = PageHelpers(driver)
+            return helpers
+
+    def document_changed(self, driver) -> None:
+        """Tell the helpers of a session, if it has any, that the document may have changed"""
+        with self._lock:
+            helpers = self._helpers.get(driver)
+        if helpers is not None:
+            helpers.document_changed()
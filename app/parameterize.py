@@ -0,0 +1,134 @@
+"""
+Parameterization module for the UWAutoTest application
+Expands data-driven test cases lazily from CSV/JSONL data sources
+"""
+import csv
+import json
+import os
+import re
+from typing import Dict, Iterator, Optional
+
+from app.models import TestCase, TestAction
+
+
+# Matches ${name} placeholders in action targets, values and the base URL
+PLACEHOLDER_PATTERN = re.compile(r"\$\{(\w+)\}")
+
+
+def is_parameterized(test_case: TestCase) -> bool:
+    """Check whether a test case is bound to a data source
+
+    Args:
+        test_case: The TestCase to check
+
+    Returns:
+        True if the test case should be expanded per data row
+    """
+    return bool(test_case.data_source)
+
+
+def resolve_data_source(test_case: TestCase, base_dir: Optional[str] = None) -> str:
+    """Resolve the data source path of a test case
+
+    Args:
+        test_case: The parameterized TestCase
+        base_dir: Directory that relative data source paths are relative to
+
+    Returns:
+        Path to the data source file
+    """
+    path = os.path.expanduser(test_case.data_source)
+    if base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    return path
+
+
+def iter_rows(file_path: str) -> Iterator[Dict[str, str]]:
+    """Stream rows from a CSV or JSONL data source one at a time
+
+    Args:
+        file_path: Path to a .csv or .jsonl file
+
+    Yields:
+        One dictionary of parameter values per row
+    """
+    if file_path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError(f"{file_path}:{line_number}: expected a JSON object per line")
+                yield {key: "" if value is None else str(value) for key, value in row.items()}
+    else:
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield {key: value or "" for key, value in row.items() if key is not None}
+
+
+def substitute(text: str, row: Dict[str, str]) -> str:
+    """Replace ${name} placeholders in a string with row values
+
+    Args:
+        text: String that may contain placeholders
+        row: Parameter values for the current row
+
+    Returns:
+        The string with all placeholders replaced
+    """
+    def replace(match):
+        name = match.group(1)
+        if name not in row:
+            raise ValueError(f"No value for parameter '${{{name}}}' in data row")
+        return row[name]
+
+    return PLACEHOLDER_PATTERN.sub(replace, text)
+
+
+def bind(test_case: TestCase, row: Dict[str, str], row_index: int) -> TestCase:
+    """Create a concrete test case from a parameterized one and a data row
+
+    Args:
+        test_case: The parameterized TestCase
+        row: Parameter values for this row
+        row_index: Zero-based index of the row in the data source
+
+    Returns:
+        A new TestCase with placeholders substituted
+    """
+    return TestCase(
+        name=f"{test_case.name}[{row_index + 1}]",
+        base_url=substitute(test_case.base_url, row),
+        actions=[
+            TestAction(
+                action_type=action.action_type,
+                target=substitute(action.target, row),
+                value=substitute(action.value, row)
+            )
+            for action in test_case.actions
+        ]
+    )
+
+
+def expand_test_case(test_case: TestCase, base_dir: Optional[str] = None) -> Iterator[TestCase]:
+    """Lazily expand a test case into one concrete test case per data row
+
+    Rows are read and bound one at a time, so memory use does not grow
+    with the size of the data source. Test cases without a data source
+    are yielded unchanged.
+
+    Args:
+        test_case: The TestCase to expand
+        base_dir: Directory that relative data source paths are relative to
+
+    Yields:
+        Concrete TestCase objects
+    """
+    if not is_parameterized(test_case):
+        yield test_case
+        return
+
+    for row_index, row in enumerate(iter_rows(resolve_data_source(test_case, base_dir))):
+        yield bind(test_case, row, row_index)
@@ -0,0 +1,181 @@
+"""
+Performance module for the UWAutoTest application
+Collects page-load and Web Vitals metrics from the browser
+"""
+from typing import Dict, Any, Optional
+
+
+# Reads Navigation Timing, Resource Timing, paint timing, LCP and CLS for the
+# current document. Buffered observers hand back entries already recorded
+# by the browser through takeRecords(), so the script runs synchronously.
+COLLECT_METRICS_SCRIPT = """
+var perf = window.performance;
+if (!perf || !perf.getEntriesByType) { return null; }
+
+function observed(type) {
+    try {
+        var observer = new PerformanceObserver(function() {});
+        observer.observe({type: type, buffered: true});
+        var records = observer.takeRecords();
+        observer.disconnect();
+        return records;
+    } catch (e) {
+        return null;
+    }
+}
+
+var result = {url: location.href, timeOrigin: perf.timeOrigin};
+
+var nav = perf.getEntriesByType('navigation')[0];
+if (nav) {
+    result.navigation = {
+        ttfb: nav.responseStart - nav.startTime,
+        domInteractive: nav.domInteractive - nav.startTime,
+        domContentLoaded: nav.domContentLoadedEventEnd - nav.startTime,
+        load: nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : null,
+        duration: nav.duration,
+        transferSize: nav.transferSize || 0,
+        type: nav.type
+    };
+}
+
+var resources = perf.getEntriesByType('resource');
+var byType = {};
+var transferSize = 0;
+var slowest = null;
+for (var i = 0; i < resources.length; i++) {
+    var entry = resources[i];
+    byType[entry.initiatorType] = (byType[entry.initiatorType] || 0) + 1;
+    transferSize += entry.transferSize || 0;
+    if (!slowest || entry.duration > slowest.duration) {
+        slowest = {name: entry.name, duration: entry.duration};
+    }
+}
+result.resources = {
+    count: resources.length,
+    transferSize: transferSize,
+    byType: byType,
+    slowest: slowest
+};
+
+result.paint = {};
+var paints = perf.getEntriesByType('paint');
+for (var j = 0; j < paints.length; j++) {
+    result.paint[paints[j].name] = paints[j].startTime;
+}
+
+var lcpEntries = observed('largest-contentful-paint');
+if (lcpEntries && lcpEntries.length) {
+    var last = lcpEntries[lcpEntries.length - 1];
+    result.lcp = last.renderTime || last.loadTime || last.startTime;
+} else {
+    result.lcp = null;
+}
+
+var shifts = observed('layout-shift');
+if (shifts) {
+    var cls = 0;
+    for (var k = 0; k < shifts.length; k++) {
+        if (!shifts[k].hadRecentInput) { cls += shifts[k].value; }
+    }
+    result.cls = cls;
+} else {
+    result.cls = null;
+}
+
+return result;
+"""
+
+# Identifies the current document so navigations triggered by clicks can be detected
+TIME_ORIGIN_SCRIPT = "return window.performance ? window.performance.timeOrigin : null;"
+
+# Metric names accepted by the Assert Load Time action, mapped to their lookup
+LOAD_TIME_METRICS = {
+    "load": lambda m: (m.get("navigation") or {}).get("load"),
+    "domcontentloaded": lambda m: (m.get("navigation") or {}).get("domContentLoaded"),
+    "dominteractive": lambda m: (m.get("navigation") or {}).get("domInteractive"),
+    "ttfb": lambda m: (m.get("navigation") or {}).get("ttfb"),
+    "fcp": lambda m: (m.get("paint") or {}).get("first-contentful-paint"),
+    "fp": lambda m: (m.get("paint") or {}).get("first-paint"),
+    "lcp": lambda m: m.get("lcp"),
+}
+
+
+def collect_metrics(driver) -> Optional[Dict[str, Any]]:
+    """Collect performance metrics for the page currently loaded in the driver
+
+    Args:
+        driver: WebDriver instance
+
+    Returns:
+        Dictionary of metrics, or None if the page exposes no timing data
+    """
+    try:
+        return driver.execute_script(COLLECT_METRICS_SCRIPT)
+    except Exception:
+        # Metrics are best effort and must never fail the test themselves
+        return None
+
+
+def get_time_origin(driver) -> Optional[float]:
+    """Get the time origin of the current document
+
+    Args:
+        driver: WebDriver instance
+
+    Returns:
+        The document's performance.timeOrigin, or None if unavailable
+    """
+    try:
+        return driver.execute_script(TIME_ORIGIN_SCRIPT)
+    except Exception:
+        return None
+
+
+def get_load_time(metrics: Dict[str, Any], metric: str = "load") -> Optional[float]:
+    """Look up a load time metric in milliseconds
+
+    Args:
+        metrics: Metrics dictionary returned by collect_metrics
+        metric: Metric name (load, domContentLoaded, domInteractive, ttfb, fcp, fp or lcp)
+
+    Returns:
+        The metric value in milliseconds, or None if it was not recorded
+    """
+    key = (metric or "load").strip().lower()
+    if key not in LOAD_TIME_METRICS:
+        raise ValueError(f"Unknown load time metric: {metric}")
+    return LOAD_TIME_METRICS[key](metrics)
+
+
+def get_request_count(metrics: Dict[str, Any]) -> int:
+    """Count the requests made by the page, including the document itself
+
+    Args:
+        metrics: Metrics dictionary returned by collect_metrics
+
+    Returns:
+        Number of requests
+    """
+    count = (metrics.get("resources") or {}).get("count", 0)
+    if metrics.get("navigation"):
+        count += 1
+    return count
+
+
+def parse_budget(value: str) -> float:
+    """Parse a budget value such as "2000", "2000ms" or "< 2000ms"
+
+    Args:
+        value: Budget string from an assertion action
+
+    Returns:
+        The numeric budget
+    """
+    text = value.strip().lstrip("<=").strip().lower()
+    if text.endswith("ms"):
+        text = text[:-2].strip()
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid budget value: '{value}'")
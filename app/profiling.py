@@ -0,0 +1,240 @@
+"""
+Profiling module for the UWAutoTest application
+Measures where a run spends its time: Python code, WebDriver round trips or waiting
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.models import TestCase
+
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Frames kept per tracemalloc allocation; more frames cost more memory and time
+TRACEMALLOC_FRAMES = 1
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval
+
+    Unlike cProfile, which only sees the thread it runs on, the sampler
+    covers worker threads too, at a cost that does not depend on how many
+    functions are called. The counts are written in the collapsed format
+    read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """Write one 'frame;frame;frame count' line per distinct stack"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RunProfiler:
+    """Profiles a test run and the tests in it
+
+    Writes to the output directory:
+        run.pstats      cProfile statistics of the thread that drives the
+                        run (loading tests, formatting results, the GUI)
+        run.collapsed   Stack samples of all threads, for flame graphs
+        tests.json      Per test: wall time split into WebDriver round
+                        trips, Python CPU time and other waiting, the
+                        slowest WebDriver commands and the peak of traced
+                        Python memory while the test ran
+
+    WebDriver time is measured by timing selenium's RemoteConnection.execute,
+    which every WebDriver command goes through.
+    """
+
+    def __init__(self, output_dir: str, sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 trace_memory: bool = True):
+        """Initialize the profiler
+
+        Args:
+            output_dir: Directory to write the profile files to
+            sample_interval: Seconds between stack samples
+            trace_memory: Whether to track Python memory per test with tracemalloc
+        """
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.sampler = StackSampler(sample_interval)
+        self.tests: List[Dict[str, Any]] = []
+        self.webdriver_commands: Dict[str, List[float]] = {}
+        self.start_time = None
+        self.duration = 0.0
+        self._profile = cProfile.Profile()
+        self._current = threading.local()
+        self._lock = threading.Lock()
+        self._original_execute = None
+
+    def start(self) -> None:
+        """Start profiling the calling thread and sampling all threads"""
+        self._patch_webdriver()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.start_time = time.time()
+        self.sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling and write the profile files"""
+        self._profile.disable()
+        self.sampler.stop()
+        self.duration = time.time() - self.start_time
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._unpatch_webdriver()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._profile.dump_stats(os.path.join(self.output_dir, "run.pstats"))
+        self.sampler.write_collapsed(os.path.join(self.output_dir, "run.collapsed"))
+        with open(os.path.join(self.output_dir, "tests.json"), "w") as f:
+            json.dump({"duration": self.duration, "webdriver": self._command_totals(), "tests": self.tests}, f, indent=2)
+
+    def _patch_webdriver(self) -> None:
+        try:
+            from selenium.webdriver.remote.remote_connection import RemoteConnection
+        except ImportError:
+            return
+        original = self._original_execute = RemoteConnection.execute
+        profiler = self
+
+        def execute(connection, command, params):
+            start = time.perf_counter()
+            try:
+                return original(connection, command, params)
+            finally:
+                profiler._record_command(command, time.perf_counter() - start)
+
+        RemoteConnection.execute = execute
+
+    def _unpatch_webdriver(self) -> None:
+        if self._original_execute is not None:
+            from selenium.webdriver.remote.remote_connection import RemoteConnection
+            RemoteConnection.execute = self._original_execute
+            self._original_execute = None
+
+    def _record_command(self, command: str, seconds: float) -> None:
+        with self._lock:
+            self.webdriver_commands.setdefault(command, []).append(seconds)
+        test = getattr(self._current, "test", None)
+        if test is not None:
+            test["webdriver"] += seconds
+            test["webdriver_calls"] += 1
+            test["commands"][command] = test["commands"].get(command, 0.0) + seconds
+
+    def test_started(self, test_case: TestCase) -> None:
+        """Start measuring a test on the calling thread"""
+        if self.trace_memory and tracemalloc.is_tracing():
+            # The peak is process-wide, so with parallel tests it includes the others
+            tracemalloc.reset_peak()
+        self._current.test = {
+            "name": test_case.name,
+            "start": time.perf_counter(),
+            "cpu_start": time.thread_time(),
+            "webdriver": 0.0,
+            "webdriver_calls": 0,
+            "commands": {}
+        }
+
+    def test_finished(self, test_case: TestCase, result: Optional[Dict[str, Any]]) -> None:
+        """Finish measuring the test running on the calling thread"""
+        test = self._current.test
+        self._current.test = None
+        wall = time.perf_counter() - test.pop("start")
+        cpu = time.thread_time() - test.pop("cpu_start")
+        test.update({
+            "success": bool(result and result["success"]),
+            "wall": wall,
+            "cpu": cpu,
+            # Fixed waits, polling sleeps and other threads holding the GIL
+            "other": max(0.0, wall - cpu - test["webdriver"]),
+            "commands": dict(sorted(test["commands"].items(), key=lambda item: item[1], reverse=True)[:5])
+        })
+        if self.trace_memory and tracemalloc.is_tracing():
+            test["memory_peak"] = tracemalloc.get_traced_memory()[1]
+        with self._lock:
+            self.tests.append(test)
+
+    def _command_totals(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                command: {"calls": len(times), "total": sum(times), "max": max(times)}
+                for command, times in sorted(self.webdriver_commands.items(),
+                                             key=lambda item: sum(item[1]), reverse=True)
+            }
+
+    def summary_lines(self, limit: int = 10) -> List[str]:
+        """Where the time went, for the end of the CLI or GUI output"""
+        lines = [f"Profile written to {self.output_dir}"]
+        if self.tests:
+            wall = sum(test["wall"] for test in self.tests)
+            for key, label in (("webdriver", "WebDriver round trips"), ("cpu", "Python CPU"),
+                               ("other", "Waiting (sleeps, polling, other threads)")):
+                spent = sum(test[key] for test in self.tests)
+                lines.append(f"{label}: {spent:.2f}s ({spent / wall * 100 if wall else 0:.0f}% of test time)")
+        totals = self._command_totals()
+        if totals:
+            lines.append("Slowest WebDriver commands:")
+            for command, stats in list(totals.items())[:5]:
+                lines.append(f"  {command}: {stats['calls']} calls, {stats['total']:.2f}s total, "
+                             f"{stats['max'] * 1000:.0f}ms max")
+        if self.trace_memory and self.tests:
+            heaviest = max(self.tests, key=lambda test: test.get("memory_peak", 0))
+            lines.append(f"Largest Python memory peak: {heaviest.get('memory_peak', 0) / 1024 / 1024:.1f} MB "
+                         f"({heaviest['name']})")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(limit)
+        lines.append(f"Top {limit} functions of the driving thread by cumulative time:")
+        # Keep the table and drop pstats' header lines
+        table = stream.getvalue().split("\n")
+        start = next((index for index, line in enumerate(table) if line.strip().startswith("ncalls")), 0)
+        lines.extend(line for line in table[start:] if line.strip())
+        return lines
@@ -0,0 +1,173 @@
+"""
+Scheduler module for the UWAutoTest application
+Predicts test durations and orders parallel runs longest-first
+"""
+import heapq
+import json
+import os
+import re
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+from app.models import TestCase, ActionType
+
+
+# JSON file in the test case directory that stores measured durations (not
+# named *.json so it is never listed as a test case)
+HISTORY_FILE_NAME = ".durations"
+
+# Weight of the newest measurement in the moving average
+HISTORY_ALPHA = 0.3
+
+# Rough costs in seconds used for tests without history
+DRIVER_START_ESTIMATE = 2.0
+DEFAULT_ACTION_ESTIMATE = 0.2
+ACTION_ESTIMATES = {
+    ActionType.NAVIGATE: 1.0,
+    ActionType.SUBMIT: 1.0,
+    ActionType.CLICK: 0.3,
+    ActionType.SCREENSHOT: 0.3,
+    ActionType.ASSERT_SCREENSHOT: 0.5,
+}
+
+# Test cases held back for reordering per worker. Small, so the first tests
+# start without reading far ahead into a large data-driven stream.
+SCHEDULE_WINDOW_PER_WORKER = 8
+
+# Data-driven rows are named "<test>[<row>]" and share their test's history
+ROW_SUFFIX_PATTERN = re.compile(r"\[\d+\]$")
+
+
+def history_key(test_case: TestCase) -> str:
+    """Name under which a test case's durations are stored"""
+    return ROW_SUFFIX_PATTERN.sub("", test_case.name)
+
+
+def estimate_duration(test_case: TestCase) -> float:
+    """Estimate how long a test case takes from its actions alone
+
+    Args:
+        test_case: The TestCase to estimate
+
+    Returns:
+        Estimated duration in seconds, including starting the browser
+    """
+    estimate = DRIVER_START_ESTIMATE
+    for action in test_case.actions:
+        if action.action_type == ActionType.WAIT and action.value.strip().isdigit():
+            estimate += int(action.value.strip())
+        else:
+            estimate += ACTION_ESTIMATES.get(action.action_type, DEFAULT_ACTION_ESTIMATE)
+    return estimate
+
+
+class DurationHistory:
+    """Moving averages of measured test durations, stored as JSON"""
+
+    def __init__(self, file_path: str):
+        """Load the history file if it exists
+
+        Args:
+            file_path: Path of the history file
+        """
+        self.file_path = file_path
+        self.durations: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(file_path, 'r') as f:
+                self.durations = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_test_dir(cls, test_dir: str) -> "DurationHistory":
+        """Load the history kept alongside a test case directory"""
+        return cls(os.path.join(test_dir, HISTORY_FILE_NAME))
+
+    def predict(self, test_case: TestCase) -> float:
+        """Predict the duration of a test case
+
+        Args:
+            test_case: The TestCase to predict
+
+        Returns:
+            The average of previous runs, or an estimate from its actions
+        """
+        entry = self.durations.get(history_key(test_case))
+        if entry is not None:
+            return entry["duration"]
+        return estimate_duration(test_case)
+
+    def record(self, test_case: TestCase, result: Dict[str, Any]) -> None:
+        """Add the duration of a passed test to its moving average
+
+        Failed tests are not recorded, since they stop early or wait for
+        timeouts and say little about the test's normal duration. Nor are
+        tests the HTTP engine ran, which take a fraction of the browser
+        time the schedule has to plan for.
+        """
+        if not result.get("success") or result.get("engine", "selenium") != "selenium":
+            return
+        key = history_key(test_case)
+        with self._lock:
+            entry = self.durations.get(key)
+            if entry is None:
+                self.durations[key] = {"duration": result["duration"], "runs": 1}
+            else:
+                entry["duration"] += HISTORY_ALPHA * (result["duration"] - entry["duration"])
+                entry["runs"] += 1
+
+    def save(self) -> None:
+        """Write the history file"""
+        with self._lock:
+            data = json.dumps(self.durations, indent=2, sort_keys=True)
+        try:
+            with open(self.file_path, 'w') as f:
+                f.write(data)
+        except OSError:
+            # History only improves scheduling; a read-only test directory is fine
+            pass
+
+
+class LongestFirstSchedule:
+    """Reorders a stream of test cases so the longest ones start first
+
+    Starting long tests first lets the short ones fill in around them at
+    the end, instead of one long test started last extending the run. Only
+    SCHEDULE_WINDOW_PER_WORKER test cases per worker are held back at a
+    time: each one read past that hands out the longest held test, so
+    large data-driven runs start at once and use bounded memory.
+    """
+
+    def __init__(self, test_cases: Iterable[TestCase], history: DurationHistory, workers: int):
+        """Initialize the schedule
+
+        Args:
+            test_cases: Test cases in their given order
+            history: Duration history used for predictions
+            workers: Number of parallel workers
+        """
+        self.history = history
+        self.workers = workers
+        # Wall-clock time of the run if every prediction holds, updated as tests are handed out
+        self.predicted_makespan = 0.0
+        self._test_cases = iter(test_cases)
+        self._loads = [0.0] * max(1, workers)
+
+    def __iter__(self) -> Iterator[TestCase]:
+        window = SCHEDULE_WINDOW_PER_WORKER * len(self._loads)
+        # Longest first; ties keep their given order
+        held: List[Tuple[float, int, TestCase]] = []
+        for index, test_case in enumerate(self._test_cases):
+            heapq.heappush(held, (-self.history.predict(test_case), index, test_case))
+            if len(held) > window:
+                yield self._hand_out(heapq.heappop(held))
+        while held:
+            yield self._hand_out(heapq.heappop(held))
+
+    def _hand_out(self, item: Tuple[float, int, TestCase]) -> TestCase:
+        """Add a held test to the least loaded worker's predicted time"""
+        negative_duration, _, test_case = item
+        heapq.heapreplace(self._loads, self._loads[0] - negative_duration)
+        self.predicted_makespan = max(self._loads)
+        return test_case
@@ -4,7 +4,7 @@ Handles loading and saving test cases and suites
 """
 import os
 import json
-from typing import List
+from typing import List, Dict, Any
 from app.models import TestCase
 
 
@@ -38,17 +38,20 @@ class TestManager:
             data = json.load(f)
             return TestCase.from_dict(data)
     
-    def save_test_suite(self, test_names: List[str], file_path: str) -> None:
+    def save_test_suite(self, test_names: List[str], file_path: str, chained: bool = False) -> None:
         """Save a test suite to a JSON file
         
         Args:
             test_names: List of test case names
             file_path: Path to save the suite file
+            chained: Whether the tests run in order on one browser session
         """
         data = {
             "name": os.path.basename(file_path).split('.')[0],
             "tests": test_names
         }
+        if chained:
+            data["chained"] = True
         
         with open(file_path, 'w') as f:
             json.dump(data, f, indent=2)
@@ -65,3 +68,20 @@ class TestManager:
         with open(file_path, 'r') as f:
             data = json.load(f)
             return data.get("tests", [])
+    
+    def load_test_suite_config(self, file_path: str) -> Dict[str, Any]:
+        """Load a test suite file including its optional settings
+        
+        Args:
+            file_path: Path to the test suite file
+            
+        Returns:
+            Dictionary with the suite name, test names and any extra
+            settings stored in the file (e.g. "weights" for load tests or
+            "chained" for suites whose tests share one browser session)
+        """
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        data.setdefault("name", os.path.basename(file_path).split('.')[0])
+        data.setdefault("tests", [])
+        return data
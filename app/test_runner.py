@@ -2,50 +2,146 @@
 Test Runner module for the UWAutoTest application
 Executes test cases using Selenium WebDriver
 """
+import os
+import re
+import threading
 import time
-from typing import Dict, Any
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
+from selenium.common.exceptions import WebDriverException
 
-from app.models import TestCase, TestAction, ActionType
+import app.builtin_actions  # Registers the handlers of the built-in action types
+from app.models import TestCase, TestAction
+from app.actions import ActionSession, bind_plan
+from app.browser_profile import ProfileTemplate
+from app.compiler import CompiledAction, compile_test_case, PlanValidationError
+from app.driver_pool import WarmDriverPool
+from app.element_cache import ElementCache
+from app.http_engine import HttpEngine, is_eligible, http_engine_available
+from app.optimizer import optimize_plan
+from app.page_helpers import PageHelperRegistry
+from app.performance import collect_metrics
+from app.visual import DEFAULT_BASELINE_DIR, BaselineStore, baseline_variant
+
+
+def screenshot_prefix(test_case: TestCase, browser: str) -> str:
+    """Start of the screenshot file names of a test run, so parallel rows and browsers do not overwrite each other"""
+    safe_name = re.sub(r"[^\w.\[\]-]+", "_", test_case.name).strip("_") or "test"
+    return f"{safe_name}-{browser}-"
 
 
 class TestRunner:
     """Runs automated test cases using Selenium WebDriver"""
     
-    def __init__(self, browser="Chrome", headless=False, wait_time=10):
+    def __init__(self, browser="Chrome", headless=False, wait_time=10, capture_performance=False,
+                 engine="selenium", driver_path=None, trace_dir=None, trace_dom=True, window_size=None,
+                 baseline_dir=None, update_baselines=None, optimize=False, profile_template=None):
         """Initialize the test runner
         
         Args:
             browser: Browser to use ('Chrome', 'Firefox', or 'Edge')
             headless: Whether to run in headless mode
             wait_time: Implicit wait time in seconds
+            capture_performance: Whether to collect page-load metrics after every navigation.
+                Tests with Assert Load Time or Assert Max Requests actions always collect them.
+            engine: 'selenium' to always use a browser, or 'auto' to run tests that
+                need no JavaScript over plain HTTP and fall back to a browser otherwise
+            driver_path: Path to a local driver executable (chromedriver, geckodriver or
+                msedgedriver). Skips webdriver-manager, e.g. for offline machines.
+            trace_dir: Directory to record a trace file per browser test in, or None
+            trace_dom: Whether traces include a DOM snapshot after every action
+            window_size: (width, height) of the browser window, or None to maximize it
+            baseline_dir: Baseline store used by Assert Screenshot actions
+            update_baselines: None to only compare screenshots, 'missing' to record
+                baselines that do not exist yet, or 'all' to also replace
+                baselines that no longer match
+            optimize: Whether to drop redundant steps from test plans before
+                running them (see app.optimizer)
+            profile_template: Directory of a template profile made by
+                build_profile_template, which every new browser session
+                starts from a copy of
         """
         self.browser = browser
         self.headless = headless
         self.wait_time = wait_time
+        self.capture_performance = capture_performance
+        self.engine = engine
+        self.driver_path = driver_path
+        self.window_size = window_size
+        self.driver_pool = None
+        self.trace_writer = None
+        self.trace_dom = trace_dom
+        if trace_dir:
+            self.enable_tracing(trace_dir, trace_dom)
+        # Optional callback(test_case, compiled_action) called before each browser action
+        self.on_action_start = None
+        self._http_engine = None
+        self._http_engine_lock = threading.Lock()
+        self.baseline_dir = baseline_dir or DEFAULT_BASELINE_DIR
+        self.update_baselines = update_baselines
+        self.optimize = optimize
+        self.profile_template = ProfileTemplate(profile_template, browser) if profile_template else None
+        self._baseline_store = None
+        self._baseline_store_lock = threading.Lock()
+        # Helper library state of each browser session, see app.page_helpers
+        self.page_helpers = PageHelperRegistry()
+        # Optional RunMetrics that tests, actions and browser starts are reported to
+        self.metrics = None
+        # Optional RunProfiler that measures each test
+        self.profiler = None
     
-    def _create_driver(self) -> webdriver.Remote:
+    def _create_driver(self, profile_dir=None) -> webdriver.Remote:
         """Create and configure a WebDriver instance
         
+        Args:
+            profile_dir: Profile directory to start the browser with. By default
+                a copy of the template profile if one is in use, or else a new
+                empty profile.
+        
         Returns:
             Configured WebDriver instance
         """
+        template = self.profile_template
+        clone_dir = None
+        if profile_dir is None and template is not None and template.browser == self.browser:
+            profile_dir = clone_dir = template.clone()
+        try:
+            driver = self._start_driver(profile_dir)
+        except Exception:
+            if clone_dir is not None:
+                template.release(clone_dir)
+            raise
+        if clone_dir is not None:
+            # Sessions are quit in many places; the copy goes once the driver object does
+            weakref.finalize(driver, template.release, clone_dir)
+        return driver
+    
+    def _start_driver(self, profile_dir) -> webdriver.Remote:
+        """Start a browser session, on the given profile directory if any"""
         if self.browser == "Chrome":
             options = webdriver.ChromeOptions()
             if self.headless:
                 options.add_argument("--headless=new")
+                if self.window_size:
+                    # Headless windows start at 800x600 and can't be maximized
+                    options.add_argument(f"--window-size={self.window_size[0]},{self.window_size[1]}")
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
+            if profile_dir:
+                options.add_argument(f"--user-data-dir={profile_dir}")
+            if self.trace_writer is not None:
+                # Lets traces include the browser console
+                options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+            
+            # webdriver-manager is only needed when no local driver is configured
+            from webdriver_manager.chrome import ChromeDriverManager
             
             # Set specific options for Chrome on macOS ARM (Apple Silicon)
             import platform
@@ -56,37 +152,160 @@ class TestRunner:
                 os.environ["WDM_ARCHITECTURE"] = "arm64"
                 driver = webdriver.Chrome(
                     service=ChromeService(
-                        ChromeDriverManager().install()
+                        self.driver_path or ChromeDriverManager().install()
                     ),
                     options=options
                 )
             else:
                 # Default case for other platforms
                 driver = webdriver.Chrome(
-                    service=ChromeService(ChromeDriverManager().install()),
+                    service=ChromeService(self.driver_path or ChromeDriverManager().install()),
                     options=options
                 )
         
         elif self.browser == "Firefox":
+            from webdriver_manager.firefox import GeckoDriverManager
             options = webdriver.FirefoxOptions()
             if self.headless:
                 options.add_argument("--headless")
-            driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()), options=options)
+            if profile_dir:
+                # Used in place; options.profile would zip and upload a copy
+                options.add_argument("-profile")
+                options.add_argument(profile_dir)
+            driver = webdriver.Firefox(service=FirefoxService(self.driver_path or GeckoDriverManager().install()), options=options)
         
         elif self.browser == "Edge":
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
             options = webdriver.EdgeOptions()
             if self.headless:
                 options.add_argument("--headless")
-            driver = webdriver.Edge(service=EdgeService(EdgeChromiumDriverManager().install()), options=options)
+            if profile_dir:
+                options.add_argument(f"--user-data-dir={profile_dir}")
+            if self.trace_writer is not None:
+                options.set_capability("ms:loggingPrefs", {"browser": "ALL"})
+            driver = webdriver.Edge(service=EdgeService(self.driver_path or EdgeChromiumDriverManager().install()), options=options)
         
         else:
             raise ValueError(f"Unsupported browser: {self.browser}")
             
         driver.implicitly_wait(self.wait_time)
-        driver.maximize_window()
+        if self.window_size:
+            driver.set_window_size(*self.window_size)
+        else:
+            driver.maximize_window()
+        return driver
+    
+    def _attach_driver(self, debugger_address: str) -> webdriver.Remote:
+        """Start another WebDriver session on an already running Chrome or Edge
+        
+        Args:
+            debugger_address: host:port of the browser's DevTools endpoint
+            
+        Returns:
+            WebDriver instance that shares the browser process. Quitting it
+            leaves the browser running.
+        """
+        if self.browser == "Chrome":
+            from webdriver_manager.chrome import ChromeDriverManager
+            options = webdriver.ChromeOptions()
+            options.debugger_address = debugger_address
+            driver = webdriver.Chrome(service=ChromeService(self.driver_path or ChromeDriverManager().install()),
+                                      options=options)
+        elif self.browser == "Edge":
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
+            options = webdriver.EdgeOptions()
+            options.debugger_address = debugger_address
+            driver = webdriver.Edge(service=EdgeService(self.driver_path or EdgeChromiumDriverManager().install()),
+                                    options=options)
+        else:
+            raise ValueError(f"{self.browser} does not support sharing one browser between sessions")
+        driver.implicitly_wait(self.wait_time)
         return driver
     
-    def run_test(self, test_case: TestCase, browser=None, headless=None, wait_time=None) -> Dict[str, Any]:
+    def _driver_config(self) -> Tuple:
+        """Settings a browser session is created with, used to match warm sessions"""
+        return (self.browser, self.headless, self.wait_time, self.driver_path, self.trace_writer is not None,
+                self.window_size, self.profile_template.root if self.profile_template else None)
+    
+    def enable_tracing(self, trace_dir, dom=True) -> None:
+        """Record a trace file for every browser test
+        
+        Each trace holds, per action, its timing, the page URL and title,
+        details of the targeted element, new console messages and (with
+        dom=True) a compressed snapshot of the page HTML. Traces can be
+        browsed offline with 'main.py trace' or the Traces tab.
+        
+        Args:
+            trace_dir: Directory for the trace files
+            dom: Whether to include a DOM snapshot after every action
+        """
+        from app.trace import TraceWriter
+        if self.trace_writer is None or self.trace_writer.trace_dir != trace_dir:
+            self.trace_writer = TraceWriter(trace_dir)
+        self.trace_dom = dom
+    
+    def disable_tracing(self) -> None:
+        """Stop recording traces, after writing the ones still queued"""
+        if self.trace_writer is not None:
+            self.trace_writer.flush()
+            self.trace_writer = None
+    
+    def enable_warm_standby(self, size=1, idle_timeout=300.0) -> None:
+        """Keep pre-launched browser sessions ready so tests start without waiting
+        
+        Sessions match the current browser, headless and wait time settings and
+        are re-created when those change. They are released after idle_timeout
+        seconds without a test run.
+        
+        Args:
+            size: Number of sessions to keep ready
+            idle_timeout: Seconds of inactivity before standby sessions are released
+        """
+        if self.driver_pool is None:
+            self.driver_pool = WarmDriverPool(self._create_driver, self._driver_config,
+                                              size=size, idle_timeout=idle_timeout)
+        else:
+            self.driver_pool.size = size
+            self.driver_pool.idle_timeout = idle_timeout
+            self.driver_pool.refresh()
+    
+    def disable_warm_standby(self) -> None:
+        """Stop keeping sessions ready and quit the ones on standby"""
+        if self.driver_pool is not None:
+            self.driver_pool.shutdown()
+            self.driver_pool = None
+    
+    def use_profile_template(self, template) -> None:
+        """Start new browser sessions from copies of a template profile
+        
+        Args:
+            template: ProfileTemplate from build_profile_template, or None to
+                go back to empty profiles. The caller cleans the template up.
+        """
+        self.profile_template = template
+        if self.driver_pool is not None:
+            self.driver_pool.refresh()
+    
+    def _acquire_driver(self) -> webdriver.Remote:
+        """Get a browser session for a test, preferring a warm standby session
+        
+        Returns:
+            WebDriver instance owned by the caller
+        """
+        start_time = time.time()
+        if self.driver_pool is not None:
+            driver = self.driver_pool.acquire()
+            if driver is not None:
+                if self.metrics is not None:
+                    self.metrics.driver_started(time.time() - start_time, "warm")
+                return driver
+        driver = self._create_driver()
+        if self.metrics is not None:
+            self.metrics.driver_started(time.time() - start_time, "new")
+        return driver
+    
+    def run_test(self, test_case: TestCase, browser=None, headless=None, wait_time=None,
+                 driver=None) -> Dict[str, Any]:
         """Run a test case
         
         Args:
@@ -94,10 +313,32 @@ class TestRunner:
             browser: Override the default browser
             headless: Override the default headless setting
             wait_time: Override the default wait time
+            driver: Existing WebDriver session to run on. The caller keeps
+                ownership of it, so it is not quit after the test.
             
         Returns:
             Dictionary with test results
         """
+        metrics = self.metrics
+        profiler = self.profiler
+        if metrics is None and profiler is None:
+            return self._run_test(test_case, browser, headless, wait_time, driver)
+        if metrics is not None:
+            metrics.test_started()
+        if profiler is not None:
+            profiler.test_started(test_case)
+        result = None
+        try:
+            result = self._run_test(test_case, browser, headless, wait_time, driver)
+            return result
+        finally:
+            if profiler is not None:
+                profiler.test_finished(test_case, result)
+            if metrics is not None:
+                metrics.test_finished(result)
+    
+    def _run_test(self, test_case: TestCase, browser, headless, wait_time, driver) -> Dict[str, Any]:
+        """Run a test case; see run_test"""
         # Override settings if provided
         if browser is not None:
             self.browser = browser
@@ -105,35 +346,79 @@ class TestRunner:
             self.headless = headless
         if wait_time is not None:
             self.wait_time = wait_time
-            
+        
         result = {
             "success": False,
             "error": None,
             "duration": 0,
-            "screenshots": []
+            "screenshots": [],
+            "performance": [],
+            "actions": [],
+            "engine": "selenium"
         }
         
-        driver = None
+        # Invalid test cases fail before any browser is started
+        try:
+            plan = compile_test_case(test_case)
+        except PlanValidationError as e:
+            result["error"] = f"Invalid test case:\n{str(e)}"
+            return result
+        if self.optimize:
+            plan, rewrites = optimize_plan(plan)
+            if rewrites:
+                result["optimized"] = [str(rewrite) for rewrite in rewrites]
+        
+        if driver is None and self._use_http_engine(test_case):
+            http_result = self._get_http_engine().run_plan(plan)
+            # Failures are confirmed in a real browser, since the page may rely on JavaScript
+            if http_result["success"]:
+                return http_result
+        
+        owns_driver = driver is None
+        element_cache = ElementCache(self.wait_time)
         start_time = time.time()
+        trace_writer = self.trace_writer
+        trace_path = None
+        if trace_writer is not None:
+            trace_path = result["trace"] = trace_writer.open_trace(
+                test_case, baseline_variant(self.browser, self.headless, self.window_size))
         
         try:
             # Initialize driver with better error handling
             try:
-                driver = self._create_driver()
+                if owns_driver:
+                    driver = self._acquire_driver()
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
                 result["error"] = f"WebDriver initialization failed: {str(e)}\n\nDetails: {error_details}"
                 return result
             
+            # Resolve every action to its handler once, before the first one runs
+            session = ActionSession(self, driver, element_cache, element_cache.wait(driver),
+                                    self.capture_performance or plan.asserts_performance,
+                                    screenshot_prefix(test_case, self.browser))
+            
             # Process each action in the test case
-            for i, action in enumerate(test_case.actions):
+            for step, run_action in bind_plan(plan.steps, session):
+                i = step.index
+                if self.on_action_start is not None:
+                    self.on_action_start(test_case, step)
+                action_start = time.time()
                 try:
-                    self._execute_action(driver, action, test_case.base_url, i, result)
+                    run_action(result)
+                    self._record_action(step.action, i, action_start, True, result)
+                    if trace_path:
+                        self._trace_action(trace_writer, trace_path, driver, step, result)
                 except Exception as e:
-                    result["error"] = f"Error on action #{i+1} ({action.action_type.value}): {str(e)}"
+                    self._record_action(step.action, i, action_start, False, result)
+                    result["error"] = f"Error on action #{i+1} ({step.action_type.value}): {str(e)}"
                     # Capture screenshot on error
-                    self._capture_error_screenshot(driver, i, result)
+                    error_screenshot = self._capture_error_screenshot(driver, session.screenshot_path(f"error_{i}"),
+                                                                      result)
+                    if trace_path:
+                        self._trace_action(trace_writer, trace_path, driver, step, result, error=str(e).strip(),
+                                           screenshot=error_screenshot)
                     return result
             
             # Test completed successfully
@@ -145,114 +430,297 @@ class TestRunner:
             result["error"] = f"Test initialization error: {str(e)}\n\nDetails: {error_details}"
             
         finally:
-            if driver:
+            if driver and owns_driver:
                 driver.quit()
             result["duration"] = time.time() - start_time
+            result["element_cache"] = element_cache.stats()
+            if trace_path:
+                trace_writer.close_trace(trace_path, {
+                    "type": "test_end",
+                    "time": time.time(),
+                    "success": result["success"],
+                    "error": result["error"],
+                    "duration": result["duration"],
+                    "screenshots": result["screenshots"]
+                })
             
         return result
     
-    def _execute_action(self, driver: webdriver.Remote, action: TestAction, base_url: str, 
-                       action_index: int, result: Dict[str, Any]) -> None:
-        """Execute a single test action
+    def _use_http_engine(self, test_case: TestCase) -> bool:
+        """Check whether a test case should run on the HTTP engine
         
         Args:
-            driver: WebDriver instance
-            action: The TestAction to execute
-            base_url: Base URL of the test case
-            action_index: Index of the current action
-            result: Result dictionary to update
-        """
-        if action.action_type == ActionType.NAVIGATE:
-            url = action.target
-            if not url.startswith(('http://', 'https://')):
-                # Relative URL, prepend base_url
-                url = base_url + action.target
-            driver.get(url)
+            test_case: The TestCase about to run
             
-        elif action.action_type == ActionType.CLICK:
-            element = WebDriverWait(driver, self.wait_time).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, action.target))
-            )
-            element.click()
+        Returns:
+            True if the browserless engine is enabled and can run the test
+        """
+        return self.engine == "auto" and is_eligible(test_case) and http_engine_available()
+    
+    def _get_http_engine(self) -> HttpEngine:
+        """Get the shared HTTP engine, creating it on first use
+        
+        Returns:
+            HttpEngine whose connection pool is shared by all tests of this runner
+        """
+        with self._http_engine_lock:
+            if self._http_engine is None or self._http_engine.wait_time != self.wait_time:
+                self._http_engine = HttpEngine(wait_time=self.wait_time)
+            return self._http_engine
+    
+    def get_baseline_store(self) -> BaselineStore:
+        """Get the baseline store, creating it on first use
+        
+        Returns:
+            BaselineStore shared by all tests of this runner, so decoded
+            baselines are cached across tests
+        """
+        with self._baseline_store_lock:
+            if self._baseline_store is None or self._baseline_store.root != self.baseline_dir:
+                self._baseline_store = BaselineStore(self.baseline_dir)
+            return self._baseline_store
+    
+    def reset_driver(self, driver: webdriver.Remote) -> None:
+        """Clear cookies and storage so a session can be reused for another test
+        
+        Args:
+            driver: WebDriver instance to reset
+        """
+        try:
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        except WebDriverException:
+            pass
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+    
+    def run_tests(self, test_cases: Iterable[TestCase], max_workers: int = 1) -> Iterator[Tuple[TestCase, Dict[str, Any]]]:
+        """Run a stream of test cases on a pool of worker threads
+        
+        Test cases are pulled from the iterable only as workers free up, so at
+        most a few test cases per worker are held in memory at any time. This
+        keeps lazily expanded data-driven runs at constant memory.
+        
+        Args:
+            test_cases: Iterable (typically a generator) of TestCases to run
+            max_workers: Number of tests to run concurrently
             
-        elif action.action_type == ActionType.INPUT:
-            element = WebDriverWait(driver, self.wait_time).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, action.target))
-            )
-            element.clear()
-            element.send_keys(action.value)
+        Yields:
+            (test_case, result) tuples in completion order
+        """
+        if max_workers <= 1:
+            for test_case in test_cases:
+                yield test_case, self.run_test(test_case)
+            return
+        
+        iterator = iter(test_cases)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
             
-        elif action.action_type == ActionType.SELECT:
-            element = WebDriverWait(driver, self.wait_time).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, action.target))
-            )
-            select = Select(element)
-            select.select_by_visible_text(action.value)
+            def submit(count):
+                for test_case in islice(iterator, count):
+                    pending[executor.submit(self.run_test, test_case)] = test_case
+                if self.metrics is not None:
+                    self.metrics.set_pending(len(pending))
             
-        elif action.action_type == ActionType.SUBMIT:
-            element = WebDriverWait(driver, self.wait_time).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, action.target))
-            )
-            element.submit()
+            # Keep the pool saturated with a small backlog of queued tests
+            submit(max_workers * 2)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+                submit(max_workers * 2 - len(pending))
+    
+    def run_chain(self, test_cases: Iterable[TestCase]) -> Iterator[Tuple[TestCase, Dict[str, Any]]]:
+        """Run test cases in order on one browser session, carrying state between them
+        
+        The session is not reset between tests, so each test starts where the
+        previous one left off (cookies, storage and the current page). Once a
+        test fails, the remaining tests depend on state that was never set
+        up, so they are reported as skipped instead of being run.
+        
+        Args:
+            test_cases: Iterable of TestCases in the order they build on each other
             
-        elif action.action_type == ActionType.WAIT:
-            if action.value.isdigit():
-                time.sleep(int(action.value))
-            else:
-                # Wait for element if target is provided
-                if action.target:
-                    WebDriverWait(driver, self.wait_time).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, action.target))
-                    )
-                    
-        elif action.action_type == ActionType.ASSERT_TEXT:
-            element = WebDriverWait(driver, self.wait_time).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, action.target))
-            )
-            actual_text = element.text
-            if action.value not in actual_text:
-                raise AssertionError(f"Text '{action.value}' not found in element. Actual text: '{actual_text}'")
+        Yields:
+            (test_case, result) tuples in run order. Skipped tests have
+            "skipped" set in their result.
+        """
+        driver = None
+        failed_test = None
+        try:
+            for test_case in test_cases:
+                if failed_test is not None:
+                    yield test_case, self._report_not_run(self._not_run_result(
+                        f"Skipped because '{failed_test}' failed earlier in the chain", skipped=True
+                    ))
+                    continue
                 
-        elif action.action_type == ActionType.ASSERT_ELEMENT:
-            # Check if element exists based on CSS selector
-            try:
-                WebDriverWait(driver, self.wait_time).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, action.target))
-                )
-                if action.value.lower() == "false":
-                    raise AssertionError(f"Element '{action.target}' exists but expected not to exist")
-            except TimeoutException:
-                if action.value.lower() != "false":
-                    raise AssertionError(f"Element '{action.target}' does not exist but expected to exist")
-                    
-        elif action.action_type == ActionType.SCREENSHOT:
-            screenshot_path = f"screenshot_{action_index}.png"
-            driver.save_screenshot(screenshot_path)
-            result["screenshots"].append(screenshot_path)
+                if driver is None:
+                    try:
+                        driver = self._acquire_driver()
+                    except Exception as e:
+                        failed_test = test_case.name
+                        yield test_case, self._report_not_run(
+                            self._not_run_result(f"WebDriver initialization failed: {str(e)}")
+                        )
+                        continue
+                
+                result = self.run_test(test_case, driver=driver)
+                if not result["success"]:
+                    failed_test = test_case.name
+                yield test_case, result
+        finally:
+            if driver:
+                driver.quit()
+    
+    def _report_not_run(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Count a test that never reached run_test in the metrics"""
+        if self.metrics is not None:
+            self.metrics.count_outcome(result)
+        return result
+    
+    @staticmethod
+    def _not_run_result(error: str, skipped: bool = False) -> Dict[str, Any]:
+        """Build the result of a test that could not be run or was skipped"""
+        return {
+            "success": False,
+            "skipped": skipped,
+            "error": error,
+            "duration": 0,
+            "screenshots": [],
+            "performance": [],
+            "actions": [],
+            "engine": "selenium"
+        }
+    
+    def _assert_screenshot(self, driver: webdriver.Remote, step: CompiledAction, result: Dict[str, Any],
+                           element_cache: ElementCache) -> None:
+        """Compare the page, or the target element, against its baseline screenshot
+        
+        Args:
+            driver: WebDriver instance
+            step: The Assert Screenshot action
+            result: Result dictionary to update
+            element_cache: Elements found by earlier actions of the test
+        """
+        from app.visual import capture_screenshot, find_ignore_regions, check_screenshot, describe_failure
+        
+        check = step.visual
+        
+        def capture(element=None):
+            return capture_screenshot(driver, element, check.full_page), find_ignore_regions(driver, check, element)
+        
+        if step.locator:
+            png, ignore_regions = element_cache.use(driver, step.locator, capture, "visible")
+        else:
+            png, ignore_regions = capture()
+        
+        key = f"{check.baseline}@{baseline_variant(self.browser, self.headless, self.window_size)}"
+        outcome = check_screenshot(self.get_baseline_store(), key, png, check, ignore_regions, self.update_baselines)
+        result.setdefault("visual", []).append(dict(outcome, action_index=step.index))
+        if outcome.get("diff"):
+            result["screenshots"].append(outcome["diff"])
+        if outcome["status"] in ("missing", "mismatch"):
+            raise AssertionError(describe_failure(outcome, check))
+    
+    def _record_action(self, action: TestAction, action_index: int, start_time: float, success: bool,
+                       result: Dict[str, Any]) -> None:
+        """Store the timing of an executed action in the result
+        
+        Args:
+            action: The executed TestAction
+            action_index: Index of the action
+            start_time: Time the action started
+            success: Whether the action succeeded
+            result: Result dictionary to update
+        """
+        result["actions"].append({
+            "index": action_index,
+            "action_type": action.action_type.value,
+            "duration": time.time() - start_time,
+            "success": success
+        })
+    
+    def _trace_action(self, trace_writer, trace_path: str, driver: webdriver.Remote, step: CompiledAction,
+                      result: Dict[str, Any], error=None, screenshot=None) -> None:
+        """Queue a trace record describing an executed action and the page after it
+        
+        Args:
+            trace_writer: TraceWriter of the running test
+            trace_path: Trace file of the running test
+            driver: WebDriver instance
+            step: The executed CompiledAction
+            result: Result dictionary of the running test
+            error: Error message if the action failed
+            screenshot: Path of the screenshot taken after the failure, if any
+        """
+        from app.trace import snapshot_page, read_console_logs
+        action = step.action
+        timing = result["actions"][-1]
+        record = {
+            "type": "action",
+            "index": step.index,
+            "action_type": action.action_type.value,
+            "target": action.target,
+            "value": action.value,
+            "time": time.time(),
+            "duration": timing["duration"],
+            "success": error is None,
+            "error": error
+        }
+        record.update(snapshot_page(driver, step.locator[1] if step.locator else None, self.trace_dom))
+        record["console"] = read_console_logs(driver)
+        if screenshot is not None:
+            record["screenshot"] = os.path.abspath(screenshot)
+        trace_writer.write(trace_path, record)
+    
+    def _record_performance(self, driver: webdriver.Remote, action: TestAction, action_index: int,
+                            result: Dict[str, Any]) -> None:
+        """Collect page-load metrics after a navigation and store them in the result
+        
+        Args:
+            driver: WebDriver instance
+            action: The TestAction that triggered the navigation
+            action_index: Index of the current action
+            result: Result dictionary to update
+        """
+        metrics = collect_metrics(driver)
+        if metrics:
+            result["performance"].append({
+                "action_index": action_index,
+                "action_type": action.action_type.value,
+                "metrics": metrics
+            })
+    
+    def _last_performance(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the metrics of the most recent navigation
+        
+        Args:
+            result: Result dictionary of the running test
             
-        elif action.action_type == ActionType.EXECUTE_SCRIPT:
-            script = action.value
-            if action.target:
-                # Find element and pass to script
-                element = driver.find_element(By.CSS_SELECTOR, action.target)
-                driver.execute_script(script, element)
-            else:
-                # Execute script without element
-                driver.execute_script(script)
+        Returns:
+            Metrics dictionary of the latest page load
+        """
+        if not result["performance"]:
+            raise AssertionError("No page load metrics recorded; add a Navigate action before performance assertions")
+        return result["performance"][-1]["metrics"]
     
-    def _capture_error_screenshot(self, driver: webdriver.Remote, action_index: int, 
-                                result: Dict[str, Any]) -> None:
+    def _capture_error_screenshot(self, driver: webdriver.Remote, error_screenshot: str,
+                                result: Dict[str, Any]) -> Optional[str]:
         """Capture screenshot on error
         
         Args:
             driver: WebDriver instance
-            action_index: Index of the failed action
+            error_screenshot: Path to save the screenshot to
             result: Result dictionary to update
+            
+        Returns:
+            The path, or None if no screenshot could be taken
         """
         try:
-            error_screenshot = f"error_{action_index}.png"
             driver.save_screenshot(error_screenshot)
             result["screenshots"].append(error_screenshot)
+            return error_screenshot
         except Exception:
             # Ignore errors during screenshot capture
-            pass
+            return None
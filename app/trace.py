@@ -0,0 +1,275 @@
+"""
+Trace module for the UWAutoTest application
+Records per-action traces of test runs to JSONL files and reads them back
+"""
+import base64
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from app.models import TestCase
+
+
+TRACE_EXTENSION = ".trace.jsonl"
+
+# Maximum number of records waiting to be written before tests block
+TRACE_QUEUE_SIZE = 10000
+
+# Gathers the page state after an action in a single round trip
+TRACE_SNAPSHOT_SCRIPT = """
+const selector = arguments[0];
+const includeDom = arguments[1];
+let element = null;
+if (selector) {
+    try { element = document.querySelector(selector); } catch (e) {}
+}
+let info = null;
+if (element) {
+    const rect = element.getBoundingClientRect();
+    info = {
+        tag: element.tagName.toLowerCase(),
+        id: element.id || null,
+        classes: element.className && element.className.baseVal === undefined ? element.className : null,
+        name: element.getAttribute('name'),
+        text: (element.innerText || element.value || '').slice(0, 200),
+        rect: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+        visible: rect.width > 0 && rect.height > 0
+    };
+}
+return {
+    url: location.href,
+    title: document.title,
+    element: info,
+    dom: includeDom && document.documentElement ? document.documentElement.outerHTML : null
+};
+"""
+
+
+def trace_file_name(test_case: TestCase, variant: str = "") -> str:
+    """Build a unique, filesystem-safe trace file name for a test run
+
+    The random suffix keeps runs of the same test that start in the same
+    millisecond, e.g. on every cell of a browser matrix, in separate files.
+
+    Args:
+        test_case: The TestCase being run
+        variant: Browser configuration the test runs in, e.g. 'chrome-headless-max'
+    """
+    safe_name = re.sub(r"[^\w.-]+", "_", test_case.name).strip("_") or "test"
+    if variant:
+        safe_name += "-" + re.sub(r"[^\w.-]+", "_", variant)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return f"{safe_name}-{stamp}-{uuid.uuid4().hex[:8]}{TRACE_EXTENSION}"
+
+
+def compress_text(text: str) -> str:
+    """Compress text for storage in a JSON record"""
+    return base64.b64encode(zlib.compress(text.encode("utf-8"), 6)).decode("ascii")
+
+
+def decompress_text(data: str) -> str:
+    """Restore text stored with compress_text"""
+    return zlib.decompress(base64.b64decode(data)).decode("utf-8")
+
+
+class TraceWriter:
+    """Writes trace records on a background thread
+
+    Tests only put records on a queue; JSON encoding, DOM compression and
+    file I/O happen on the writer thread, so tracing adds little to the
+    time of each action. One writer serves all tests of a runner.
+    """
+
+    def __init__(self, trace_dir: str):
+        """Initialize the writer
+
+        Args:
+            trace_dir: Directory the trace files are written to
+        """
+        self.trace_dir = trace_dir
+        self._queue: "queue.Queue" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def open_trace(self, test_case: TestCase, variant: str = "") -> str:
+        """Start the trace of a test run
+
+        Args:
+            test_case: The TestCase being run
+            variant: Browser configuration the test runs in, part of the file name
+
+        Returns:
+            Path of the trace file
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                os.makedirs(self.trace_dir, exist_ok=True)
+                self._thread = threading.Thread(target=self._write_loop, daemon=True)
+                self._thread.start()
+        path = os.path.join(self.trace_dir, trace_file_name(test_case, variant))
+        self.write(path, {
+            "type": "test_start",
+            "test": test_case.name,
+            "base_url": test_case.base_url,
+            "time": time.time(),
+            "test_case": test_case.to_dict()
+        })
+        return path
+
+    def write(self, path: str, record: Dict[str, Any]) -> None:
+        """Queue a record for a trace file
+
+        A "dom" field holding page HTML is compressed by the writer thread.
+        """
+        self._queue.put((path, record))
+
+    def close_trace(self, path: str, record: Dict[str, Any]) -> None:
+        """Queue the final record of a trace and close its file"""
+        self._queue.put((path, record))
+        self._queue.put((path, None))
+
+    def flush(self) -> None:
+        """Wait until every queued record has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _write_loop(self) -> None:
+        files = {}
+        while True:
+            path, record = self._queue.get()
+            try:
+                if record is None:
+                    handle = files.pop(path, None)
+                    if handle is not None:
+                        handle.close()
+                    continue
+                if record.get("dom") is not None:
+                    record = dict(record)
+                    record["dom_zlib"] = compress_text(record.pop("dom"))
+                handle = files.get(path)
+                if handle is None:
+                    handle = files[path] = open(path, "a", encoding="utf-8")
+                handle.write(json.dumps(record, default=str) + "\n")
+                if self._queue.empty():
+                    # Keep traces readable while a long run is still going
+                    for open_handle in files.values():
+                        open_handle.flush()
+            except Exception:
+                # A broken trace must never fail the test it describes
+                pass
+            finally:
+                self._queue.task_done()
+
+
+def snapshot_page(driver, selector: Optional[str], include_dom: bool = True) -> Dict[str, Any]:
+    """Capture URL, title, element details and DOM of the current page
+
+    Args:
+        driver: WebDriver instance
+        selector: CSS selector of the action's element, if any
+        include_dom: Whether to include the page HTML
+
+    Returns:
+        Dictionary with "url", "title", "element" and "dom"
+    """
+    try:
+        return driver.execute_script(TRACE_SNAPSHOT_SCRIPT, selector, include_dom) or {}
+    except Exception as e:
+        return {"snapshot_error": str(e).splitlines()[0] if str(e) else type(e).__name__}
+
+
+def read_console_logs(driver) -> List[Dict[str, Any]]:
+    """Read browser console messages logged since the last call
+
+    Only Chromium-based browsers expose the console log; other browsers
+    return an empty list.
+    """
+    try:
+        return [
+            {"level": entry.get("level"), "message": entry.get("message"), "timestamp": entry.get("timestamp")}
+            for entry in driver.get_log("browser")
+        ]
+    except Exception:
+        return []
+
+
+def read_trace(path: str) -> Dict[str, Any]:
+    """Load a trace file
+
+    Args:
+        path: Path of a .trace.jsonl file
+
+    Returns:
+        Dictionary with "start" and "end" records (None if missing, e.g. for
+        a run that was killed) and the list of "actions" records
+    """
+    trace = {"start": None, "actions": [], "end": None}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # The last line of an interrupted run may be incomplete
+                continue
+            if record.get("type") == "test_start":
+                trace["start"] = record
+            elif record.get("type") == "test_end":
+                trace["end"] = record
+            else:
+                trace["actions"].append(record)
+    return trace
+
+
+def record_dom(record: Dict[str, Any]) -> Optional[str]:
+    """Get the page HTML stored in an action record, if any"""
+    if record.get("dom_zlib"):
+        return decompress_text(record["dom_zlib"])
+    return record.get("dom")
+
+
+def format_action_record(record: Dict[str, Any], start_time: Optional[float] = None) -> List[str]:
+    """Describe an action record as lines of text for the viewers"""
+    status = "OK" if record.get("success") else "FAILED"
+    offset = f"+{record['time'] - start_time:.2f}s " if start_time and record.get("time") else ""
+    lines = [
+        f"#{record.get('index', 0) + 1} {record.get('action_type')} [{status}] {offset}"
+        f"({record.get('duration', 0) * 1000:.0f} ms)",
+        f"  Target: {record.get('target') or '-'}",
+    ]
+    if record.get("value"):
+        lines.append(f"  Value: {record['value']}")
+    if record.get("url"):
+        lines.append(f"  URL: {record['url']}")
+    if record.get("title"):
+        lines.append(f"  Title: {record['title']}")
+    element = record.get("element")
+    if element:
+        ident = element["tag"] + (f"#{element['id']}" if element.get("id") else "")
+        rect = element.get("rect") or {}
+        lines.append(f"  Element: <{ident}> at ({rect.get('x', 0):.0f}, {rect.get('y', 0):.0f}) "
+                     f"{rect.get('width', 0):.0f}x{rect.get('height', 0):.0f}"
+                     f"{'' if element.get('visible') else ' (not visible)'}")
+        if element.get("text"):
+            lines.append(f"  Element text: {element['text'][:120]!r}")
+    elif record.get("target") and "element" in record:
+        lines.append("  Element: not found on the page")
+    if record.get("error"):
+        lines.append(f"  Error: {record['error']}")
+    if record.get("snapshot_error"):
+        lines.append(f"  Snapshot failed: {record['snapshot_error']}")
+    for entry in record.get("console", []):
+        lines.append(f"  Console {entry.get('level')}: {entry.get('message')}")
+    if record.get("screenshot"):
+        lines.append(f"  Screenshot: {record['screenshot']}")
+    if record.get("dom_zlib") or record.get("dom"):
+        lines.append("  DOM snapshot: available")
+    return lines
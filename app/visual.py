@@ -0,0 +1,597 @@
+"""
+Visual module for the UWAutoTest application
+Compares screenshots against stored baselines for the Assert Screenshot action
+"""
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE_DIR = os.path.join(PROJECT_DIR, "baselines")
+
+INDEX_FILE_NAME = "index.json"
+
+# Channel difference (0-255) below which a pixel counts as unchanged, so
+# anti-aliasing noise does not fail a comparison
+DEFAULT_PIXEL_THRESHOLD = 10
+
+# Number of decoded baselines kept in memory, e.g. for data-driven rows that
+# all compare against the same image
+IMAGE_CACHE_SIZE = 8
+
+# Values of update_baselines: record baselines that do not exist yet, or
+# also replace baselines that no longer match
+UPDATE_MODES = ("missing", "all")
+
+RECT_PATTERN = re.compile(r"^\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*$")
+
+# Finds the ignored elements, in document coordinates, with the scroll
+# position and pixel ratio needed to map them onto the screenshot
+IGNORE_RECTS_SCRIPT = """
+const selectors = arguments[0];
+const element = arguments[1];
+const rects = [];
+for (const selector of selectors) {
+    for (const match of document.querySelectorAll(selector)) {
+        const r = match.getBoundingClientRect();
+        rects.push([r.left + window.scrollX, r.top + window.scrollY, r.width, r.height]);
+    }
+}
+let origin = null;
+if (element) {
+    const r = element.getBoundingClientRect();
+    origin = [r.left + window.scrollX, r.top + window.scrollY];
+}
+return {rects: rects, scroll: [window.scrollX, window.scrollY], origin: origin, ratio: window.devicePixelRatio || 1};
+"""
+
+
+def visual_available() -> bool:
+    """Check whether the optional image comparison dependencies are installed
+
+    Returns:
+        True if numpy and Pillow can be imported
+    """
+    return importlib.util.find_spec("numpy") is not None and importlib.util.find_spec("PIL") is not None
+
+
+@dataclass
+class VisualCheck:
+    """Options of an Assert Screenshot action"""
+    baseline: str
+    tolerance: float = 0.0                    # Fraction of compared pixels allowed to differ
+    threshold: int = DEFAULT_PIXEL_THRESHOLD  # Per-channel difference ignored as noise
+    ignore_regions: List[Tuple[int, int, int, int]] = field(default_factory=list)  # x, y, width, height
+    ignore_selectors: List[str] = field(default_factory=list)
+    full_page: bool = False
+
+
+def parse_visual_check(value: str, default_name: str) -> VisualCheck:
+    """Parse the value of an Assert Screenshot action
+
+    The value is the baseline name followed by optional settings separated by
+    semicolons, e.g. "home; tolerance=0.5%; threshold=16; ignore=#clock;
+    ignore=0,0,1280,60; fullpage". Every setting is optional.
+
+    Args:
+        value: Action value
+        default_name: Baseline name used when the value does not name one
+
+    Returns:
+        The parsed check
+
+    Raises:
+        ValueError: If a setting is invalid
+    """
+    check = VisualCheck(baseline=default_name)
+    for index, part in enumerate(part.strip() for part in value.split(";")):
+        if not part:
+            continue
+        key, has_value, setting = part.partition("=")
+        key = key.strip().lower()
+        setting = setting.strip()
+        if not has_value:
+            if key in ("fullpage", "full page", "full"):
+                check.full_page = True
+            elif index == 0:
+                check.baseline = part
+            else:
+                raise ValueError(f"Unknown Assert Screenshot setting '{part}'")
+        elif key == "name":
+            check.baseline = setting
+        elif key == "tolerance":
+            try:
+                tolerance = float(setting.rstrip("%")) / 100
+            except ValueError:
+                raise ValueError(f"Tolerance must be a percentage, got '{setting}'")
+            if not 0 <= tolerance <= 1:
+                raise ValueError(f"Tolerance must be between 0% and 100%, got '{setting}'")
+            check.tolerance = tolerance
+        elif key == "threshold":
+            if not setting.isdigit() or int(setting) > 255:
+                raise ValueError(f"Threshold must be a channel difference from 0 to 255, got '{setting}'")
+            check.threshold = int(setting)
+        elif key == "ignore":
+            match = RECT_PATTERN.match(setting)
+            if match:
+                check.ignore_regions.append(tuple(int(number) for number in match.groups()))
+            elif setting:
+                check.ignore_selectors.append(setting)
+            else:
+                raise ValueError("Ignore needs a CSS selector or x,y,width,height")
+        else:
+            raise ValueError(f"Unknown Assert Screenshot setting '{key}'")
+    if not check.baseline.strip():
+        raise ValueError("Assert Screenshot needs a baseline name")
+    return check
+
+
+def baseline_variant(browser: str, headless: bool, window_size: Optional[Tuple[int, int]]) -> str:
+    """Name the browser configuration a baseline was recorded with
+
+    Rendering differs between browsers and window sizes, so each
+    configuration keeps its own baselines.
+    """
+    viewport = f"{window_size[0]}x{window_size[1]}" if window_size else "max"
+    return f"{browser.lower()}-{'headless' if headless else 'headed'}-{viewport}"
+
+
+def capture_screenshot(driver, element=None, full_page: bool = False) -> bytes:
+    """Take a PNG screenshot of the page or of one element
+
+    Args:
+        driver: WebDriver instance
+        element: WebElement to capture instead of the viewport
+        full_page: Capture the whole page rather than the visible part
+
+    Returns:
+        PNG image data
+    """
+    if element is not None:
+        return element.screenshot_as_png
+    if full_page:
+        if hasattr(driver, "get_full_page_screenshot_as_png"):
+            # Firefox
+            return driver.get_full_page_screenshot_as_png()
+        if hasattr(driver, "execute_cdp_cmd"):
+            import base64
+            metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+            size = metrics.get("cssContentSize") or metrics["contentSize"]
+            data = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "png",
+                "captureBeyondViewport": True,
+                "clip": {"x": 0, "y": 0, "width": size["width"], "height": size["height"], "scale": 1}
+            })["data"]
+            return base64.b64decode(data)
+    return driver.get_screenshot_as_png()
+
+
+def find_ignore_regions(driver, check: VisualCheck, element=None) -> List[Tuple[int, int, int, int]]:
+    """Locate the ignored elements of a check in screenshot pixels
+
+    Args:
+        driver: WebDriver instance
+        check: The check whose ignore_selectors to locate
+        element: Element being captured, if the screenshot is of one element
+
+    Returns:
+        Regions as (x, y, width, height), including the fixed ignore regions
+    """
+    regions = list(check.ignore_regions)
+    if not check.ignore_selectors:
+        return regions
+    page = driver.execute_script(IGNORE_RECTS_SCRIPT, check.ignore_selectors, element)
+    if element is not None:
+        origin_x, origin_y = page["origin"]
+    elif check.full_page:
+        origin_x, origin_y = 0, 0
+    else:
+        origin_x, origin_y = page["scroll"]
+    ratio = page["ratio"]
+    for x, y, width, height in page["rects"]:
+        regions.append((
+            int((x - origin_x) * ratio), int((y - origin_y) * ratio),
+            int(width * ratio + 0.999), int(height * ratio + 0.999)
+        ))
+    return regions
+
+
+def decode_png(png: bytes):
+    """Decode PNG data into an RGB array of shape (height, width, 3)"""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(png)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def difference_hash(pixels) -> int:
+    """Compute a 64-bit perceptual difference hash (dHash) of an image
+
+    Similar-looking images have hashes that differ in few bits, so the
+    Hamming distance between two hashes describes how different two frames
+    look overall.
+    """
+    import numpy as np
+    from PIL import Image
+
+    small = np.asarray(Image.fromarray(pixels).convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hash_distance(first: int, second: int) -> int:
+    """Number of differing bits between two perceptual hashes"""
+    return bin(first ^ second).count("1")
+
+
+def compare_pixels(actual, baseline, threshold: int = DEFAULT_PIXEL_THRESHOLD,
+                   ignore_regions: Optional[List[Tuple[int, int, int, int]]] = None):
+    """Find the pixels that differ between two images of the same size
+
+    Every step is a whole-array NumPy operation on uint8 data, so a full
+    page is compared without per-pixel Python work or large temporaries.
+
+    Args:
+        actual: RGB array of the new screenshot
+        baseline: RGB array of the baseline
+        threshold: Channel difference at or below which a pixel is unchanged
+        ignore_regions: Regions (x, y, width, height) left out of the comparison
+
+    Returns:
+        (changed, changed_count, compared): a boolean array marking the
+        differing pixels, their number, and the number of pixels compared
+    """
+    import numpy as np
+
+    # |a - b| without leaving uint8: max(a, b) - min(a, b)
+    difference = np.maximum(actual, baseline)
+    difference -= np.minimum(actual, baseline)
+    np.greater(difference, threshold, out=difference)
+    # OR the channels together; far faster than a reduction over the short last axis
+    channels = difference.reshape(-1, 3)
+    changed = channels[:, 0] | channels[:, 1]
+    changed |= channels[:, 2]
+    changed = changed.view(bool).reshape(actual.shape[:2])
+    compared = changed.size
+    if ignore_regions:
+        ignored = np.zeros(changed.shape, dtype=bool)
+        for x, y, width, height in ignore_regions:
+            ignored[max(0, y):max(0, y + height), max(0, x):max(0, x + width)] = True
+        changed &= ~ignored
+        compared -= int(np.count_nonzero(ignored))
+    return changed, int(np.count_nonzero(changed)), compared
+
+
+def render_diff(actual, changed) -> bytes:
+    """Draw the changed pixels in red over a faded copy of the screenshot
+
+    Returns:
+        PNG image data
+    """
+    import numpy as np
+    from PIL import Image
+
+    image = (actual // 3 + 170).astype(np.uint8)
+    image[changed] = (255, 0, 0)
+    output = io.BytesIO()
+    Image.fromarray(image).save(output, format="PNG", compress_level=1)
+    return output.getvalue()
+
+
+def safe_file_name(key: str) -> str:
+    """Turn a baseline key into a file name"""
+    return re.sub(r"[^\w.@-]+", "_", key).strip("_") or "baseline"
+
+
+class BaselineStore:
+    """Content-addressed store of baseline screenshots
+
+    Images are stored once under the SHA-256 of their PNG data, and an
+    index maps baseline names to images. Identical baselines (a shared
+    header, say) take space only once, comparing against an unchanged
+    screenshot only needs the hash, and accepting a new baseline is just an
+    index update. Screenshots that fail a comparison are stored as pending
+    baselines, which can be accepted later without running the tests again.
+    """
+
+    def __init__(self, root: str):
+        """Initialize the store
+
+        Args:
+            root: Directory holding the index and the images
+        """
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILE_NAME)
+        self._index = {"baselines": {}, "pending": {}}
+        self._index_mtime = None
+        self._lock = threading.Lock()
+        self._images: "OrderedDict[str, Any]" = OrderedDict()
+
+    def object_path(self, digest: str) -> str:
+        """Path of the image stored under a digest"""
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.png")
+
+    def diff_path(self, key: str) -> str:
+        """Path of the diff image written for a failed comparison"""
+        return os.path.join(self.root, "diffs", f"{safe_file_name(key)}.png")
+
+    def _refresh(self) -> None:
+        """Reload the index if another process changed it"""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._index_mtime:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._index = {"baselines": index.get("baselines", {}), "pending": index.get("pending", {})}
+        self._index_mtime = mtime
+
+    def _update(self, change) -> Any:
+        """Apply a change to the index and write it back
+
+        The index is re-read under an exclusive file lock first, so worker
+        processes sharing the store do not overwrite each other's changes.
+        """
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._refresh()
+                outcome = change(self._index)
+                temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._index, f, indent=1, sort_keys=True)
+                os.replace(temp_path, self.index_path)
+                self._index_mtime = os.stat(self.index_path).st_mtime_ns
+            return outcome
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the index entry of a baseline, or None if it has none"""
+        with self._lock:
+            self._refresh()
+            return self._index["baselines"].get(key)
+
+    def baselines(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return dict(self._index["baselines"])
+
+    def pending(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return dict(self._index["pending"])
+
+    def put_object(self, png: bytes, digest: Optional[str] = None) -> str:
+        """Store PNG data under its digest, if not stored already
+
+        Returns:
+            The SHA-256 digest of the data
+        """
+        digest = digest or hashlib.sha256(png).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(png)
+            os.replace(temp_path, path)
+        return digest
+
+    def load_image(self, digest: str):
+        """Decode a stored image, keeping recently used ones in memory"""
+        with self._lock:
+            if digest in self._images:
+                self._images.move_to_end(digest)
+                return self._images[digest]
+        with open(self.object_path(digest), "rb") as f:
+            pixels = decode_png(f.read())
+        with self._lock:
+            self._images[digest] = pixels
+            while len(self._images) > IMAGE_CACHE_SIZE:
+                self._images.popitem(last=False)
+        return pixels
+
+    def set_baseline(self, key: str, entry: Dict[str, Any]) -> None:
+        """Point a baseline at a stored image, clearing any pending candidate"""
+        def change(index):
+            index["baselines"][key] = dict(entry, updated=time.time())
+            index["pending"].pop(key, None)
+        self._update(change)
+
+    def stage(self, key: str, entry: Dict[str, Any]) -> None:
+        """Record a failed screenshot as the pending candidate for a baseline"""
+        def change(index):
+            index["pending"][key] = dict(entry, time=time.time())
+        self._update(change)
+
+    def unstage(self, key: str) -> None:
+        """Drop the pending candidate of a baseline whose comparison passed again, and its diff"""
+        with self._lock:
+            self._refresh()
+            if key not in self._index["pending"]:
+                return
+        entry = self._update(lambda index: index["pending"].pop(key, None))
+        if entry and entry.get("diff"):
+            try:
+                os.remove(entry["diff"])
+            except OSError:
+                pass
+
+    def accept(self, patterns: Optional[List[str]] = None) -> List[str]:
+        """Make pending candidates the new baselines
+
+        Args:
+            patterns: Baseline keys or names to accept (a name matches all its
+                browser variants), or None for all pending candidates
+
+        Returns:
+            Keys of the accepted baselines
+        """
+        def change(index):
+            accepted = [key for key in index["pending"] if key_matches(key, patterns)]
+            for key in accepted:
+                entry = index["pending"].pop(key)
+                entry.pop("diff", None)
+                entry.pop("diff_ratio", None)
+                entry.pop("time", None)
+                index["baselines"][key] = dict(entry, updated=time.time())
+            return accepted
+        return self._update(change)
+
+    def reject(self, patterns: Optional[List[str]] = None) -> List[str]:
+        """Drop pending candidates, keeping the current baselines
+
+        Returns:
+            Keys of the dropped candidates
+        """
+        def change(index):
+            rejected = [key for key in index["pending"] if key_matches(key, patterns)]
+            for key in rejected:
+                del index["pending"][key]
+            return rejected
+        return self._update(change)
+
+    def prune(self) -> int:
+        """Delete images and diffs no longer referenced by the index
+
+        Returns:
+            Number of files deleted
+        """
+        with self._lock:
+            self._refresh()
+            used = {entry["sha256"] for section in self._index.values() for entry in section.values()}
+            used_diffs = {entry.get("diff") for entry in self._index["pending"].values()}
+        removed = 0
+        for directory, _, files in os.walk(os.path.join(self.root, "objects")):
+            for name in files:
+                if name.endswith(".png") and name[:-4] not in used:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+        diff_dir = os.path.join(self.root, "diffs")
+        if os.path.isdir(diff_dir):
+            for name in os.listdir(diff_dir):
+                path = os.path.join(diff_dir, name)
+                if path not in used_diffs:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+def key_matches(key: str, patterns: Optional[List[str]]) -> bool:
+    """Check whether a baseline key is selected by keys or names"""
+    return patterns is None or any(key == pattern or key.split("@", 1)[0] == pattern for pattern in patterns)
+
+
+def check_screenshot(store: BaselineStore, key: str, png: bytes, check: VisualCheck,
+                     ignore_regions: Optional[List[Tuple[int, int, int, int]]] = None,
+                     update: Optional[str] = None) -> Dict[str, Any]:
+    """Compare a screenshot against its baseline
+
+    The cheapest test that can decide runs first: identical PNG data passes
+    on its hash alone, without decoding either image, and a size change
+    fails without decoding the baseline. Only then are the pixels compared.
+
+    Args:
+        store: Baseline store
+        key: Baseline key (name and browser variant)
+        png: PNG data of the new screenshot
+        check: Comparison options
+        ignore_regions: Regions left out of the comparison, in pixels
+        update: None to only compare, 'missing' to record absent baselines,
+            or 'all' to also replace baselines that do not match
+
+    Returns:
+        Dictionary with "baseline", "status" ('identical', 'match', 'created',
+        'updated', 'missing' or 'mismatch') and details of any difference
+    """
+    digest = hashlib.sha256(png).hexdigest()
+    outcome = {"baseline": key, "status": "identical", "diff_ratio": 0.0}
+    baseline = store.get(key)
+    if baseline is not None and baseline["sha256"] == digest:
+        # A candidate staged by an earlier failure must not replace the baseline it now matches
+        store.unstage(key)
+        return outcome
+
+    actual = decode_png(png)
+    height, width = actual.shape[:2]
+    entry = {"sha256": digest, "width": width, "height": height, "dhash": f"{difference_hash(actual):016x}"}
+
+    if baseline is None:
+        store.put_object(png, digest)
+        if update in UPDATE_MODES:
+            store.set_baseline(key, entry)
+            outcome["status"] = "created"
+        else:
+            store.stage(key, entry)
+            outcome["status"] = "missing"
+        return outcome
+
+    outcome["distance"] = hash_distance(int(entry["dhash"], 16), int(baseline["dhash"], 16))
+    if (baseline["width"], baseline["height"]) != (width, height):
+        outcome["error"] = (f"size changed from {baseline['width']}x{baseline['height']} "
+                            f"to {width}x{height}")
+        changed = None
+        outcome["diff_ratio"] = 1.0
+    else:
+        changed, changed_count, compared = compare_pixels(actual, store.load_image(baseline["sha256"]),
+                                                          check.threshold, ignore_regions)
+        outcome["diff_ratio"] = changed_count / compared if compared else 0.0
+        if outcome["diff_ratio"] <= check.tolerance:
+            outcome["status"] = "match"
+            store.unstage(key)
+            return outcome
+
+    store.put_object(png, digest)
+    if update == "all":
+        store.set_baseline(key, entry)
+        outcome["status"] = "updated"
+        return outcome
+
+    outcome["status"] = "mismatch"
+    if changed is not None:
+        outcome["diff"] = store.diff_path(key)
+        os.makedirs(os.path.dirname(outcome["diff"]), exist_ok=True)
+        with open(outcome["diff"], "wb") as f:
+            f.write(render_diff(actual, changed))
+    store.stage(key, dict(entry, diff=outcome.get("diff"), diff_ratio=outcome["diff_ratio"]))
+    return outcome
+
+
+def describe_failure(outcome: Dict[str, Any], check: VisualCheck) -> str:
+    """Build the assertion message for a failed comparison"""
+    key = outcome["baseline"]
+    name = key.split("@", 1)[0]
+    if outcome["status"] == "missing":
+        return (f"No baseline '{key}' yet. The screenshot was saved as pending; accept it with "
+                f"'python main.py baseline accept {name}' or run with --update-baselines missing")
+    if outcome.get("error"):
+        difference = outcome["error"]
+    else:
+        difference = (f"{outcome['diff_ratio'] * 100:.2f}% of pixels changed "
+                      f"(tolerance {check.tolerance * 100:.2f}%)")
+    message = (f"Screenshot differs from baseline '{key}': {difference}, "
+               f"perceptual distance {outcome.get('distance', 0)}/64")
+    if outcome.get("diff"):
+        message += f". Diff: {outcome['diff']}"
+    return message + f". Accept it with 'python main.py baseline accept {name}'"
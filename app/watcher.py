@@ -0,0 +1,437 @@
+"""
+Watcher module for the UWAutoTest application
+Reruns affected tests when test case or suite files change
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models import TestCase
+from app.test_manager import TestManager
+from app.parameterize import expand_test_case, is_parameterized, resolve_data_source
+
+
+# inotify event masks (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# File types that can affect a test run: test cases, suites and data sources
+WATCHED_EXTENSIONS = (".json", ".csv", ".jsonl", ".ndjson")
+
+
+def is_watched_file(file_name: str) -> bool:
+    """Check whether a file name is a test, suite or data file rather than an editor temp file"""
+    if file_name.startswith(".") or file_name.endswith("~"):
+        return False
+    return file_name.lower().endswith(WATCHED_EXTENSIONS)
+
+
+def _load_libc():
+    """Load libc if it provides inotify, otherwise return None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def inotify_available() -> bool:
+    """Check whether file changes can be watched with inotify
+
+    Returns:
+        True on Linux when libc exposes inotify
+    """
+    return _load_libc() is not None
+
+
+class FileWatcher:
+    """Watches directories and reports changed files in debounced batches
+
+    Uses inotify on Linux and falls back to comparing modification times
+    every `poll_interval` seconds elsewhere. Changes are collected until no
+    new change has arrived for `debounce` seconds, so an editor writing a
+    file in several steps (or saving many files at once) triggers a single
+    callback.
+    """
+
+    def __init__(self, directories: Iterable[str], on_change: Callable[[Set[str]], None],
+                 debounce: float = 0.3, poll_interval: float = 1.0, force_polling: bool = False):
+        """Initialize the watcher
+
+        Args:
+            directories: Directories to watch (not recursive)
+            on_change: Called on the watcher thread with the set of changed file paths
+            debounce: Seconds of quiet after a change before on_change is called
+            poll_interval: Seconds between scans when inotify is not available
+            force_polling: Use the polling backend even if inotify is available
+        """
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = "polling"
+
+        self._libc = None if force_polling else _load_libc()
+        self._fd = None
+        self._watches: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start watching on a background thread"""
+        if self._libc is not None and self._init_inotify():
+            self.backend = "inotify"
+            target = self._inotify_loop
+        else:
+            self.backend = "polling"
+            target = self._polling_loop
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and wait for the background thread to exit"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _init_inotify(self) -> bool:
+        """Create the inotify instance and add a watch per directory"""
+        fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return False
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            wd = self._libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                return False
+            self._watches[wd] = directory
+        self._fd = fd
+        return True
+
+    def _read_events(self) -> Tuple[Set[str], bool]:
+        """Read pending inotify events
+
+        Returns:
+            (changed file paths, whether the kernel queue overflowed)
+        """
+        data = os.read(self._fd, 64 * 1024)
+        changed = set()
+        overflow = False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif wd in self._watches and is_watched_file(name):
+                changed.add(os.path.join(self._watches[wd], name))
+        return changed, overflow
+
+    def _inotify_loop(self) -> None:
+        pending: Set[str] = set()
+        last_change = 0.0
+        while not self._stop.is_set():
+            timeout = self.debounce if pending else 0.5
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+            if readable:
+                changed, overflow = self._read_events()
+                if overflow:
+                    # Events were dropped, so treat every watched file as changed
+                    changed |= set(self._scan())
+                if changed:
+                    pending |= changed
+                    last_change = time.time()
+            if pending and time.time() - last_change >= self.debounce:
+                self._emit(pending)
+                pending = set()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Snapshot the modification time and size of every watched file"""
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if not is_watched_file(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _polling_loop(self) -> None:
+        previous = self._scan()
+        pending: Set[str] = set()
+        last_change = 0.0
+        while not self._stop.wait(self.debounce if pending else self.poll_interval):
+            current = self._scan()
+            changed = {path for path in set(previous) | set(current) if previous.get(path) != current.get(path)}
+            previous = current
+            if changed:
+                pending |= changed
+                last_change = time.time()
+            elif pending and time.time() - last_change >= self.debounce:
+                self._emit(pending)
+                pending = set()
+
+    def _emit(self, changed: Set[str]) -> None:
+        try:
+            self.on_change(changed)
+        except Exception:
+            # A failing callback must not stop the watcher
+            pass
+
+
+class TestWatcher:
+    """Reruns the tests affected by file changes on a kept-alive browser
+
+    A changed test case file reruns that test. A changed suite file reruns
+    every test in the suite, and a changed data source reruns the
+    data-driven tests that read it. Tests run one after another on a single
+    browser session that is reset between tests and kept open between
+    reruns, so a rerun costs about as much as the actions themselves.
+    """
+
+    def __init__(self, runner, test_dir: str, suite_dir: str, test_names: Optional[List[str]] = None,
+                 suites: Optional[List[str]] = None,
+                 on_result: Optional[Callable[[TestCase, dict], None]] = None,
+                 on_rerun: Optional[Callable[[List[str], Set[str]], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None,
+                 debounce: float = 0.3, poll_interval: float = 1.0, force_polling: bool = False):
+        """Initialize the test watcher
+
+        Args:
+            runner: TestRunner used to run the tests
+            test_dir: Directory containing the test case files
+            suite_dir: Directory containing the suite files
+            test_names: Only rerun these tests (together with suites)
+            suites: Only rerun tests that belong to these suites
+            on_result: Called with (test_case, result) after each test
+            on_rerun: Called with (test names, changed files) before each rerun
+            on_error: Called with a message when a file cannot be loaded or the browser fails
+            debounce: Seconds of quiet after a change before rerunning
+            poll_interval: Seconds between scans when inotify is not available
+            force_polling: Use the polling backend even if inotify is available
+        """
+        self.runner = runner
+        self.test_dir = os.path.abspath(test_dir)
+        self.suite_dir = os.path.abspath(suite_dir)
+        self.test_names = list(test_names or [])
+        self.suites = list(suites or [])
+        self.on_result = on_result or (lambda test_case, result: None)
+        self.on_rerun = on_rerun or (lambda test_names, changed: None)
+        self.on_error = on_error or (lambda message: None)
+        self.test_manager = TestManager()
+
+        directories = [self.test_dir]
+        if self.suite_dir != self.test_dir:
+            directories.append(self.suite_dir)
+        self.file_watcher = FileWatcher(directories, self._queue_changes, debounce=debounce,
+                                        poll_interval=poll_interval, force_polling=force_polling)
+
+        self._changes: "queue.Queue[Optional[Set[str]]]" = queue.Queue()
+        self._stopped = threading.Event()
+        self._driver = None
+        self._driver_config = None
+        self._thread = None
+
+    @property
+    def backend(self) -> str:
+        """Name of the file watching backend ('inotify' or 'polling')"""
+        return self.file_watcher.backend
+
+    def start(self) -> None:
+        """Start watching, launching the browser in the background right away"""
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self.file_watcher.start()
+
+    def stop(self) -> None:
+        """Stop watching and quit the kept-alive browser
+
+        A test that is already running is finished first; the browser is
+        quit on the background thread once it is done.
+        """
+        self._stopped.set()
+        self.file_watcher.stop()
+        self._changes.put(None)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _queue_changes(self, changed: Set[str]) -> None:
+        self._changes.put(changed)
+
+    def _suite_tests(self, suite: str) -> List[str]:
+        """Load the test names of a suite, or an empty list if it cannot be read"""
+        try:
+            return self.test_manager.load_test_suite_config(os.path.join(self.suite_dir, f"{suite}.json"))["tests"]
+        except Exception as e:
+            self.on_error(f"Could not load suite '{suite}': {str(e)}")
+            return []
+
+    def _scope(self) -> Optional[Set[str]]:
+        """Names of the tests that may be rerun, or None for all tests"""
+        if not self.test_names and not self.suites:
+            return None
+        scope = set(self.test_names)
+        for suite in self.suites:
+            scope.update(self._suite_tests(suite))
+        return scope
+
+    def _data_source_users(self, paths: Set[str], scope: Optional[Set[str]]) -> List[str]:
+        """Find the data-driven tests that read any of the given data files"""
+        names = scope if scope is not None else [
+            file[:-len(".json")] for file in sorted(os.listdir(self.test_dir)) if file.endswith(".json")
+        ]
+        users = []
+        for name in sorted(names):
+            try:
+                test_case = self.test_manager.load_test_case(os.path.join(self.test_dir, f"{name}.json"))
+            except Exception:
+                continue
+            if is_parameterized(test_case) and \
+                    os.path.abspath(resolve_data_source(test_case, self.test_dir)) in paths:
+                users.append(name)
+        return users
+
+    def affected_tests(self, changed: Set[str]) -> List[str]:
+        """Work out which tests to rerun for a batch of changed files
+
+        Args:
+            changed: Absolute paths of the changed files
+
+        Returns:
+            Test names in a stable order, without duplicates
+        """
+        scope = self._scope()
+        affected = []
+        data_files = set()
+
+        def add(name):
+            if name not in affected and (scope is None or name in scope):
+                affected.append(name)
+
+        for path in sorted(changed):
+            directory, file_name = os.path.split(path)
+            name, extension = os.path.splitext(file_name)
+            if directory == self.suite_dir and extension == ".json" and directory != self.test_dir:
+                if os.path.exists(path) and (not self.suites or name in self.suites):
+                    for test_name in self._suite_tests(name):
+                        if test_name not in affected:
+                            affected.append(test_name)
+            elif extension == ".json":
+                if os.path.exists(path):
+                    add(name)
+            else:
+                data_files.add(path)
+
+        if data_files:
+            for name in self._data_source_users(data_files, scope):
+                add(name)
+        return affected
+
+    def _get_driver(self):
+        """Return the kept-alive browser, (re)starting it if needed or if the settings changed"""
+        config = self.runner._driver_config()
+        if self._driver is not None and config != self._driver_config:
+            self._quit_driver()
+        if self._driver is None:
+            self._driver = self.runner._acquire_driver()
+            self._driver_config = config
+        return self._driver
+
+    def _quit_driver(self) -> None:
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+    def _run_tests(self, test_names: List[str]) -> None:
+        """Run tests by name on the kept-alive browser"""
+        for name in test_names:
+            if self._stopped.is_set():
+                return
+            try:
+                test_case = self.test_manager.load_test_case(os.path.join(self.test_dir, f"{name}.json"))
+                test_cases = list(expand_test_case(test_case, self.test_dir))
+            except Exception as e:
+                # Usually a file caught halfway through being written; the next save reruns it
+                self.on_error(f"Could not load test '{name}': {str(e)}")
+                continue
+
+            for test_case in test_cases:
+                if self._stopped.is_set():
+                    return
+                try:
+                    driver = self._get_driver()
+                except Exception as e:
+                    self.on_error(f"WebDriver initialization failed: {str(e)}")
+                    return
+                self.on_result(test_case, self.runner.run_test(test_case, driver=driver))
+                try:
+                    self.runner.reset_driver(driver)
+                except Exception:
+                    # The session is unusable; start a fresh browser for the next test
+                    self._quit_driver()
+
+    def _run_loop(self) -> None:
+        """Launch the browser, then rerun affected tests as changes arrive"""
+        try:
+            self._get_driver()
+        except Exception as e:
+            self.on_error(f"WebDriver initialization failed: {str(e)}")
+
+        try:
+            while True:
+                changed = self._changes.get()
+                if changed is None:
+                    return
+                # Fold in changes that arrived while the previous rerun was going
+                while True:
+                    try:
+                        more = self._changes.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is None:
+                        return
+                    changed |= more
+
+                test_names = self.affected_tests(changed)
+                if test_names:
+                    self.on_rerun(test_names, changed)
+                    self._run_tests(test_names)
+        finally:
+            self._quit_driver()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files written by run_benchmarks.py
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Exits with status 1 if any metric regressed by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Tuple
+
+
+def load_metrics(path: str) -> Tuple[dict, dict]:
+    """Read the meta and metrics sections of a results file"""
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("meta", {}), data.get("metrics", {})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", help="Results from the reference commit")
+    parser.add_argument("candidate", help="Results from the commit under test")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    baseline_meta, baseline = load_metrics(args.baseline)
+    candidate_meta, candidate = load_metrics(args.candidate)
+    print(f"Baseline:  {baseline_meta.get('revision', '?')} ({baseline_meta.get('timestamp', '?')})")
+    print(f"Candidate: {candidate_meta.get('revision', '?')} ({candidate_meta.get('timestamp', '?')})\n")
+
+    regressions = 0
+    print(f"{'Metric':<60} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name in sorted(set(baseline) | set(candidate)):
+        if name not in baseline or name not in candidate:
+            side = "candidate" if name in candidate else "baseline"
+            print(f"{name:<60} {'(only in ' + side + ')':>35}")
+            continue
+        old = baseline[name]["value"]
+        new = candidate[name]["value"]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = change < 0 if candidate[name]["better"] == "higher" else change > 0
+        marker = ""
+        if worse and abs(change) > args.threshold:
+            marker = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1f}%{marker}")
+
+    print(f"\n{regressions} regression(s) above {args.threshold:.0f}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Local fixture site for the UWAutoTest benchmarks
+Serves forms, slow endpoints, dynamic elements and large DOMs on localhost
+"""
+import html
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<h1 id="title">{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+FORM_BODY = """
+<form id="login-form" method="post" action="/form/submit">
+  <input id="username" name="username" type="text">
+  <input id="password" name="password" type="password">
+  <select id="role" name="role">
+    <option value="user">User</option>
+    <option value="admin">Admin</option>
+  </select>
+  <button id="submit" type="submit">Log in</button>
+</form>
+"""
+
+DYNAMIC_BODY = """
+<div id="container"></div>
+<button id="reveal" onclick="document.getElementById('container').innerHTML = '<p id=&quot;clicked&quot;>Clicked</p>'">Reveal</button>
+<script>
+setTimeout(function () {{
+  var element = document.createElement('div');
+  element.id = 'late';
+  element.className = 'message';
+  element.textContent = 'Loaded late';
+  document.getElementById('container').appendChild(element);
+}}, {delay});
+</script>
+"""
+
+
+def query_int(query, name, default):
+    """Read an integer query parameter"""
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        return default
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Request handler for the fixture site"""
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def send_page(self, title, body, status=200):
+        """Send an HTML page"""
+        content = PAGE_TEMPLATE.format(title=html.escape(title), body=body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path in ("/", "/static"):
+            self.send_page("Static", '<p class="message">Hello from the fixture site</p><a id="next" href="/static?page=2">Next</a>')
+        elif url.path == "/form":
+            self.send_page("Form", FORM_BODY)
+        elif url.path == "/slow":
+            time.sleep(query_int(query, "ms", 500) / 1000.0)
+            self.send_page("Slow", '<p class="message">Finally</p>')
+        elif url.path == "/dynamic":
+            self.send_page("Dynamic", DYNAMIC_BODY.format(delay=query_int(query, "delay", 200)))
+        elif url.path == "/large":
+            rows = "".join(
+                f'<tr class="row" id="row-{i}"><td>{i}</td><td>Item {i}</td><td>{i * 7 % 100}</td></tr>'
+                for i in range(query_int(query, "rows", 5000))
+            )
+            self.send_page("Large", f'<table id="data"><tbody>{rows}</tbody></table><p class="message">End of table</p>')
+        else:
+            self.send_page("Not Found", "<p>Not found</p>", status=404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        fields = parse_qs(self.rfile.read(length).decode("utf-8"))
+
+        if url.path == "/form/submit":
+            username = html.escape(fields.get("username", [""])[0])
+            role = html.escape(fields.get("role", [""])[0])
+            self.send_page("Welcome", f'<p class="message" id="welcome">Welcome {username} ({role})</p>')
+        else:
+            self.send_page("Not Found", "<p>Not found</p>", status=404)
+
+
+class FixtureServer:
+    """Runs the fixture site on a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """Initialize the server
+
+        Args:
+            host: Interface to bind to
+            port: Port to listen on (0 picks a free port)
+        """
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the running site"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        """Start serving in the background"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with FixtureServer(port=8765) as server:
+        print(f"Fixture site running at {server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
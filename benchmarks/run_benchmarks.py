@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the UWAutoTest test runner
+
+Starts the local fixture site, runs synthetic test cases through TestRunner
+and writes machine-readable results that can be compared between commits
+with benchmarks/compare.py. Runs offline with headless Chrome on Linux.
+
+Usage:
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --sizes 10,100 --workers 1,4 --chromedriver /usr/bin/chromedriver
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, List
+
+from app.metrics import process_tree_rss
+from app.test_runner import TestRunner
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.synthetic import make_test_case, HTTP_BLOCKS
+
+
+# Where results go without --output; ignored by git
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class MemorySampler:
+    """Samples the peak memory of the browser processes started by this process"""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_rss = self._own_rss()
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process_tree_rss(os.getpid()) - own_rss)
+            self._stop.wait(self.interval)
+
+    @staticmethod
+    def _own_rss():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            return 0
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Median, mean and p95 of a list of samples"""
+    if not samples:
+        return {"count": 0, "median": 0.0, "mean": 0.0, "p95": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    }
+
+
+def bench_driver_startup(runner: TestRunner, repeat: int) -> Dict[str, Any]:
+    """Measure the cost of starting and quitting a browser session"""
+    startup = []
+    shutdown = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        driver = runner._create_driver()
+        startup.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        driver.quit()
+        shutdown.append(time.perf_counter() - start)
+    return {"startup": summarize(startup), "shutdown": summarize(shutdown)}
+
+
+def bench_throughput(runner: TestRunner, base_url: str, size: int, workers: int, count: int,
+                     startup_cost: float, kinds=None) -> Dict[str, Any]:
+    """Run `count` synthetic tests of `size` actions on `workers` workers"""
+    kinds = kinds or ("static", "form", "dynamic", "large")
+    test_cases = [make_test_case(base_url, size, kinds, name=f"bench-{size}-{i}") for i in range(count)]
+
+    action_latency = {}
+    overhead = []
+    failures = []
+    engines = {}
+    with MemorySampler() as sampler:
+        start = time.perf_counter()
+        for test_case, result in runner.run_tests(test_cases, max_workers=workers):
+            if not result["success"]:
+                failures.append(f"{test_case.name}: {result['error']}")
+            engine = result.get("engine", "selenium")
+            engines[engine] = engines.get(engine, 0) + 1
+            action_time = 0.0
+            for action in result["actions"]:
+                action_latency.setdefault(action["action_type"], []).append(action["duration"])
+                action_time += action["duration"]
+            # Time spent in the runner itself, outside of browser startup and actions
+            startup = startup_cost if engine == "selenium" else 0.0
+            overhead.append(max(0.0, result["duration"] - action_time - startup))
+        wall = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "workers": workers,
+        "tests": count,
+        "actions_per_test": len(test_cases[0].actions),
+        "wall_time": wall,
+        "tests_per_sec": count / wall if wall else 0.0,
+        "actions_per_sec": count * len(test_cases[0].actions) / wall if wall else 0.0,
+        "action_latency": {key: summarize(values) for key, values in action_latency.items()},
+        "runner_overhead_per_test": summarize(overhead),
+        "browser_memory_peak": sampler.peak,
+        "memory_per_worker": sampler.peak / workers if workers else 0,
+        "engines": engines,
+        "failures": failures[:10]
+    }
+
+
+def git_revision() -> str:
+    """Current git commit of the working tree, if available"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten_metrics(results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Extract the headline metrics used to compare runs
+
+    Returns:
+        Mapping of metric name to {"value": ..., "better": "higher" | "lower"}
+    """
+    metrics = {}
+    startup = results.get("driver_startup")
+    if startup:
+        metrics["driver_startup_median_s"] = {"value": startup["startup"]["median"], "better": "lower"}
+    for run in results.get("throughput", []):
+        prefix = f"browser.size{run['size']}.workers{run['workers']}"
+        metrics[f"{prefix}.tests_per_sec"] = {"value": run["tests_per_sec"], "better": "higher"}
+        metrics[f"{prefix}.overhead_median_s"] = {"value": run["runner_overhead_per_test"]["median"], "better": "lower"}
+        metrics[f"{prefix}.memory_per_worker_mb"] = {"value": run["memory_per_worker"] / 2**20, "better": "lower"}
+        for action_type, summary in run["action_latency"].items():
+            metrics[f"{prefix}.{action_type}.median_ms"] = {"value": summary["median"] * 1000, "better": "lower"}
+    for run in results.get("http_engine", []):
+        prefix = f"http.size{run['size']}.workers{run['workers']}"
+        metrics[f"{prefix}.tests_per_sec"] = {"value": run["tests_per_sec"], "better": "higher"}
+        metrics[f"{prefix}.overhead_median_s"] = {"value": run["runner_overhead_per_test"]["median"], "better": "lower"}
+    return metrics
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the UWAutoTest runner against a local fixture site")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "bench_results.json"),
+                        help="Where to write the JSON results (default: benchmarks/results/bench_results.json)")
+    parser.add_argument("--sizes", type=parse_int_list, default=[10, 50], help="Comma-separated action counts")
+    parser.add_argument("--workers", type=parse_int_list, default=[1, 2], help="Comma-separated worker counts")
+    parser.add_argument("--tests", type=int, default=4, help="Tests per size/worker combination")
+    parser.add_argument("--startup-repeat", type=int, default=3, help="Browser start/quit samples")
+    parser.add_argument("--http-tests", type=int, default=200, help="Tests for the HTTP engine benchmark")
+    parser.add_argument("--chromedriver", default=shutil.which("chromedriver"),
+                        help="chromedriver executable (default: from PATH; downloads one if missing)")
+    parser.add_argument("--skip-browser", action="store_true", help="Only run benchmarks that need no browser")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "throughput": [],
+        "http_engine": []
+    }
+
+    with FixtureServer() as server:
+        print(f"Fixture site at {server.base_url}")
+
+        http_runner = TestRunner(headless=True, wait_time=5, engine="auto")
+        for size in args.sizes:
+            for workers in args.workers:
+                run = bench_throughput(http_runner, server.base_url, size, workers, args.http_tests, 0.0, HTTP_BLOCKS)
+                results["http_engine"].append(run)
+                print(f"HTTP engine  size={size:<4} workers={workers:<2} {run['tests_per_sec']:8.1f} tests/s")
+
+        if not args.skip_browser:
+            runner = TestRunner(headless=True, wait_time=5, driver_path=args.chromedriver)
+            results["driver_startup"] = bench_driver_startup(runner, args.startup_repeat)
+            startup_cost = results["driver_startup"]["startup"]["median"] + results["driver_startup"]["shutdown"]["median"]
+            print(f"Driver startup: {results['driver_startup']['startup']['median']:.2f}s median")
+
+            for size in args.sizes:
+                for workers in args.workers:
+                    run = bench_throughput(runner, server.base_url, size, workers, args.tests, startup_cost)
+                    results["throughput"].append(run)
+                    print(f"Browser      size={size:<4} workers={workers:<2} {run['tests_per_sec']:8.2f} tests/s  "
+                          f"overhead {run['runner_overhead_per_test']['median']*1000:.0f}ms/test  "
+                          f"{run['memory_per_worker'] / 2**20:.0f}MB/worker  failures {len(run['failures'])}")
+
+    # Peak memory of the harness process itself (ru_maxrss is in KB on Linux)
+    results["harness_peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results["metrics"] = flatten_metrics(results)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the UWAutoTest GUI
+
+Uses `python -X importtime` to break down the import cost of app.gui and
+times a cold start of the GUI window in fresh interpreters. Fails if heavy
+modules such as Selenium are imported before the window appears, or if the
+cold start exceeds the budget.
+
+Usage:
+    python -m benchmarks.startup_bench [--repeat 5] [--budget 1.0] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported while the window is being shown
+DEFERRED_MODULES = ("selenium", "webdriver_manager", "bs4", "urllib3")
+
+WINDOW_SNIPPET = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+from app.gui import TestingToolGUI
+root = tk.Tk()
+TestingToolGUI(root)
+root.update()
+print(time.perf_counter() - start)
+root.destroy()
+"""
+
+
+def run_python(args):
+    """Run a fresh interpreter in the project directory"""
+    return subprocess.run(
+        [sys.executable] + args, cwd=PROJECT_DIR, capture_output=True, text=True
+    )
+
+
+def import_profile(module: str):
+    """Import a module with -X importtime and parse the report
+
+    Returns:
+        List of (module name, self microseconds, cumulative microseconds)
+    """
+    completed = run_python(["-X", "importtime", "-c", f"import {module}"])
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr)
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def time_window(repeat: int):
+    """Time creating the GUI window in fresh interpreters
+
+    Returns:
+        List of startup times in seconds, or None if no display is available
+    """
+    samples = []
+    for _ in range(repeat):
+        completed = run_python(["-c", WINDOW_SNIPPET])
+        if completed.returncode != 0:
+            if "display" in completed.stderr.lower():
+                return None
+            raise RuntimeError(completed.stderr)
+        samples.append(float(completed.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def time_interpreter(repeat: int):
+    """Time a bare interpreter start for reference"""
+    import time
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_python(["-c", "pass"])
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure GUI startup cost")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of cold starts to time")
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum median window start time in seconds")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    entries = import_profile("app.gui")
+    gui_entry = next(entry for entry in entries if entry[0] == "app.gui")
+    deferred = sorted({name.split(".")[0] for name, _, _ in entries if name.split(".")[0] in DEFERRED_MODULES})
+
+    print(f"app.gui import: {gui_entry[2] / 1000:.1f} ms cumulative")
+    print(f"\nSlowest imports (self time):")
+    for name, self_us, cumulative_us in sorted(entries, key=lambda entry: entry[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:7.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    interpreter = time_interpreter(args.repeat)
+    window = time_window(args.repeat)
+    print(f"\nInterpreter start: {statistics.median(interpreter) * 1000:.0f} ms median")
+    if window is None:
+        print("Window start: skipped (no display available)")
+    else:
+        print(f"Window start: {statistics.median(window) * 1000:.0f} ms median over {len(window)} runs")
+
+    failures = []
+    if deferred:
+        failures.append(f"Modules that should load lazily were imported at startup: {', '.join(deferred)}")
+    if window is not None and statistics.median(window) > args.budget:
+        failures.append(f"Window start exceeded the {args.budget:.2f}s budget")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "gui_import_ms": gui_entry[2] / 1000,
+                "imports": [{"module": name, "self_us": self_us, "cumulative_us": cumulative_us}
+                            for name, self_us, cumulative_us in entries],
+                "interpreter_start_s": interpreter,
+                "window_start_s": window,
+                "eagerly_imported": deferred,
+                "failures": failures
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
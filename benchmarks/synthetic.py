@@ -0,0 +1,104 @@
+"""
+Synthetic test case generator for the UWAutoTest benchmarks
+Builds TestCases of a given size against the fixture site
+"""
+from typing import List
+
+from app.models import TestCase, TestAction, ActionType
+
+
+def form_block() -> List[TestAction]:
+    """Fill in and submit the login form"""
+    return [
+        TestAction(ActionType.NAVIGATE, "/form"),
+        TestAction(ActionType.INPUT, "#username", "bench"),
+        TestAction(ActionType.INPUT, "#password", "secret"),
+        TestAction(ActionType.SELECT, "#role", "Admin"),
+        TestAction(ActionType.SUBMIT, "#login-form"),
+        TestAction(ActionType.ASSERT_TEXT, "#welcome", "Welcome bench"),
+    ]
+
+
+def plain_form_block() -> List[TestAction]:
+    """Fill in and submit the login form without touching the dropdown"""
+    return [
+        TestAction(ActionType.NAVIGATE, "/form"),
+        TestAction(ActionType.INPUT, "#username", "bench"),
+        TestAction(ActionType.INPUT, "#password", "secret"),
+        TestAction(ActionType.SUBMIT, "#login-form"),
+        TestAction(ActionType.ASSERT_TEXT, "#welcome", "Welcome bench (user)"),
+    ]
+
+
+def static_block() -> List[TestAction]:
+    """Load a small static page and check it"""
+    return [
+        TestAction(ActionType.NAVIGATE, "/static"),
+        TestAction(ActionType.ASSERT_TEXT, ".message", "Hello"),
+        TestAction(ActionType.ASSERT_ELEMENT, "#next", "true"),
+    ]
+
+
+def dynamic_block() -> List[TestAction]:
+    """Wait for script-inserted elements and click"""
+    return [
+        TestAction(ActionType.NAVIGATE, "/dynamic?delay=200"),
+        TestAction(ActionType.WAIT, "#late"),
+        TestAction(ActionType.ASSERT_TEXT, "#late", "Loaded late"),
+        TestAction(ActionType.CLICK, "#reveal"),
+        TestAction(ActionType.ASSERT_ELEMENT, "#clicked", "true"),
+    ]
+
+
+def large_block(rows: int = 5000) -> List[TestAction]:
+    """Load a large DOM and query deep into it"""
+    return [
+        TestAction(ActionType.NAVIGATE, f"/large?rows={rows}"),
+        TestAction(ActionType.ASSERT_ELEMENT, f"#row-{rows - 1}", "true"),
+        TestAction(ActionType.ASSERT_TEXT, f"#row-{rows // 2}", f"Item {rows // 2}"),
+    ]
+
+
+def slow_block(ms: int = 300) -> List[TestAction]:
+    """Load a page with a slow server response"""
+    return [
+        TestAction(ActionType.NAVIGATE, f"/slow?ms={ms}"),
+        TestAction(ActionType.ASSERT_TEXT, ".message", "Finally"),
+    ]
+
+
+BLOCKS = {
+    "form": form_block,
+    "plain_form": plain_form_block,
+    "static": static_block,
+    "dynamic": dynamic_block,
+    "large": large_block,
+    "slow": slow_block,
+}
+
+# Blocks the HTTP engine can run without a browser
+HTTP_BLOCKS = ("static", "plain_form")
+
+
+def make_test_case(base_url: str, size: int, kinds=("static", "form", "dynamic", "large"),
+                   name: str = "") -> TestCase:
+    """Generate a test case with at least `size` actions
+
+    Whole blocks are repeated in order until the size is reached, so every
+    generated test case is a valid, passing flow.
+
+    Args:
+        base_url: Base URL of the fixture site
+        size: Minimum number of actions
+        kinds: Names of the blocks to cycle through
+        name: Test case name (defaults to a name derived from size and kinds)
+
+    Returns:
+        The generated TestCase
+    """
+    actions = []
+    index = 0
+    while len(actions) < size:
+        actions.extend(BLOCKS[kinds[index % len(kinds)]]())
+        index += 1
+    return TestCase(name=name or f"synthetic-{'-'.join(kinds)}-{size}", base_url=base_url, actions=actions)
@@ -2,9 +2,16 @@
 """
 UWAutoTest - Automated Website Testing Tool
 Main application entry point
+
+Run without arguments to start the GUI, or with a command (e.g. "run",
+"load") to use the command line interface.
 """
 import sys
 
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from app.cli import main
+    sys.exit(main())
+
 try:
     import tkinter as tk
     from tkinter import ttk, messagebox